@@ -0,0 +1,137 @@
+-- Upgrade a Supabase database created from the original schema.sql (ideas,
+-- topics, idea_relationships, insights; updated_at on ideas only) to the
+-- current one. schema.sql itself only works on an empty database.
+--
+-- Run this once in the SQL editor, then run every CREATE OR REPLACE FUNCTION
+-- in schema.sql from search_ideas_ranked down (functions hold no data and are
+-- safe to re-run). Every statement here is a no-op when its object already
+-- exists, so running it twice does no harm.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- updated_at on the other three tables. Existing rows start at their
+-- created_at; the column and its backfill come before the triggers below, so
+-- the backfill neither bumps updated_at to now nor lands in change_log.
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE idea_relationships ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE insights ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+UPDATE topics SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE idea_relationships SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE insights SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE topics ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE idea_relationships ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE insights ALTER COLUMN updated_at SET DEFAULT NOW();
+
+CREATE OR REPLACE TRIGGER topics_updated_at
+BEFORE UPDATE ON topics
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+CREATE OR REPLACE TRIGGER idea_relationships_updated_at
+BEFORE UPDATE ON idea_relationships
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+CREATE OR REPLACE TRIGGER insights_updated_at
+BEFORE UPDATE ON insights
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- Daily activity rollup, filled from the ideas already there.
+CREATE TABLE IF NOT EXISTS idea_activity_daily (
+  day DATE NOT NULL,
+  category category_type NOT NULL,
+  ideas INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, category)
+);
+
+CREATE OR REPLACE FUNCTION track_idea_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_archived IS NOT TRUE THEN
+    UPDATE idea_activity_daily SET ideas = ideas - 1
+    WHERE day = (OLD.created_at AT TIME ZONE 'UTC')::date AND category = OLD.category;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_archived IS NOT TRUE THEN
+    INSERT INTO idea_activity_daily (day, category, ideas)
+    VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+    ON CONFLICT (day, category) DO UPDATE SET ideas = idea_activity_daily.ideas + 1;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The lock keeps ideas still while the rollup is filled and the trigger
+-- attached, so no capture is counted twice or missed.
+LOCK TABLE ideas IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO idea_activity_daily (day, category, ideas)
+SELECT (created_at AT TIME ZONE 'UTC')::date, category, count(*)
+FROM ideas
+WHERE is_archived IS NOT TRUE
+GROUP BY 1, 2
+ON CONFLICT (day, category) DO NOTHING;
+
+CREATE OR REPLACE TRIGGER ideas_activity
+AFTER INSERT OR DELETE OR UPDATE OF category, is_archived, created_at ON ideas
+FOR EACH ROW EXECUTE FUNCTION track_idea_activity();
+
+-- Change log. It starts empty: follow it from an /export taken after this runs.
+CREATE TABLE IF NOT EXISTS change_log (
+  seq BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+  table_name TEXT NOT NULL,
+  row_id UUID NOT NULL,
+  op TEXT NOT NULL,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_order ON change_log(txid, seq);
+
+CREATE OR REPLACE FUNCTION log_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  change TEXT := lower(TG_OP);
+BEGIN
+  IF TG_OP = 'UPDATE' AND TG_TABLE_NAME = 'ideas' THEN
+    -- Nested so NEW.is_archived is only looked at on ideas.
+    IF NEW.is_archived AND NOT OLD.is_archived THEN
+      change := 'archive';
+    END IF;
+  END IF;
+  INSERT INTO change_log (table_name, row_id, op)
+  VALUES (TG_TABLE_NAME, CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END, change);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER ideas_change_log
+AFTER INSERT OR UPDATE OR DELETE ON ideas
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE OR REPLACE TRIGGER topics_change_log
+AFTER INSERT OR UPDATE OR DELETE ON topics
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE OR REPLACE TRIGGER idea_relationships_change_log
+AFTER INSERT OR UPDATE OR DELETE ON idea_relationships
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE OR REPLACE TRIGGER insights_change_log
+AFTER INSERT OR UPDATE OR DELETE ON insights
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+-- Indexes added since the original schema. idx_ideas_created_at gained id
+-- as a tie-breaker for keyset pagination, so it is rebuilt.
+DROP INDEX IF EXISTS idx_ideas_created_at;
+CREATE INDEX idx_ideas_created_at ON ideas(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ideas_category_keyset ON ideas(category, created_at DESC, id DESC) WHERE NOT is_archived;
+CREATE INDEX IF NOT EXISTS idx_insights_keyset ON insights(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ideas_imported ON ideas(id) WHERE (metadata->'source') IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_ideas_updated ON ideas(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_topics_updated ON topics(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_relationships_updated ON idea_relationships(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_insights_updated ON insights(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_insights_related_ideas ON insights USING GIN(related_idea_ids);
+CREATE INDEX IF NOT EXISTS idx_relationships_target ON idea_relationships(target_id, source_id);
+CREATE INDEX IF NOT EXISTS idx_ideas_title_trgm ON ideas USING GIN(title gin_trgm_ops);
+
+COMMIT;
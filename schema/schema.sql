@@ -1,5 +1,7 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Trigram similarity for typo-tolerant title/topic lookups
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Categories enum
 CREATE TYPE category_type AS ENUM (
@@ -32,7 +34,8 @@ CREATE TABLE topics (
   name TEXT UNIQUE NOT NULL,
   description TEXT,
   category category_type,
-  created_at TIMESTAMPTZ DEFAULT NOW()
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- Relationships between ideas (for cross-referencing)
@@ -43,6 +46,7 @@ CREATE TABLE idea_relationships (
   relationship_type TEXT DEFAULT 'related',
   note TEXT,
   created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
   UNIQUE(source_id, target_id)
 );
 
@@ -56,7 +60,8 @@ CREATE TABLE insights (
   category category_type,
   action_item TEXT,
   is_actioned BOOLEAN DEFAULT FALSE,
-  created_at TIMESTAMPTZ DEFAULT NOW()
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- Auto-update updated_at trigger
@@ -69,9 +74,387 @@ CREATE TRIGGER ideas_updated_at
 BEFORE UPDATE ON ideas
 FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
+CREATE TRIGGER topics_updated_at
+BEFORE UPDATE ON topics
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+CREATE TRIGGER idea_relationships_updated_at
+BEFORE UPDATE ON idea_relationships
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+CREATE TRIGGER insights_updated_at
+BEFORE UPDATE ON insights
+FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- Daily activity rollup: live ideas per (UTC day of created_at, category),
+-- kept current by a trigger on ideas so activity_summary reads at most one
+-- row per day and category instead of counting ideas.
+CREATE TABLE idea_activity_daily (
+  day DATE NOT NULL,
+  category category_type NOT NULL,
+  ideas INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, category)
+);
+
+CREATE OR REPLACE FUNCTION track_idea_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_archived IS NOT TRUE THEN
+    UPDATE idea_activity_daily SET ideas = ideas - 1
+    WHERE day = (OLD.created_at AT TIME ZONE 'UTC')::date AND category = OLD.category;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_archived IS NOT TRUE THEN
+    INSERT INTO idea_activity_daily (day, category, ideas)
+    VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+    ON CONFLICT (day, category) DO UPDATE SET ideas = idea_activity_daily.ideas + 1;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ideas_activity
+AFTER INSERT OR DELETE OR UPDATE OF category, is_archived, created_at ON ideas
+FOR EACH ROW EXECUTE FUNCTION track_idea_activity();
+
+-- Change log behind changes_since: one row per insert, update, archive or
+-- delete on the four tables, written by the trigger below in the same
+-- transaction as the change. Only (table, id, op) is kept; readers join the
+-- row as it is now, so the log stays small and a hard delete (e.g.
+-- remove_relationship) leaves a tombstone here. txid orders entries by
+-- transaction; see changes_since for why that matters. Rows written before
+-- the log existed are not in it: start a replica from /export, then follow it.
+-- Entries are kept for 30 days (prune_change_log below); a reader that falls
+-- further behind than that starts again from /export.
+CREATE TABLE change_log (
+  seq BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+  table_name TEXT NOT NULL,
+  row_id UUID NOT NULL,
+  op TEXT NOT NULL,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX idx_change_log_order ON change_log(txid, seq);
+
+CREATE OR REPLACE FUNCTION log_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  change TEXT := lower(TG_OP);
+BEGIN
+  IF TG_OP = 'UPDATE' AND TG_TABLE_NAME = 'ideas' THEN
+    -- Nested so NEW.is_archived is only looked at on ideas.
+    IF NEW.is_archived AND NOT OLD.is_archived THEN
+      change := 'archive';
+    END IF;
+  END IF;
+  INSERT INTO change_log (table_name, row_id, op)
+  VALUES (TG_TABLE_NAME, CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END, change);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ideas_change_log
+AFTER INSERT OR UPDATE OR DELETE ON ideas
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE TRIGGER topics_change_log
+AFTER INSERT OR UPDATE OR DELETE ON topics
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE TRIGGER idea_relationships_change_log
+AFTER INSERT OR UPDATE OR DELETE ON idea_relationships
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
+CREATE TRIGGER insights_change_log
+AFTER INSERT OR UPDATE OR DELETE ON insights
+FOR EACH ROW EXECUTE FUNCTION log_change();
+
 -- Indexes for performance
 CREATE INDEX idx_ideas_category ON ideas(category);
 CREATE INDEX idx_ideas_tags ON ideas USING GIN(tags);
-CREATE INDEX idx_ideas_created_at ON ideas(created_at DESC);
+CREATE INDEX idx_ideas_created_at ON ideas(created_at DESC, id DESC);
 CREATE INDEX idx_ideas_metadata ON ideas USING GIN(metadata);
 CREATE INDEX idx_ideas_fts ON ideas USING GIN(to_tsvector('english', title || ' ' || content));
+
+-- Keyset pagination: (created_at, id) composite indexes matching the
+-- "ORDER BY created_at DESC, id DESC" + "(created_at, id) < cursor" queries.
+-- topics pages on name, which the UNIQUE constraint already indexes.
+CREATE INDEX idx_ideas_category_keyset ON ideas(category, created_at DESC, id DESC) WHERE NOT is_archived;
+CREATE INDEX idx_insights_keyset ON insights(created_at DESC, id DESC);
+
+-- Notes written by the Markdown importer carry metadata.source = {path, hash};
+-- re-runs read them all back to skip unchanged files.
+CREATE INDEX idx_ideas_imported ON ideas(id) WHERE (metadata->'source') IS NOT NULL;
+
+-- Incremental exports page every table on (updated_at, id) from a watermark.
+CREATE INDEX idx_ideas_updated ON ideas(updated_at, id);
+CREATE INDEX idx_topics_updated ON topics(updated_at, id);
+CREATE INDEX idx_relationships_updated ON idea_relationships(updated_at, id);
+CREATE INDEX idx_insights_updated ON insights(updated_at, id);
+
+-- Reverse lookup "insights citing idea X" (related_idea_ids @> ARRAY[X]).
+CREATE INDEX idx_insights_related_ideas ON insights USING GIN(related_idea_ids);
+
+-- Relationship lookups in both directions. UNIQUE(source_id, target_id)
+-- already serves source-first lookups; reverse hops need their own index.
+CREATE INDEX idx_relationships_target ON idea_relationships(target_id, source_id);
+
+-- Fuzzy (typo-tolerant) matching on titles via pg_trgm. Topic names are
+-- matched in memory (topic_index.py).
+CREATE INDEX idx_ideas_title_trgm ON ideas USING GIN(title gin_trgm_ops);
+
+-- Ranked full-text search. Uses the same expression as idx_ideas_fts so the
+-- GIN index is used, and applies filters + LIMIT in the database so only the
+-- top N rows cross the wire. after_* is the (rank, created_at, id) keyset of
+-- the last row on the previous page. snippet is a ts_headline excerpt computed
+-- only for the returned page; callers can select=...,snippet to skip content.
+CREATE OR REPLACE FUNCTION search_ideas_ranked(
+  search_query TEXT,
+  filter_category category_type DEFAULT NULL,
+  filter_tags TEXT[] DEFAULT NULL,
+  include_archived BOOLEAN DEFAULT FALSE,
+  max_results INT DEFAULT 25,
+  after_rank REAL DEFAULT NULL,
+  after_created_at TIMESTAMPTZ DEFAULT NULL,
+  after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  content TEXT,
+  category category_type,
+  tags TEXT[],
+  metadata JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  is_archived BOOLEAN,
+  rank REAL,
+  snippet TEXT
+)
+LANGUAGE sql STABLE AS $$
+  WITH page AS (
+    SELECT * FROM (
+      SELECT i.id, i.title, i.content, i.category, i.tags, i.metadata,
+             i.created_at, i.updated_at, i.is_archived,
+             ts_rank_cd(to_tsvector('english', i.title || ' ' || i.content), q) AS rank
+      FROM ideas i, websearch_to_tsquery('english', search_query) q
+      WHERE to_tsvector('english', i.title || ' ' || i.content) @@ q
+        AND (include_archived OR NOT i.is_archived)
+        AND (filter_category IS NULL OR i.category = filter_category)
+        AND (filter_tags IS NULL OR i.tags && filter_tags)
+    ) ranked
+    WHERE after_rank IS NULL
+       OR (ranked.rank, ranked.created_at, ranked.id) < (after_rank, after_created_at, after_id)
+    ORDER BY ranked.rank DESC, ranked.created_at DESC, ranked.id DESC
+    LIMIT LEAST(max_results, 101)
+  )
+  SELECT page.*,
+         ts_headline('english', page.content, websearch_to_tsquery('english', search_query),
+                     'MaxFragments=2, MaxWords=20, MinWords=8, StartSel=**, StopSel=**') AS snippet
+  FROM page
+  ORDER BY page.rank DESC, page.created_at DESC, page.id DESC;
+$$;
+
+-- Computed "snippet" columns for summary views: PostgREST exposes these as
+-- selectable fields (select=id,title,snippet) so list responses carry a short
+-- prefix instead of the full body.
+CREATE OR REPLACE FUNCTION snippet(ideas) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT CASE WHEN length($1.content) > 160
+              THEN left(regexp_replace($1.content, '\s+', ' ', 'g'), 157) || '...'
+              ELSE $1.content END;
+$$;
+
+CREATE OR REPLACE FUNCTION snippet(insights) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT CASE WHEN length($1.summary) > 160
+              THEN left(regexp_replace($1.summary, '\s+', ' ', 'g'), 157) || '...'
+              ELSE $1.summary END;
+$$;
+
+-- Multi-hop traversal of idea_relationships in one round trip. Walks
+-- breadth-first up to max_depth hops from start_id ('out' = source->target,
+-- 'in' = reverse, 'both'), one indexed query per hop: each node is kept once,
+-- at its minimum depth, and the walk stops as soon as more than max_nodes are
+-- known, so the work is bounded by the nodes returned rather than by the
+-- number of paths. Returns the subgraph (closest nodes first, capped at
+-- max_nodes) and every edge between the kept nodes.
+CREATE OR REPLACE FUNCTION traverse_related(
+  start_id UUID,
+  max_depth INT DEFAULT 2,
+  relationship_types TEXT[] DEFAULT NULL,
+  direction TEXT DEFAULT 'both',
+  max_nodes INT DEFAULT 50
+)
+RETURNS JSONB
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+  cap INT := LEAST(max_nodes, 200);
+  seen UUID[] := ARRAY[start_id];
+  depths INT[] := ARRAY[0];
+  frontier UUID[] := ARRAY[start_id];
+  hop INT := 0;
+BEGIN
+  WHILE hop < LEAST(max_depth, 4) AND cardinality(frontier) > 0 AND cardinality(seen) <= cap LOOP
+    hop := hop + 1;
+    SELECT COALESCE(array_agg(n.node_id ORDER BY n.node_id), '{}') INTO frontier
+    FROM (
+      SELECT r.target_id AS node_id
+      FROM idea_relationships r
+      WHERE direction IN ('out', 'both') AND r.source_id = ANY(frontier)
+        AND (relationship_types IS NULL OR r.relationship_type = ANY(relationship_types))
+      UNION
+      SELECT r.source_id
+      FROM idea_relationships r
+      WHERE direction IN ('in', 'both') AND r.target_id = ANY(frontier)
+        AND (relationship_types IS NULL OR r.relationship_type = ANY(relationship_types))
+    ) n
+    WHERE n.node_id <> ALL(seen);
+    seen := seen || frontier;
+    depths := depths || array_fill(hop, ARRAY[cardinality(frontier)]);
+  END LOOP;
+
+  RETURN (
+    WITH nodes AS (
+      SELECT * FROM unnest(seen, depths) AS w(node_id, depth) ORDER BY depth, node_id LIMIT cap
+    )
+    SELECT jsonb_build_object(
+      'nodes', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+                 'id', i.id, 'title', i.title, 'category', i.category, 'tags', i.tags,
+                 'is_archived', i.is_archived, 'depth', n.depth, 'snippet', snippet(i)
+               ) ORDER BY n.depth, i.id)
+        FROM nodes n JOIN ideas i ON i.id = n.node_id), '[]'::jsonb),
+      'edges', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+                 'id', r.id, 'source_id', r.source_id, 'target_id', r.target_id,
+                 'relationship_type', r.relationship_type, 'note', r.note
+               ) ORDER BY r.created_at, r.id)
+        FROM idea_relationships r
+        WHERE r.source_id IN (SELECT node_id FROM nodes)
+          AND r.target_id IN (SELECT node_id FROM nodes)
+          AND (relationship_types IS NULL OR r.relationship_type = ANY(relationship_types))), '[]'::jsonb),
+      'truncated', cardinality(seen) > cap
+    )
+  );
+END;
+$$;
+
+-- Per-tag usage counts across live ideas, used to rank topic autocompletions.
+CREATE OR REPLACE FUNCTION tag_usage_counts()
+RETURNS TABLE (tag TEXT, uses BIGINT)
+LANGUAGE sql STABLE AS $$
+  SELECT t, count(*) FROM ideas, unnest(ideas.tags) AS t
+  WHERE NOT ideas.is_archived
+  GROUP BY t;
+$$;
+
+-- Idea counts per period and category from the idea_activity_daily rollup.
+-- group_by: 'day', 'week' (ISO, Monday start), 'month', 'year', or 'all' for
+-- per-category totals (period is NULL). since is inclusive, until exclusive.
+-- Cost grows with the days in range, not with the number of ideas.
+CREATE OR REPLACE FUNCTION activity_summary(
+  group_by TEXT DEFAULT 'week',
+  since DATE DEFAULT NULL,
+  until DATE DEFAULT NULL,
+  filter_category category_type DEFAULT NULL
+)
+RETURNS TABLE (period DATE, category category_type, ideas BIGINT)
+LANGUAGE sql STABLE AS $$
+  SELECT CASE WHEN group_by = 'all' THEN NULL ELSE date_trunc(group_by, a.day)::date END AS period,
+         a.category,
+         sum(a.ideas)::bigint AS ideas
+  FROM idea_activity_daily a
+  WHERE a.ideas > 0
+    AND (since IS NULL OR a.day >= since)
+    AND (until IS NULL OR a.day < until)
+    AND (filter_category IS NULL OR a.category = filter_category)
+  GROUP BY 1, 2
+  ORDER BY 1, 2;
+$$;
+
+-- change_log entries after the (after_txid, after_seq) cursor, oldest first,
+-- each with its row as it is now (NULL for deletes and for rows deleted
+-- since). seq is assigned when a row is written, not when its transaction
+-- commits, so ordering by seq alone would let a cursor move past a slow
+-- transaction's entries before they become visible. Ordering by (txid, seq)
+-- and returning only transactions older than every one still running
+-- (pg_snapshot_xmin) means an entry is never behind a cursor that's been handed out.
+CREATE OR REPLACE FUNCTION changes_since(
+  after_txid TEXT DEFAULT NULL,
+  after_seq BIGINT DEFAULT 0,
+  tables TEXT[] DEFAULT NULL,
+  max_rows INT DEFAULT 100
+)
+RETURNS TABLE (txid TEXT, seq BIGINT, table_name TEXT, row_id UUID, op TEXT, changed_at TIMESTAMPTZ, "row" JSONB)
+LANGUAGE sql STABLE AS $$
+  SELECT c.txid::text, c.seq, c.table_name, c.row_id, c.op, c.changed_at,
+         CASE WHEN c.op = 'delete' THEN NULL
+              WHEN c.table_name = 'ideas' THEN (SELECT to_jsonb(i) FROM ideas i WHERE i.id = c.row_id)
+              WHEN c.table_name = 'topics' THEN (SELECT to_jsonb(t) FROM topics t WHERE t.id = c.row_id)
+              WHEN c.table_name = 'idea_relationships' THEN (SELECT to_jsonb(r) FROM idea_relationships r WHERE r.id = c.row_id)
+              WHEN c.table_name = 'insights' THEN (SELECT to_jsonb(s) FROM insights s WHERE s.id = c.row_id)
+         END
+  FROM change_log c
+  WHERE c.txid < pg_snapshot_xmin(pg_current_snapshot())
+    AND (after_txid IS NULL OR (c.txid, c.seq) > (after_txid::xid8, after_seq))
+    AND (tables IS NULL OR c.table_name = ANY(tables))
+  ORDER BY c.txid, c.seq
+  LIMIT max_rows;
+$$;
+
+-- Retention for change_log: deletes entries older than keep and returns how
+-- many went. Scheduled nightly with pg_cron (Database > Extensions > pg_cron
+-- in the Supabase dashboard, then once):
+--   SELECT cron.schedule('prune-change-log', '17 3 * * *', 'SELECT prune_change_log()');
+CREATE OR REPLACE FUNCTION prune_change_log(keep INTERVAL DEFAULT '30 days')
+RETURNS BIGINT
+LANGUAGE sql AS $$
+  WITH gone AS (DELETE FROM change_log WHERE changed_at < NOW() - keep RETURNING 1)
+  SELECT count(*) FROM gone;
+$$;
+
+-- Typo-tolerant title search ("brisket recpie", "trikafa"). The <% operator
+-- is served by idx_ideas_title_trgm; results are ranked by word_similarity and
+-- page on the same (rank, created_at, id) keyset as search_ideas_ranked.
+CREATE OR REPLACE FUNCTION search_ideas_fuzzy(
+  search_query TEXT,
+  filter_category category_type DEFAULT NULL,
+  filter_tags TEXT[] DEFAULT NULL,
+  include_archived BOOLEAN DEFAULT FALSE,
+  max_results INT DEFAULT 25,
+  after_rank REAL DEFAULT NULL,
+  after_created_at TIMESTAMPTZ DEFAULT NULL,
+  after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  content TEXT,
+  category category_type,
+  tags TEXT[],
+  metadata JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  is_archived BOOLEAN,
+  rank REAL,
+  snippet TEXT
+)
+LANGUAGE sql STABLE
+SET pg_trgm.word_similarity_threshold = 0.3
+AS $$
+  SELECT * FROM (
+    SELECT i.id, i.title, i.content, i.category, i.tags, i.metadata,
+           i.created_at, i.updated_at, i.is_archived,
+           word_similarity(search_query, i.title) AS rank,
+           snippet(i) AS snippet
+    FROM ideas i
+    WHERE search_query <% i.title
+      AND (include_archived OR NOT i.is_archived)
+      AND (filter_category IS NULL OR i.category = filter_category)
+      AND (filter_tags IS NULL OR i.tags && filter_tags)
+  ) ranked
+  WHERE after_rank IS NULL
+     OR (ranked.rank, ranked.created_at, ranked.id) < (after_rank, after_created_at, after_id)
+  ORDER BY ranked.rank DESC, ranked.created_at DESC, ranked.id DESC
+  LIMIT LEAST(max_results, 101);
+$$;
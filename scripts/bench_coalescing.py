@@ -0,0 +1,124 @@
+"""Check: single-flight coalescing of identical concurrent reads.
+
+Fires a burst of identical calls at each coalesced read tool, with the cache
+cleared first, against the PostgREST stand-in (scripts/fake_postgrest.py)
+and checks that the burst costs exactly one upstream request. Then checks
+read-your-writes on the cache: a load started before a write and a read
+started after it must not share a result.
+
+Exits non-zero if any check fails.
+
+Usage:
+    python scripts/bench_coalescing.py --burst 50 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_postgrest import FakePostgrest
+from fastmcp import Client
+
+
+def cases(stand_in: FakePostgrest) -> list[tuple[str, dict]]:
+    idea = stand_in.tables["ideas"][0]
+    return [
+        ("get_idea", {"idea_id": idea["id"]}),
+        ("list_topics", {}),
+        ("list_by_category", {"category": idea["category"]}),
+        ("list_insights", {}),
+        ("get_related_ideas", {"idea_id": idea["id"]}),
+        ("search_ideas", {"query": idea["content"].split()[0]}),
+    ]
+
+
+async def burst(client, server, stand_in, tool: str, args: dict, n: int) -> dict:
+    server.cache.clear()
+    stand_in.reset_counters()
+    coalesced_before = server.cache.coalesced
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(client.call_tool(tool, args, raise_on_error=False) for _ in range(n)))
+    return {
+        "calls": n,
+        "errors": sum(r.is_error for r in results),
+        "upstream_requests": stand_in.requests,
+        "coalesced": server.cache.coalesced - coalesced_before,
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+
+async def read_your_writes(cache) -> bool:
+    """A read that starts after a write must not join a load that started before it."""
+    cache.clear()
+    release = asyncio.Event()
+    loads = []
+
+    async def load(label):
+        loads.append(label)
+        if label == "before":
+            await release.wait()  # still in flight when the write lands
+        return label
+
+    key = ("ideas", "list_by_category", "groceries")
+    before = asyncio.ensure_future(cache.get_or_load(key, lambda: load("before"), tags=("category:groceries",)))
+    await asyncio.sleep(0)
+    cache.invalidate("category:groceries")  # what add_idea does after its insert
+    after = asyncio.ensure_future(cache.get_or_load(key, lambda: load("after"), tags=("category:groceries",)))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(before, after)
+    # Both loads ran, each caller got its own, and the stale one was not cached.
+    return results == ["before", "after"] and loads == ["before", "after"] and cache.get(key) == (True, "after")
+
+
+async def run(server, stand_in: FakePostgrest, n: int) -> bool:
+    ok = True
+    async with Client(server.mcp) as client:
+        # Let the warm-up (which also loads the duplicate index) finish, so
+        # its requests don't land in the first burst.
+        await server.warming
+        for tool, args in cases(stand_in):
+            row = await burst(client, server, stand_in, tool, args, n)
+            # get_related_ideas fetches both link directions, so its one load is two requests.
+            expected = 2 if tool == "get_related_ideas" else 1
+            passed = row["upstream_requests"] == expected and not row["errors"]
+            ok &= passed
+            print(f"  {'ok  ' if passed else 'FAIL'} {tool:<18} {row}")
+        passed = await read_your_writes(server.cache)
+        ok &= passed
+        print(f"  {'ok  ' if passed else 'FAIL'} read-your-writes across an in-flight load")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=50, help="identical concurrent calls per tool")
+    parser.add_argument("--latency", type=float, default=0.1, help="injected upstream latency (s)")
+    parser.add_argument("--ideas", type=int, default=200)
+    args = parser.parse_args()
+
+    stand_in = FakePostgrest(latency=args.latency)
+    stand_in.seed_ideas(args.ideas)
+    url = stand_in.start()
+    os.environ["STORAGE_BACKEND"] = "supabase"
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_ANON_KEY"] = "bench-key"
+    from second_brain_mcp import server
+
+    for name in ("second-brain", "httpx", "fastmcp"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    print(f"=== bursts of {args.burst} identical calls, {args.latency * 1000:.0f} ms upstream latency ===\n")
+    ok = asyncio.run(run(server, stand_in, args.burst))
+    stand_in.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: time to first response after a cold start (scale from zero).
+
+Starts the server exactly as the Procfile does (python second_brain_mcp/server.py)
+against the in-process PostgREST stand-in (scripts/fake_postgrest.py) and
+times, from process spawn:
+
+- listening: the port accepts connections;
+- first:     the first tool call that touches storage returns;
+- second:    the next, warm, call returns (for comparison).
+
+Each run is a fresh interpreter, so imports, client construction and the
+first upstream connection are all included. See also
+`python second_brain_mcp/server.py --import-profile`.
+
+Usage:
+    python scripts/bench_cold_start.py --runs 5 --latency 0.05
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_postgrest import FakePostgrest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SERVER = os.path.join(ROOT, "second_brain_mcp", "server.py")
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "list_topics", "arguments": {}}}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call_tool(url: str) -> bool:
+    r = httpx.post(url, json=CALL, headers=HEADERS, timeout=30)
+    return r.status_code == 200 and '"result"' in r.text
+
+
+def one_run(env: dict, timeout: float) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, SERVER],
+        cwd=ROOT,
+        env={**env, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        listening = None
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with status {proc.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                    listening = time.perf_counter() - t0
+                    break
+            except OSError:
+                time.sleep(0.005)
+        if listening is None:
+            raise RuntimeError("server did not start listening in time")
+        if not call_tool(url):
+            raise RuntimeError("first tool call failed")
+        first = time.perf_counter() - t0
+        t1 = time.perf_counter()
+        call_tool(url)
+        return {"listening": listening, "first": first, "second": time.perf_counter() - t1}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="injected upstream latency per request (s)")
+    parser.add_argument("--ideas", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-run start-up timeout (s)")
+    args = parser.parse_args()
+
+    stand_in = FakePostgrest(latency=args.latency)
+    stand_in.seed_ideas(args.ideas)
+    url = stand_in.start()
+    env = {**os.environ, "STORAGE_BACKEND": "supabase", "SUPABASE_URL": url, "SUPABASE_ANON_KEY": "bench-key"}
+
+    print(f"=== {args.runs} cold starts, {args.latency * 1000:.0f} ms upstream latency ===\n")
+    runs = []
+    for i in range(args.runs):
+        runs.append(one_run(env, args.timeout))
+        print(f"  run {i + 1}: " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in runs[-1].items()))
+    print()
+    for key in ("listening", "first", "second"):
+        values = [r[key] * 1000 for r in runs]
+        print(f"  {key:>9}: median {statistics.median(values):7.0f} ms   min {min(values):7.0f} ms")
+
+    stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
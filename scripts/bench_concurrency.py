@@ -0,0 +1,136 @@
+"""Benchmark: tool throughput with many concurrent clients, sync vs async handlers.
+
+Runs against the in-process PostgREST stand-in (scripts/fake_postgrest.py) with
+injected latency, so no Supabase project is needed. The "sync" server mirrors
+the old blocking handlers (sync supabase client, sync tool functions); the
+"async" server is second_brain_mcp/server.py itself.
+
+--error-rate makes the stand-in answer that share of requests with a transient
+503; "failed" counts the tool calls where it reached the client.
+
+Usage:
+    python scripts/bench_concurrency.py --clients 50 --calls 10 --latency 0.15
+    python scripts/bench_concurrency.py --clients 20 --calls 10 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_postgrest import FakePostgrest
+from fastmcp import Client, FastMCP
+from supabase import create_client
+
+
+def build_sync_server(url: str) -> FastMCP:
+    """Blocking baseline: the old sync supabase client called from sync tool functions."""
+    sb = create_client(url, "bench-key")
+    mcp = FastMCP("Second Brain (sync baseline)")
+
+    @mcp.tool()
+    def search_ideas(query: str = "", category: str | None = None) -> list:
+        params = {"search_query": query, "filter_category": category, "max_results": 25}
+        return sb.rpc("search_ideas_ranked", params).execute().data
+
+    @mcp.tool()
+    def list_by_category(category: str, limit: int = 20) -> list:
+        q = sb.table("ideas").select("*").eq("category", category)
+        return q.order("created_at", desc=True).limit(limit).execute().data
+
+    @mcp.tool()
+    def get_idea(idea_id: str) -> dict:
+        return sb.table("ideas").select("*").eq("id", idea_id).execute().data[0]
+
+    @mcp.tool()
+    def get_related_ideas(idea_id: str) -> list:
+        fwd = sb.table("idea_relationships").select("*, target:target_id(*)").eq("source_id", idea_id).execute().data
+        rev = sb.table("idea_relationships").select("*, source:source_id(*)").eq("target_id", idea_id).execute().data
+        return fwd + rev
+
+    return mcp
+
+
+def workload(stand_in: FakePostgrest, n: int) -> list[tuple[str, dict]]:
+    ideas = stand_in.tables["ideas"]
+    calls = []
+    for i in range(n):
+        idea = ideas[(i * 7919) % len(ideas)]
+        calls.append(
+            [
+                ("search_ideas", {"query": idea["content"].split()[0]}),
+                ("list_by_category", {"category": idea["category"], "limit": 20}),
+                ("get_idea", {"idea_id": idea["id"]}),
+                ("get_related_ideas", {"idea_id": idea["id"]}),
+            ][i % 4]
+        )
+    return calls
+
+
+async def drive(mcp: FastMCP, clients: int, calls: list[tuple[str, dict]]) -> dict:
+    latencies: list[float] = []
+    failed = 0
+
+    async def one_client(offset: int):
+        nonlocal failed
+        async with Client(mcp) as c:
+            for name, args in calls[offset::clients]:
+                t0 = time.perf_counter()
+                result = await c.call_tool(name, args, raise_on_error=False)
+                latencies.append(time.perf_counter() - t0)
+                failed += result.is_error
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one_client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "calls_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=10, help="calls per client")
+    parser.add_argument("--latency", type=float, default=0.15, help="injected upstream latency (s)")
+    parser.add_argument("--ideas", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream requests failing with 503")
+    args = parser.parse_args()
+
+    stand_in = FakePostgrest(latency=args.latency, error_rate=args.error_rate)
+    stand_in.seed_ideas(args.ideas)
+    url = stand_in.start()
+
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_ANON_KEY"] = "bench-key"
+    from second_brain_mcp import server
+
+    for name in ("second-brain", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    calls = workload(stand_in, args.clients * args.calls)
+
+    print(f"=== {args.clients} clients x {args.calls} calls, {args.latency * 1000:.0f} ms upstream latency ===\n")
+    for label, mcp in (("sync", build_sync_server(url)), ("async", server.mcp)):
+        stand_in.reset_counters()
+        result = asyncio.run(drive(mcp, args.clients, calls))
+        result["upstream_requests"] = stand_in.requests
+        result["upstream_503s"] = stand_in.errors
+        print(f"  {label:>5}: {result}")
+
+    stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Benchmark: per-tool cost — wall time, allocations, response size and round trips.
+
+Drives every tool registered in second_brain_mcp/server.py through an in-memory
+MCP client against the PostgREST stand-in (scripts/fake_postgrest.py), at
+several dataset sizes. The stand-in runs in a child process so tracemalloc only
+sees the server's own allocations, and it counts the requests each call makes.
+
+Each case is measured cold: the read cache is cleared before every call, so
+wall time and round trips reflect the work the tool really does. The topic and
+similarity indexes are loaded once per dataset before measuring, since they are
+meant to stay resident. stand_in_ms is the stand-in's own evaluation time
+(without injected latency); it grows with dataset size because the stand-in
+scans in Python, so compare wall_ms - stand_in_ms across sizes.
+
+Results are written as JSON; --compare diffs two runs and exits non-zero when a
+case makes more round trips than before or gets markedly slower.
+
+Usage:
+    python scripts/bench_tools.py --sizes 100,10000,100000 --latency 0.005
+    python scripts/bench_tools.py --sizes 100 --out bench/tools-before.json
+    python scripts/bench_tools.py --compare bench/tools-before.json bench/tools-after.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SLOWER = 1.25  # wall-time ratio flagged by --compare
+
+
+# ---------------------------------------------------------------------------
+# Stand-in process
+# ---------------------------------------------------------------------------
+
+
+def _sample(stand_in) -> dict:
+    """Ids the cases need, picked deterministically from the seeded dataset."""
+    live = [i for i in stand_in.tables["ideas"] if not i["is_archived"]]
+    linked = {r["source_id"] for r in stand_in.tables["idea_relationships"]}
+    return {
+        "ideas": [{"id": i["id"], "category": i["category"], "word": i["content"].split()[0], "title": i["title"],
+                   "tag": i["tags"][0], "content": i["content"]}
+                  for i in live[:: max(1, len(live) // 200)]],
+        "linked": [i["id"] for i in live if i["id"] in linked][:50],
+        "relationships": [r["id"] for r in stand_in.tables["idea_relationships"][:50]],
+        "insights": [i["id"] for i in stand_in.tables["insights"]],
+        "cited": [i for s in stand_in.tables["insights"] for i in s["related_idea_ids"]][:50],
+    }
+
+
+def _stand_in_worker(conn, latency: float) -> None:
+    from fake_postgrest import FakePostgrest
+
+    stand_in = FakePostgrest(latency=latency)
+    conn.send(stand_in.start())
+    while True:
+        cmd, arg = conn.recv()
+        if cmd == "seed":
+            stand_in.reset()
+            stand_in.seed_ideas(arg)
+            conn.send(_sample(stand_in))
+        elif cmd == "counters":
+            conn.send((stand_in.requests, stand_in.busy))
+        elif cmd == "stop":
+            stand_in.stop()
+            conn.send(None)
+            return
+
+
+class StandIn:
+    def __init__(self, latency: float):
+        self.conn, child = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(target=_stand_in_worker, args=(child, latency), daemon=True)
+        self.proc.start()
+        self.url = self.conn.recv()
+
+    def _ask(self, cmd: str, arg=None):
+        self.conn.send((cmd, arg))
+        return self.conn.recv()
+
+    def seed(self, n: int) -> dict:
+        return self._ask("seed", n)
+
+    def counters(self) -> tuple[int, float]:
+        return self._ask("counters")
+
+    def stop(self) -> None:
+        self._ask("stop")
+        self.proc.join(timeout=5)
+
+
+# ---------------------------------------------------------------------------
+# Cases — (label, tool, args(sample, rep)). Every registered tool needs one.
+# ---------------------------------------------------------------------------
+
+
+def _idea(s, rep):
+    return s["ideas"][rep % len(s["ideas"])]
+
+
+def _new_idea(rep: int) -> dict:
+    return {
+        "title": f"Bench idea {rep}",
+        "content": "prayer scripture healing " * 20,
+        "category": "religious_study",
+        "tags": ["prayer", "bench"],
+    }
+
+
+CASES = [
+    ("get_system_info", "get_system_info", lambda s, r: {}),
+    ("add_idea", "add_idea", lambda s, r: _new_idea(r)),
+    ("add_idea[skip-dup]", "add_idea", lambda s, r: {
+        **{k: _idea(s, r)[k] for k in ("title", "content", "category")}, "on_duplicate": "skip"
+    }),
+    ("add_ideas_bulk[50]", "add_ideas_bulk", lambda s, r: {"ideas": [_new_idea(r * 100 + i) for i in range(50)]}),
+    ("search_ideas[query]", "search_ideas", lambda s, r: {"query": _idea(s, r)["word"]}),
+    ("search_ideas[fuzzy]", "search_ideas", lambda s, r: {"query": _idea(s, r)["title"][:-1], "fuzzy": True}),
+    ("search_ideas[browse]", "search_ideas", lambda s, r: {"category": _idea(s, r)["category"]}),
+    ("search_ideas[full]", "search_ideas", lambda s, r: {"query": _idea(s, r)["word"], "view": "full"}),
+    ("get_idea", "get_idea", lambda s, r: {"idea_id": _idea(s, r)["id"]}),
+    ("update_idea", "update_idea", lambda s, r: {"idea_id": _idea(s, r)["id"], "fields": {"tags": ["bench", str(r)]}}),
+    ("list_by_category", "list_by_category", lambda s, r: {"category": _idea(s, r)["category"]}),
+    ("activity_summary", "activity_summary", lambda s, r: {"group_by": "week"}),
+    ("activity_summary[category]", "activity_summary", lambda s, r: {"group_by": "month", "category": _idea(s, r)["category"]}),
+    ("find_duplicates", "find_duplicates", lambda s, r: {}),
+    ("archive_idea", "archive_idea", lambda s, r: {"idea_id": s["ideas"][-1 - r]["id"]}),
+    ("add_topic", "add_topic", lambda s, r: {"name": f"bench-topic-{r}", "category": "groceries"}),
+    ("add_topics_bulk[50]", "add_topics_bulk", lambda s, r: {"topics": [{"name": f"bench-{r}-{i}"} for i in range(50)]}),
+    ("list_topics", "list_topics", lambda s, r: {}),
+    ("search_topics", "search_topics", lambda s, r: {"query": "pr"}),
+    ("search_topics[fuzzy]", "search_topics", lambda s, r: {"query": "scripure", "fuzzy": True}),
+    ("tag_stats", "tag_stats", lambda s, r: {}),
+    ("tag_stats[category]", "tag_stats", lambda s, r: {"category": _idea(s, r)["category"]}),
+    ("related_tags", "related_tags", lambda s, r: {"tag": _idea(s, r)["tag"]}),
+    ("link_ideas", "link_ideas", lambda s, r: {"source_id": _idea(s, r)["id"], "target_id": _idea(s, r + 7)["id"]}),
+    ("link_ideas_bulk[50]", "link_ideas_bulk", lambda s, r: {
+        "links": [{"source_id": _idea(s, r * 50 + i)["id"], "target_id": _idea(s, r * 50 + i + 3)["id"]} for i in range(50)]
+    }),
+    ("get_related_ideas", "get_related_ideas", lambda s, r: {"idea_id": s["linked"][r % len(s["linked"])]}),
+    ("traverse_related", "traverse_related", lambda s, r: {"idea_id": s["linked"][r % len(s["linked"])], "depth": 3}),
+    ("suggest_links", "suggest_links", lambda s, r: {"idea_id": _idea(s, r)["id"], "k": 10}),
+    ("remove_relationship", "remove_relationship", lambda s, r: {"relationship_id": s["relationships"][r]}),
+    ("add_insight", "add_insight", lambda s, r: {"title": f"Bench insight {r}", "summary": "pattern " * 40}),
+    ("list_insights", "list_insights", lambda s, r: {}),
+    ("list_insights[expand]", "list_insights", lambda s, r: {"expand": True}),
+    ("insights_for_idea", "insights_for_idea", lambda s, r: {"idea_id": s["cited"][r % len(s["cited"])]}),
+    ("mark_actioned", "mark_actioned", lambda s, r: {"insight_id": s["insights"][r % len(s["insights"])]}),
+    ("export_backup[full]", "export_backup", lambda s, r: {"incremental": False}),
+    ("export_backup", "export_backup", lambda s, r: {}),
+    ("changes_since", "changes_since", lambda s, r: {"limit": 100}),
+    ("get_cache_stats", "get_cache_stats", lambda s, r: {}),
+]
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+async def measure(client, server, stand_in: StandIn, sample: dict, tool: str, make_args, reps: int) -> dict:
+    walls, trips, busy, size = [], [], [], 0
+    # reps timed calls, then one more under tracemalloc (it slows everything down).
+    for rep in range(reps + 1):
+        args = make_args(sample, rep)
+        server.cache.clear()
+        requests_before, busy_before = stand_in.counters()
+        traced = rep == reps
+        if traced:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        result = await client.call_tool(tool, args, raise_on_error=False)
+        wall = time.perf_counter() - t0
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        requests_after, busy_after = stand_in.counters()
+        if result.is_error:
+            return {"error": result.content[0].text if result.content else "error"}
+        if not traced:
+            walls.append(wall)
+            trips.append(requests_after - requests_before)
+            busy.append(busy_after - busy_before)
+        size = sum(len(getattr(c, "text", "") or "") for c in result.content)
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "wall_ms_min": round(min(walls) * 1000, 2),
+        "stand_in_ms": round(statistics.median(busy) * 1000, 2),
+        "round_trips": max(trips),
+        "response_bytes": size,
+        "alloc_peak_kb": round(peak / 1024, 1),
+    }
+
+
+async def run_size(server, stand_in: StandIn, n: int, reps: int, only: set[str] | None) -> dict:
+    from fastmcp import Client
+
+    print(f"\n=== {n} ideas ===")
+    t0 = time.perf_counter()
+    sample = stand_in.seed(n)
+    server.cache.clear()
+    server.topic_index.loaded_at = None
+    server.similarity_index.loaded_at = None
+    server.tag_stats_index.loaded_at = None
+    server.dedupe_index.loaded_at = None
+    await server.topic_index.ensure_fresh()
+    await server.similarity_index.ensure_fresh()
+    await server.tag_stats_index.ensure_fresh()
+    await server.dedupe_index.ensure_fresh()
+    print(f"  seeded + indexes loaded in {time.perf_counter() - t0:.1f}s")
+
+    results = {}
+    async with Client(server.mcp) as client:
+        registered = {t.name for t in await client.list_tools()}
+        missing = registered - {tool for _, tool, _ in CASES}
+        if missing:
+            print(f"  WARNING: no benchmark case for: {', '.join(sorted(missing))}")
+        for label, tool, make_args in CASES:
+            if only and label not in only and tool not in only:
+                continue
+            results[label] = row = await measure(client, server, stand_in, sample, tool, make_args, reps)
+            if "error" in row:
+                print(f"  {label:<24} ERROR {row['error'][:80]}")
+            else:
+                print(
+                    f"  {label:<24} {row['wall_ms']:>9.2f} ms  {row['round_trips']:>3} trips  "
+                    f"{row['response_bytes']:>8} B  {row['alloc_peak_kb']:>9.1f} KiB peak  "
+                    f"(stand-in {row['stand_in_ms']:.1f} ms)"
+                )
+    return results
+
+
+def git_sha() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('git_sha')} -> {new['meta'].get('git_sha')}")
+    regressions = 0
+    for size, cases in new["results"].items():
+        before = old["results"].get(size, {})
+        print(f"\n=== {size} ideas ===")
+        for label, row in cases.items():
+            prev = before.get(label)
+            if not prev or "error" in row or "error" in prev:
+                print(f"  {label:<24} {'(new)' if not prev else '(error)'}")
+                continue
+            flags = []
+            if row["round_trips"] > prev["round_trips"]:
+                flags.append(f"ROUND TRIPS {prev['round_trips']} -> {row['round_trips']}")
+            ratio = row["wall_ms"] / prev["wall_ms"] if prev["wall_ms"] else 1.0
+            if ratio > SLOWER:
+                flags.append(f"SLOWER x{ratio:.2f}")
+            regressions += bool(flags)
+            print(
+                f"  {label:<24} {prev['wall_ms']:>9.2f} -> {row['wall_ms']:>9.2f} ms  "
+                f"{prev['response_bytes']:>8} -> {row['response_bytes']:>8} B  {'  '.join(flags)}"
+            )
+    print(f"\n{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,10000,100000", help="comma-separated idea counts")
+    parser.add_argument("--latency", type=float, default=0.005, help="injected upstream latency per request (s)")
+    parser.add_argument("--reps", type=int, default=5, help="timed calls per case")
+    parser.add_argument("--only", help="comma-separated case labels or tool names")
+    parser.add_argument("--out", help="JSON output path (default bench/tools-<git sha>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare))
+
+    stand_in = StandIn(args.latency)
+    os.environ["STORAGE_BACKEND"] = "supabase"
+    os.environ["SUPABASE_URL"] = stand_in.url
+    os.environ["SUPABASE_ANON_KEY"] = "bench-key"
+    from second_brain_mcp import server
+
+    # export_backup cases write here instead of the repo's backups/.
+    server.BACKUP_DIR = tempfile.mkdtemp(prefix="bench-backups-")
+    for name in ("second-brain", "httpx", "fastmcp"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    sha = git_sha()
+    report = {
+        "meta": {
+            "git_sha": sha,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "latency_s": args.latency,
+            "reps": args.reps,
+        },
+        "results": {},
+    }
+    only = set(args.only.split(",")) if args.only else None
+
+    async def run_all():
+        # One event loop for every size: the server's HTTP pool is bound to it.
+        for n in (int(s) for s in args.sizes.split(",")):
+            report["results"][str(n)] = await run_size(server, stand_in, n, args.reps, only)
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        stand_in.stop()
+        shutil.rmtree(server.BACKUP_DIR, ignore_errors=True)
+
+    out = args.out or os.path.join(ROOT, "bench", f"tools-{sha or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out}")
+
+
+if __name__ == "__main__":
+    main()
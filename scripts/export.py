@@ -0,0 +1,55 @@
+"""Back up every table to NDJSON (gzipped by default), full or incremental.
+
+Each run writes one file into --out and records its watermark in
+export-state.json there; the next run exports only rows changed since, so a
+nightly cron job moves just the day's changes:
+
+    python scripts/export.py --out backups/            # incremental (full the first time)
+    python scripts/export.py --out backups/ --full     # everything
+    python scripts/export.py --stdout --no-gzip --since 2025-06-01 > changes.ndjson
+
+See second_brain_mcp/export.py for the file format.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+
+from second_brain_mcp import export
+from second_brain_mcp.storage import create_storage
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "..", "backups"))
+    parser.add_argument("--full", action="store_true", help="ignore the saved watermark")
+    parser.add_argument("--no-gzip", action="store_true", help="write plain .ndjson")
+    parser.add_argument("--stdout", action="store_true", help="stream to stdout instead; no state is saved")
+    parser.add_argument("--since", help="with --stdout: only rows updated since this ISO timestamp")
+    args = parser.parse_args()
+
+    store = create_storage()
+    try:
+        if args.stdout:
+            async for chunk in export.export_bytes(store, since=args.since, compress=not args.no_gzip):
+                sys.stdout.buffer.write(chunk)
+            return
+        result = await export.backup(store, args.out, incremental=not args.full, compress=not args.no_gzip)
+    finally:
+        await store.close()
+    kind = f"incremental since {result['since']}" if result["since"] else "full"
+    print(f"Wrote {result['path']} ({kind}, {result['bytes']:,} bytes)")
+    for table, n in result["rows"].items():
+        print(f"  {table:<20} {n:>8,} rows")
+    print(f"Watermark: {result['watermark']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,798 @@
+"""In-process PostgREST stand-in for benchmarks and offline smoke runs.
+
+Speaks just enough of the PostgREST wire format for the supabase client used by
+the MCP server: table reads with filters, embedding, ordering and limits,
+inserts/upserts, updates, deletes and RPC calls. Every request can be delayed
+by a fixed latency to mimic the WAN round trip to a hosted Supabase project.
+
+Usage:
+    stand_in = FakePostgrest(latency=0.02)
+    stand_in.seed_ideas(1000)
+    url = stand_in.start()          # serves on 127.0.0.1 in a background thread
+    ...
+    stand_in.stop()
+"""
+
+import asyncio
+import copy
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import parse_qsl
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+CATEGORIES = [
+    "groceries",
+    "religious_study",
+    "finance_journal",
+    "product_ideas",
+    "health_wellness",
+    "cf_care",
+    "cooking_recipes",
+    "business_learning",
+]
+
+# (table, fk column) -> referenced table, used to resolve embeds like target:target_id(*)
+FOREIGN_KEYS = {
+    ("idea_relationships", "source_id"): "ideas",
+    ("idea_relationships", "target_id"): "ideas",
+}
+
+UNIQUE_KEYS = {
+    "topics": [("name",)],
+    "idea_relationships": [("source_id", "target_id")],
+}
+
+WORDS = (
+    "faith prayer scripture healing insurance medication treatment appointment "
+    "budget equities crypto macro portfolio brisket recipe smoker oak pepper "
+    "strategy leadership market startup sleep fitness nutrition walk energy "
+    "dashboard feature mvp pharmacy refill clinic pulmonary costco eggs milk"
+).split()
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _defaults(table: str) -> dict:
+    ts = now_iso()
+    base = {"id": str(uuid.uuid4()), "created_at": ts, "updated_at": ts}
+    if table == "ideas":
+        base.update(tags=[], metadata={}, is_archived=False)
+    elif table == "topics":
+        base.update(description=None, category=None)
+    elif table == "idea_relationships":
+        base.update(relationship_type="related", note=None)
+    elif table == "insights":
+        base.update(related_idea_ids=[], tags=[], category=None, action_item=None, is_actioned=False)
+    return base
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+    def response(self) -> JSONResponse:
+        return JSONResponse(
+            {"code": self.code, "message": self.message, "details": None, "hint": None},
+            status_code=self.status,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Filter parsing
+# ---------------------------------------------------------------------------
+
+
+def _split_top(s: str) -> list[str]:
+    """Split on commas that are not nested inside parentheses, braces or quotes."""
+    parts, depth, buf, quoted = [], 0, [], False
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "({":
+            depth += 1
+        elif not quoted and ch in ")}":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return parts
+
+
+@lru_cache(maxsize=256)
+def _parse_list(s: str) -> frozenset[str]:
+    # Evaluated once per row, so an in.(...) over a table would re-parse the same list each time.
+    s = s.strip()[1:-1]
+    return frozenset(p.strip().strip('"') for p in _split_top(s)) if s else frozenset()
+
+
+def _coerce(raw: str, current):
+    if isinstance(current, bool):
+        return raw == "true"
+    if isinstance(current, (int, float)) and not isinstance(current, bool):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def _like(pattern: str, value, case_insensitive: bool) -> bool:
+    if value is None:
+        return False
+    regex = "^" + re.escape(pattern).replace("%", ".*").replace(r"\*", ".*").replace("_", ".") + "$"
+    return re.match(regex, str(value), re.I if case_insensitive else 0) is not None
+
+
+def _get(row: dict, col: str):
+    """Column value, following JSON paths like metadata->source->>path."""
+    col, *path = re.split(r"->>?", col)
+    value = row.get(col)
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _compare(row: dict, col: str, op: str, operand: str) -> bool:
+    value = _get(row, col)
+    if len(operand) > 1 and operand[0] == operand[-1] == '"':
+        operand = operand[1:-1]
+    if op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        if value is None:
+            return False
+        other = _coerce(operand, value)
+        if not isinstance(value, (bool, int, float)):
+            value = str(value)
+        return {
+            "eq": value == other,
+            "neq": value != other,
+            "gt": value > other,
+            "gte": value >= other,
+            "lt": value < other,
+            "lte": value <= other,
+        }[op]
+    if op == "is":
+        return value is None if operand == "null" else value == (operand == "true")
+    if op == "in":
+        return str(value) in _parse_list(operand)
+    if op == "like":
+        return _like(operand, value, False)
+    if op == "ilike":
+        return _like(operand, value, True)
+    if op == "ov":
+        return bool(set(value or []) & set(_parse_list(operand)))
+    if op == "cs":
+        return set(_parse_list(operand)) <= set(value or [])
+    if op == "cd":
+        return set(value or []) <= set(_parse_list(operand))
+    if op.split("(")[0] in ("fts", "plfts", "phfts", "wfts"):
+        words = set(tokenize(value))
+        return all(t in words for t in tokenize(operand))
+    raise PostgrestError(400, "PGRST100", f"unsupported operator {op!r}")
+
+
+def _predicate(col: str, expr: str):
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, operand = expr.partition(".")
+    return lambda row: _compare(row, col, op, operand) != negate
+
+
+def _logic(kind: str, body: str):
+    preds = []
+    for part in _split_top(body[1:-1]):
+        m = re.match(r"^(not\.)?(and|or)(\(.*\))$", part)
+        if m:
+            inner = _logic(m.group(2), m.group(3))
+            preds.append((lambda p: (lambda row: not p(row)))(inner) if m.group(1) else inner)
+        else:
+            col, _, expr = part.partition(".")
+            preds.append(_predicate(col, expr))
+    if kind == "and":
+        return lambda row: all(p(row) for p in preds)
+    return lambda row: any(p(row) for p in preds)
+
+
+RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def build_filters(params: list[tuple[str, str]]):
+    preds = []
+    for key, value in params:
+        if key in RESERVED:
+            continue
+        if key in ("or", "and"):
+            preds.append(_logic(key, value))
+        else:
+            preds.append(_predicate(key, value))
+    return lambda row: all(p(row) for p in preds)
+
+
+# ---------------------------------------------------------------------------
+# RPC functions — Python mirrors of the SQL functions in schema/schema.sql
+# ---------------------------------------------------------------------------
+
+RPC_FUNCTIONS = {}
+
+
+def rpc(name: str):
+    def register(fn):
+        RPC_FUNCTIONS[name] = fn
+        return fn
+
+    return register
+
+
+def websearch_query(text: str) -> list[list[tuple[str, bool]]]:
+    """Parse websearch_to_tsquery syntax into OR-ed clauses of (term, negated) pairs."""
+    clauses, current = [], []
+    for raw in re.findall(r'-?"[^"]*"|\S+', text):
+        if raw.lower() == "or":
+            if current:
+                clauses.append(current)
+            current = []
+            continue
+        negated = raw.startswith("-")
+        current.extend((t, negated) for t in tokenize(raw))
+    if current:
+        clauses.append(current)
+    return clauses
+
+
+def ts_rank(doc: str, clauses) -> float:
+    """Rough ts_rank_cd stand-in: 0 when the query doesn't match, else term density."""
+    words = tokenize(doc)
+    present = set(words)
+    for clause in clauses:
+        if all((t in present) != neg for t, neg in clause):
+            hits = sum(words.count(t) for t, neg in clause if not neg)
+            return round(hits / 10, 4)
+    return 0.0
+
+
+@rpc("search_ideas_ranked")
+def _search_ideas_ranked(
+    db,
+    search_query,
+    filter_category=None,
+    filter_tags=None,
+    include_archived=False,
+    max_results=25,
+    after_rank=None,
+    after_created_at=None,
+    after_id=None,
+):
+    clauses = websearch_query(search_query)
+    hits = []
+    for row in db.tables["ideas"]:
+        if row["is_archived"] and not include_archived:
+            continue
+        if filter_category and row["category"] != filter_category:
+            continue
+        if filter_tags and not set(row["tags"]) & set(filter_tags):
+            continue
+        rank = ts_rank(row["title"] + " " + row["content"], clauses)
+        if rank:
+            hits.append({**row, "rank": rank})
+    hits.sort(key=lambda r: (r["rank"], r["created_at"], r["id"]), reverse=True)
+    if after_rank is not None:
+        after = (after_rank, after_created_at, after_id)
+        hits = [r for r in hits if (r["rank"], r["created_at"], r["id"]) < after]
+    page = hits[: min(max_results, 101)]
+    for row in page:
+        row["snippet"] = headline(row["content"], clauses)
+    return page
+
+
+def word_trigrams(text: str) -> set[str]:
+    """pg_trgm trigram set: each alphanumeric word padded as "  word "."""
+    grams = set()
+    for word in re.findall(r"[0-9a-z]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query: str, text: str) -> float:
+    grams = word_trigrams(query)
+    return len(grams & word_trigrams(text)) / len(grams) if grams else 0.0
+
+
+@rpc("search_ideas_fuzzy")
+def _search_ideas_fuzzy(
+    db,
+    search_query,
+    filter_category=None,
+    filter_tags=None,
+    include_archived=False,
+    max_results=25,
+    after_rank=None,
+    after_created_at=None,
+    after_id=None,
+):
+    hits = []
+    for row in db.tables["ideas"]:
+        if row["is_archived"] and not include_archived:
+            continue
+        if filter_category and row["category"] != filter_category:
+            continue
+        if filter_tags and not set(row["tags"]) & set(filter_tags):
+            continue
+        rank = round(word_similarity(search_query, row["title"]), 4)
+        if rank > 0.3:
+            hits.append({**row, "rank": rank, "snippet": prefix_snippet(row["content"])})
+    hits.sort(key=lambda r: (r["rank"], r["created_at"], r["id"]), reverse=True)
+    if after_rank is not None:
+        after = (after_rank, after_created_at, after_id)
+        hits = [r for r in hits if (r["rank"], r["created_at"], r["id"]) < after]
+    return hits[: min(max_results, 101)]
+
+
+@rpc("traverse_related")
+def _traverse_related(db, start_id, max_depth=2, relationship_types=None, direction="both", max_nodes=50):
+    links = [
+        r
+        for r in db.tables["idea_relationships"]
+        if not relationship_types or r["relationship_type"] in relationship_types
+    ]
+    cap = min(max_nodes, 200)
+    depth_of, frontier = {start_id: 0}, [start_id]
+    for depth in range(1, min(max_depth, 4) + 1):
+        if not frontier or len(depth_of) > cap:
+            break
+        nxt = []
+        for node in frontier:
+            for r in links:
+                if direction in ("out", "both") and r["source_id"] == node:
+                    nxt.append(r["target_id"])
+                if direction in ("in", "both") and r["target_id"] == node:
+                    nxt.append(r["source_id"])
+        frontier = sorted(n for n in dict.fromkeys(nxt) if n not in depth_of)
+        depth_of.update((n, depth) for n in frontier)
+    kept = sorted(depth_of, key=lambda n: (depth_of[n], n))[:cap]
+    ideas = {i["id"]: i for i in db.tables["ideas"]}
+    keep = set(kept)
+    return {
+        "nodes": [
+            {
+                "id": n,
+                "title": ideas[n]["title"],
+                "category": ideas[n]["category"],
+                "tags": ideas[n]["tags"],
+                "is_archived": ideas[n]["is_archived"],
+                "depth": depth_of[n],
+                "snippet": prefix_snippet(ideas[n]["content"]),
+            }
+            for n in kept
+            if n in ideas
+        ],
+        "edges": [
+            {k: r[k] for k in ("id", "source_id", "target_id", "relationship_type", "note")}
+            for r in links
+            if r["source_id"] in keep and r["target_id"] in keep
+        ],
+        "truncated": len(depth_of) > cap,
+    }
+
+
+@rpc("tag_usage_counts")
+def _tag_usage_counts(db):
+    counts = {}
+    for row in db.tables["ideas"]:
+        if not row["is_archived"]:
+            for tag in row["tags"]:
+                counts[tag] = counts.get(tag, 0) + 1
+    return [{"tag": tag, "uses": n} for tag, n in counts.items()]
+
+
+@rpc("activity_summary")
+def _activity_summary(db, group_by="week", since=None, until=None, filter_category=None):
+    counts = Counter()
+    for row in db.tables["ideas"]:
+        day = datetime.fromisoformat(row["created_at"]).astimezone(timezone.utc).date()
+        if row["is_archived"] or (since and day.isoformat() < since) or (until and day.isoformat() >= until):
+            continue
+        if filter_category and row["category"] != filter_category:
+            continue
+        if group_by == "all":
+            period = None
+        elif group_by == "week":
+            period = (day - timedelta(days=day.weekday())).isoformat()
+        else:
+            period = {"day": day, "month": day.replace(day=1), "year": day.replace(month=1, day=1)}[group_by].isoformat()
+        counts[(period, row["category"])] += 1
+    return [
+        {"period": period, "category": category, "ideas": n}
+        for (period, category), n in sorted(counts.items(), key=lambda kv: (kv[0][0] or "", kv[0][1]))
+    ]
+
+
+@rpc("changes_since")
+def _changes_since(db, after_txid=None, after_seq=0, tables=None, max_rows=100):
+    after = (int(after_txid), after_seq) if after_txid is not None else None
+    out = []
+    for change in db.change_log:
+        if (after and (change["txid"], change["seq"]) <= after) or (tables and change["table_name"] not in tables):
+            continue
+        row = None
+        if change["op"] != "delete":
+            row = next((r for r in db.tables[change["table_name"]] if r["id"] == change["row_id"]), None)
+        out.append({**change, "txid": str(change["txid"]), "row": copy.deepcopy(row)})
+        if len(out) >= max_rows:
+            break
+    return out
+
+
+@rpc("prune_change_log")
+def _prune_change_log(db, keep="30 days"):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=int(keep.split()[0]))
+    before = len(db.change_log)
+    db.change_log[:] = [c for c in db.change_log if datetime.fromisoformat(c["changed_at"]) >= cutoff]
+    return before - len(db.change_log)
+
+
+def prefix_snippet(text: str, width: int = 160) -> str:
+    """Mirror of the snippet(ideas)/snippet(insights) computed columns."""
+    if len(text) <= width:
+        return text
+    return " ".join(text.split())[: width - 3] + "..."
+
+
+def headline(text: str, clauses, words: int = 20) -> str:
+    """Rough ts_headline stand-in: a window around the first hit, hits in **bold**."""
+    terms = {t for clause in clauses for t, neg in clause if not neg}
+    tokens = text.split()
+    first = next((i for i, w in enumerate(tokens) if set(tokenize(w)) & terms), 0)
+    window = tokens[max(0, first - words // 4) : max(0, first - words // 4) + words]
+    return " ".join(f"**{w}**" if set(tokenize(w)) & terms else w for w in window)
+
+
+COMPUTED_COLUMNS = {
+    ("ideas", "snippet"): lambda row: prefix_snippet(row["content"]),
+    ("insights", "snippet"): lambda row: prefix_snippet(row["summary"]),
+}
+
+
+# ---------------------------------------------------------------------------
+# Stand-in
+# ---------------------------------------------------------------------------
+
+
+class FakePostgrest:
+    """Deterministic in-memory PostgREST with injectable latency, errors and call accounting."""
+
+    def __init__(self, latency: float = 0.0, seed: int = 0, error_rate: float = 0.0):
+        self.latency = latency
+        # Share of requests answered with a transient 503 before doing any work.
+        self.error_rate = error_rate
+        self.errors = 0
+        self._error_rng = random.Random(seed + 1)
+        self.rng = random.Random(seed)
+        self.tables: dict[str, list[dict]] = {
+            "ideas": [],
+            "topics": [],
+            "idea_relationships": [],
+            "insights": [],
+        }
+        self.rpc = dict(RPC_FUNCTIONS)
+        # What the change_log triggers would write; each write request is one
+        # transaction. Seeded rows predate the log, as on a migrated database.
+        self.change_log: list[dict] = []
+        self._txid = 0
+        self.computed = dict(COMPUTED_COLUMNS)
+        self.requests = 0
+        self.request_log: list[tuple[str, str]] = []
+        # Seconds spent evaluating requests, excluding injected latency — lets a
+        # benchmark tell the stand-in's own work apart from the server's.
+        self.busy = 0.0
+        self._server = None
+        self._thread = None
+        self.app = Starlette(
+            routes=[
+                Route("/rest/v1/rpc/{fn}", self._timed(self._handle_rpc), methods=["POST", "GET"]),
+                Route("/rest/v1/{table}", self._timed(self._handle_table), methods=["GET", "POST", "PATCH", "DELETE"]),
+            ]
+        )
+
+    # -- dataset -------------------------------------------------------------
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def seed_ideas(self, n: int, links_per_idea: float = 0.5, topics: int = 40, insights: int = 20) -> None:
+        """Populate a deterministic dataset of n ideas plus topics, links and insights."""
+        rng = self.rng
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        ideas = self.tables["ideas"]
+        for i in range(n):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(20, 120))]
+            ts = (base + timedelta(minutes=i)).isoformat()
+            ideas.append(
+                {
+                    "id": self._uuid(),
+                    "title": " ".join(words[:4]).capitalize(),
+                    "content": " ".join(words),
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "tags": sorted({rng.choice(WORDS) for _ in range(rng.randint(1, 4))}),
+                    "metadata": {"seq": i},
+                    "created_at": ts,
+                    "updated_at": ts,
+                    "is_archived": rng.random() < 0.05,
+                }
+            )
+        for i in range(topics):
+            self.tables["topics"].append(
+                {
+                    "id": self._uuid(),
+                    "name": WORDS[i] if i < len(WORDS) else f"{WORDS[i % len(WORDS)]}-{i}",
+                    "description": f"Seeded topic {i}",
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "created_at": (base + timedelta(seconds=i)).isoformat(),
+                    "updated_at": (base + timedelta(seconds=i)).isoformat(),
+                }
+            )
+        seen = set()
+        for _ in range(int(n * links_per_idea)):
+            src, tgt = rng.choice(ideas)["id"], rng.choice(ideas)["id"]
+            if src == tgt or (src, tgt) in seen:
+                continue
+            seen.add((src, tgt))
+            self.tables["idea_relationships"].append(
+                {
+                    "id": self._uuid(),
+                    "source_id": src,
+                    "target_id": tgt,
+                    "relationship_type": rng.choice(["related", "builds_on", "contradicts"]),
+                    "note": None,
+                    "created_at": base.isoformat(),
+                    "updated_at": base.isoformat(),
+                }
+            )
+        for i in range(insights):
+            self.tables["insights"].append(
+                {
+                    "id": self._uuid(),
+                    "title": f"Insight {i}",
+                    "summary": " ".join(rng.choice(WORDS) for _ in range(30)),
+                    "related_idea_ids": [rng.choice(ideas)["id"] for _ in range(3)] if ideas else [],
+                    "tags": [rng.choice(WORDS)],
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "action_item": "Follow up" if i % 2 else None,
+                    "is_actioned": i % 4 == 0,
+                    "created_at": (base + timedelta(hours=i)).isoformat(),
+                    "updated_at": (base + timedelta(hours=i)).isoformat(),
+                }
+            )
+
+    # -- query evaluation ----------------------------------------------------
+
+    def _project(self, table: str, row: dict, select: str) -> dict:
+        out = {}
+        for item in _split_top(select or "*"):
+            item = item.strip()
+            m = re.match(r"^(?:(\w+):)?(\w+)\((.*)\)$", item)
+            if m:
+                alias, fk, inner = m.group(1) or m.group(2), m.group(2), m.group(3)
+                ref_table = FOREIGN_KEYS.get((table, fk), fk)
+                ref = next((r for r in self.tables.get(ref_table, []) if r["id"] == row.get(fk)), None)
+                out[alias] = self._project(ref_table, ref, inner) if ref else None
+            elif item == "*":
+                out.update(row)
+            else:
+                alias, _, col = item.rpartition(":")
+                fn = self.computed.get((table, col))
+                # PostgREST names a JSON path column after its last key.
+                out[alias or re.split(r"->>?", col)[-1]] = fn(row) if fn else _get(row, col)
+        return out
+
+    def select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        args = dict(params)
+        rows = [r for r in self.tables[table] if build_filters(params)(r)]
+        for term in reversed((args.get("order") or "").split(",")):
+            if not term:
+                continue
+            col, *mods = term.split(".")
+            desc = "desc" in mods
+            rows.sort(key=lambda r: (r.get(col) is None, r.get(col) or ""), reverse=desc)
+        offset = int(args.get("offset", 0))
+        if "limit" in args:
+            rows = rows[offset : offset + int(args["limit"])]
+        elif offset:
+            rows = rows[offset:]
+        return [self._project(table, r, args.get("select", "*")) for r in rows]
+
+    def _log(self, table: str, row_id: str, op: str) -> None:
+        self.change_log.append(
+            {
+                "txid": self._txid,
+                "seq": len(self.change_log) + 1,
+                "table_name": table,
+                "row_id": row_id,
+                "op": op,
+                "changed_at": now_iso(),
+            }
+        )
+
+    def insert(self, table: str, payload, upsert_on: str | None, ignore_duplicates: bool) -> list[dict]:
+        self._txid += 1
+        rows = payload if isinstance(payload, list) else [payload]
+        written = []
+        for incoming in rows:
+            row = _defaults(table)
+            row.update(copy.deepcopy(incoming))
+            keys = [tuple(upsert_on.split(","))] if upsert_on else UNIQUE_KEYS.get(table, [])
+            clash = None
+            for key in keys:
+                clash = next(
+                    (r for r in self.tables[table] if all(r.get(k) == row.get(k) for k in key)),
+                    None,
+                )
+                if clash:
+                    break
+            if clash and upsert_on:
+                if not ignore_duplicates:
+                    clash.update(copy.deepcopy(incoming))
+                    written.append(clash)
+                    self._log(table, clash["id"], "update")
+                continue
+            if clash:
+                raise PostgrestError(
+                    409, "23505", f'duplicate key value violates unique constraint "{table}_key"'
+                )
+            self.tables[table].append(row)
+            written.append(row)
+            self._log(table, row["id"], "insert")
+        return copy.deepcopy(written)
+
+    def update(self, table: str, params, patch: dict) -> list[dict]:
+        self._txid += 1
+        pred = build_filters(params)
+        out = []
+        for row in self.tables[table]:
+            if pred(row):
+                archiving = table == "ideas" and patch.get("is_archived") and not row["is_archived"]
+                row.update(copy.deepcopy(patch))
+                if "updated_at" in row:
+                    row["updated_at"] = now_iso()
+                out.append(copy.deepcopy(row))
+                self._log(table, row["id"], "archive" if archiving else "update")
+        return out
+
+    def delete(self, table: str, params) -> list[dict]:
+        self._txid += 1
+        pred = build_filters(params)
+        keep, gone = [], []
+        for row in self.tables[table]:
+            (gone if pred(row) else keep).append(row)
+        self.tables[table] = keep
+        for row in gone:
+            self._log(table, row["id"], "delete")
+        return gone
+
+    # -- HTTP ----------------------------------------------------------------
+
+    async def _delay(self, request: Request) -> None:
+        self.requests += 1
+        self.request_log.append((request.method, request.url.path))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _timed(self, handler):
+        async def run(request: Request) -> Response:
+            if self.error_rate and self._error_rng.random() < self.error_rate:
+                self.errors += 1
+                return PostgrestError(503, "PGRST000", "upstream temporarily unavailable").response()
+            t0 = time.perf_counter()
+            response = await handler(request)
+            self.busy += max(0.0, time.perf_counter() - t0 - self.latency)
+            return response
+
+        return run
+
+    async def _handle_table(self, request: Request) -> Response:
+        await self._delay(request)
+        table = request.path_params["table"]
+        if table not in self.tables:
+            return PostgrestError(404, "42P01", f'relation "{table}" does not exist').response()
+        params = parse_qsl(request.url.query, keep_blank_values=True)
+        prefer = request.headers.get("prefer", "")
+        try:
+            if request.method == "GET":
+                data = self.select(table, params)
+                return JSONResponse(data)
+            if request.method == "POST":
+                body = json.loads(await request.body() or b"null")
+                data = self.insert(
+                    table,
+                    body,
+                    dict(params).get("on_conflict"),
+                    "ignore-duplicates" in prefer,
+                )
+            elif request.method == "PATCH":
+                data = self.update(table, params, json.loads(await request.body() or b"{}"))
+            else:
+                data = self.delete(table, params)
+        except PostgrestError as e:
+            return e.response()
+        if "return=representation" in prefer:
+            return JSONResponse(data, status_code=201 if request.method == "POST" else 200)
+        return Response(status_code=201 if request.method == "POST" else 204)
+
+    async def _handle_rpc(self, request: Request) -> Response:
+        await self._delay(request)
+        fn = self.rpc.get(request.path_params["fn"])
+        if fn is None:
+            return PostgrestError(404, "PGRST202", "function not found").response()
+        if request.method == "GET":
+            args = {k: v for k, v in parse_qsl(request.url.query) if k != "select"}
+        else:
+            args = json.loads(await request.body() or b"{}")
+        select = dict(parse_qsl(request.url.query)).get("select")
+        try:
+            data = fn(self, **args)
+            if select and isinstance(data, list):
+                data = [self._project("rpc", row, select) for row in data]
+            return JSONResponse(data)
+        except PostgrestError as e:
+            return e.response()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a background thread and return the base URL for create_client()."""
+        if not port:
+            with socket.socket() as s:
+                s.bind((host, 0))
+                port = s.getsockname()[1]
+        config = uvicorn.Config(self.app, host=host, port=port, log_level="warning", backlog=2048)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.request_log.clear()
+
+    def reset(self, seed: int = 0) -> None:
+        """Drop every row and counter and restart the deterministic generator."""
+        for rows in self.tables.values():
+            rows.clear()
+        self.change_log.clear()
+        self.rng = random.Random(seed)
+        self.reset_counters()
@@ -0,0 +1,77 @@
+"""Import a Markdown / Obsidian vault into the second brain.
+
+Front-matter becomes category, tags and metadata; [[wiki-links]] become
+relationships. Safe to re-run: unchanged notes are skipped and edited notes
+updated in place (see second_brain_mcp/importer.py).
+
+Usage:
+    python scripts/import_vault.py ~/Obsidian/MyVault --category business_learning
+    python scripts/import_vault.py ~/Obsidian/MyVault --dry-run
+    python scripts/import_vault.py ~/Obsidian/MyVault --skip-duplicates
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+
+from second_brain_mcp.categories import CATEGORIES
+from second_brain_mcp.importer import import_vault
+from second_brain_mcp.storage import create_storage
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+
+def show(progress: dict) -> None:
+    print(
+        f"\r  {progress['done']:,}/{progress['notes']:,} notes  "
+        f"created {progress['created']:,}  updated {progress['updated']:,}  "
+        f"links {progress['links']:,}  {progress['rows_per_sec']:,.0f} rows/s",
+        end="",
+        flush=True,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("vault", help="directory of .md files")
+    parser.add_argument("--category", choices=CATEGORIES, help="for notes with no category in front-matter or folder")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent write requests")
+    parser.add_argument("--dry-run", action="store_true", help="parse and compare, write nothing")
+    parser.add_argument(
+        "--skip-duplicates", action="store_true", help="don't write new notes that near-duplicate an existing idea"
+    )
+    args = parser.parse_args()
+
+    print(f"Importing {args.vault}...")
+    store = create_storage()
+    try:
+        result = await import_vault(
+            store,
+            args.vault,
+            default_category=args.category,
+            workers=args.workers,
+            dry_run=args.dry_run,
+            skip_duplicates=args.skip_duplicates,
+            report=show,
+        )
+    finally:
+        await store.close()
+    show(result)
+    print(
+        f"\n\nDone in {result['seconds']}s{' (dry run)' if args.dry_run else ''}. "
+        f"Created: {result['created']}, Updated: {result['updated']}, Unchanged: {result['unchanged']}, "
+        f"Duplicates: {result['duplicates']}, Failed: {result['failed']}, Links: {result['links']}"
+    )
+    for error in result["errors"][:20]:
+        print(f"  ! {error['path']}: {error['error']}")
+    if len(result["errors"]) > 20:
+        print(f"  ... and {len(result['errors']) - 20} more")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,380 @@
+"""Load test: where the streamable-HTTP endpoint saturates, and whether a change moved it.
+
+Starts the server exactly as the Procfile does (python second_brain_mcp/server.py,
+stateless streamable HTTP on /mcp) against the PostgREST stand-in
+(scripts/fake_postgrest.py, in a child process), then drives it over real HTTP
+with JSON-RPC tools/call requests — the same requests an MCP client sends.
+
+Each stage runs `concurrency` closed-loop workers for --duration seconds; every
+worker sends its next call as soon as the previous one returns, picking the
+tool from a weighted mix (default: mostly reads, one capture in ten):
+
+    search_ideas=4,list_by_category=3,get_related_ideas=2,add_idea=1
+
+Per stage the report has throughput, error rate (by kind: http, rpc, tool,
+timeout, transport), p50/p95/p99/max latency overall and per tool, upstream
+requests per call, and client_cpu — the share of the stage the generator
+itself spent on CPU; near 1.0 it is the bottleneck and the numbers above it
+say nothing about the server. The summary names the peak stage and the
+concurrency past which doubling the workers no longer buys SATURATION_GAIN
+more throughput.
+
+--url points it at a server that is already running (e.g. one backed by a
+local PostgREST or Postgres); ids to read are then discovered through
+list_by_category. add_idea writes real rows tagged "load-test" either way.
+
+Results are written as JSON; --compare diffs two runs stage by stage and exits
+non-zero when throughput drops, p95 grows or the error rate rises.
+
+Usage:
+    python scripts/load_test.py --stages 1,4,16,64 --duration 10 --latency 0.02
+    python scripts/load_test.py --out bench/load-before.json
+    python scripts/load_test.py --url http://127.0.0.1:8000/mcp --stages 8,32
+    python scripts/load_test.py --compare bench/load-before.json bench/load-after.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_tools import StandIn, git_sha
+
+from second_brain_mcp.categories import CATEGORIES
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SERVER = os.path.join(ROOT, "second_brain_mcp", "server.py")
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+DEFAULT_MIX = "search_ideas=4,list_by_category=3,get_related_ideas=2,add_idea=1"
+ERROR_KINDS = ("http", "rpc", "tool", "timeout", "transport")
+SATURATION_GAIN = 1.1  # throughput ratio a doubling of workers must buy
+SLOWER = 1.25  # p95 / throughput ratio flagged by --compare
+MORE_ERRORS = 0.01  # error-rate increase flagged by --compare
+
+
+# ---------------------------------------------------------------------------
+# Server and workload
+# ---------------------------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: dict, timeout: float = 60.0) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, SERVER],
+        cwd=ROOT,
+        env={**env, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                return proc, f"http://127.0.0.1:{port}/mcp"
+        except OSError:
+            time.sleep(0.02)
+    proc.terminate()
+    raise RuntimeError("server did not start listening in time")
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in MAKE_ARGS:
+            raise SystemExit(f"unknown tool in --mix: {name!r} (known: {', '.join(MAKE_ARGS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _capture(sample: dict, rng: random.Random, n: int) -> dict:
+    idea = rng.choice(sample["ideas"])
+    category = rng.choice(CATEGORIES)
+    words = idea["content"].split()
+    return {
+        "title": f"Load test {n}",
+        # Unique per call, so the duplicate check flags nothing.
+        "content": f"{' '.join(rng.sample(words, min(12, len(words))))} lt{n}-{rng.getrandbits(32):08x}",
+        "category": category,
+        "tags": ["load-test"],
+        "metadata": {"type": "treatment"} if category == "cf_care" else {},
+    }
+
+
+# tool -> args(sample, rng, call number)
+MAKE_ARGS = {
+    "search_ideas": lambda s, rng, n: {"query": rng.choice(s["ideas"])["word"]},
+    "list_by_category": lambda s, rng, n: {"category": rng.choice(s["ideas"])["category"]},
+    "get_related_ideas": lambda s, rng, n: {"idea_id": rng.choice(s["linked"] or [i["id"] for i in s["ideas"]])},
+    "get_idea": lambda s, rng, n: {"idea_id": rng.choice(s["ideas"])["id"]},
+    "add_idea": _capture,
+}
+
+
+async def rpc(http: httpx.AsyncClient, url: str, method: str, params: dict, request_id: int = 1) -> dict:
+    """One JSON-RPC request; the reply may come as JSON or as a one-event SSE stream."""
+    r = await http.post(url, json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+    if r.status_code != 200:
+        raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+    if r.headers.get("content-type", "").startswith("text/event-stream"):
+        data = [line[5:].strip() for line in r.text.splitlines() if line.startswith("data:")]
+        return json.loads(data[-1])
+    return r.json()
+
+
+async def discover(http: httpx.AsyncClient, url: str) -> dict:
+    """Ids to read from a server we didn't seed: recent ideas from every category."""
+    ideas = []
+    for category in CATEGORIES:
+        params = {"name": "list_by_category", "arguments": {"category": category, "limit": 50}}
+        content = (await rpc(http, url, "tools/call", params)).get("result", {}).get("content") or []
+        for item in json.loads(content[0]["text"])["items"] if content else []:
+            text = item.get("snippet") or item["title"]
+            ideas.append({**item, "word": text.split()[0], "content": text})
+    if not ideas:
+        raise SystemExit("the server has no ideas to read; seed it or drop --url")
+    return {"ideas": ideas, "linked": []}
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values, in ms."""
+    if not values:
+        return 0.0
+    return round(values[max(0, math.ceil(len(values) * q) - 1)] * 1000, 1)
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": percentile(latencies, 1.0),
+    }
+
+
+async def run_stage(
+    http: httpx.AsyncClient, url: str, sample: dict, mix: dict, concurrency: int, duration: float, seed: int
+) -> dict:
+    names, weights = list(mix), list(mix.values())
+    calls: list[tuple[str, float, str | None]] = []
+    examples: dict[str, str] = {}
+    counter = iter(range(1 << 62))
+
+    async def worker(w: int) -> None:
+        rng = random.Random(seed * 100_003 + w)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            n = next(counter)
+            args = MAKE_ARGS[name](sample, rng, n)
+            t0 = time.perf_counter()
+            error = None
+            try:
+                reply = await rpc(http, url, "tools/call", {"name": name, "arguments": args}, n)
+                if "error" in reply:
+                    error, detail = "rpc", reply["error"].get("message")
+                elif reply["result"].get("isError"):
+                    error, detail = "tool", reply["result"]["content"][0]["text"]
+            except httpx.TimeoutException as e:
+                error, detail = "timeout", repr(e)
+            except httpx.HTTPStatusError as e:
+                error, detail = "http", str(e)
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                error, detail = "transport", repr(e)
+            calls.append((name, time.perf_counter() - t0, error))
+            if error:
+                examples.setdefault(error, f"{name}: {detail}"[:300])
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    errors = {kind: sum(1 for c in calls if c[2] == kind) for kind in ERROR_KINDS}
+    failed = sum(errors.values())
+    tools = {}
+    for name in names:
+        mine = [c for c in calls if c[0] == name]
+        tools[name] = {
+            "calls": len(mine),
+            "errors": sum(1 for c in mine if c[2]),
+            **latency_summary([c[1] for c in mine if not c[2]]),
+        }
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "calls": len(calls),
+        "calls_per_sec": round(len(calls) / elapsed, 1),
+        "errors": errors,
+        "error_rate": round(failed / len(calls), 4) if calls else 0.0,
+        # Latency of the calls that succeeded; errors are often fast.
+        **latency_summary([c[1] for c in calls if not c[2]]),
+        "client_cpu": round((time.process_time() - cpu0) / elapsed, 2),
+        "tools": tools,
+        "error_examples": examples,
+    }
+
+
+def summarize(stages: list[dict]) -> dict:
+    peak = max(stages, key=lambda s: s["calls_per_sec"])
+    saturated_at = None
+    for prev, stage in zip(stages, stages[1:]):
+        # Scale the bar by how many more workers the stage added (1.1x per doubling).
+        bar = SATURATION_GAIN ** max(1.0, math.log2(stage["concurrency"] / prev["concurrency"]))
+        if stage["calls_per_sec"] < prev["calls_per_sec"] * bar:
+            saturated_at = prev["concurrency"]
+            break
+    return {
+        "peak_calls_per_sec": peak["calls_per_sec"],
+        "peak_concurrency": peak["concurrency"],
+        "saturated_at": saturated_at,
+        "max_error_rate": max(s["error_rate"] for s in stages),
+    }
+
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('git_sha')} -> {new['meta'].get('git_sha')}")
+    before = {s["concurrency"]: s for s in old["stages"]}
+    regressions = 0
+    for stage in new["stages"]:
+        prev = before.get(stage["concurrency"])
+        label = f"{stage['concurrency']:>4} workers"
+        if not prev:
+            print(f"  {label}  (new)")
+            continue
+        flags = []
+        if prev["calls_per_sec"] and stage["calls_per_sec"] * SLOWER < prev["calls_per_sec"]:
+            flags.append(f"THROUGHPUT x{stage['calls_per_sec'] / prev['calls_per_sec']:.2f}")
+        if prev["p95_ms"] and stage["p95_ms"] > prev["p95_ms"] * SLOWER:
+            flags.append(f"P95 x{stage['p95_ms'] / prev['p95_ms']:.2f}")
+        if stage["error_rate"] > prev["error_rate"] + MORE_ERRORS:
+            flags.append(f"ERRORS {prev['error_rate']:.2%} -> {stage['error_rate']:.2%}")
+        regressions += bool(flags)
+        print(
+            f"  {label}  {prev['calls_per_sec']:>8.1f} -> {stage['calls_per_sec']:>8.1f} calls/s  "
+            f"p95 {prev['p95_ms']:>8.1f} -> {stage['p95_ms']:>8.1f} ms  {'  '.join(flags)}"
+        )
+    print(f"\n{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", default="1,4,16,64", help="comma-separated concurrency levels, ramped in order")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per stage")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight pairs")
+    parser.add_argument("--latency", type=float, default=0.02, help="injected upstream latency per request (s)")
+    parser.add_argument("--ideas", type=int, default=2000, help="ideas seeded into the stand-in")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-call timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="load an already-running server's /mcp instead of starting one")
+    parser.add_argument("--out", help="JSON output path (default bench/load-<git sha>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare))
+
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.stages.split(",")]
+    stand_in = proc = None
+    if args.url:
+        url, sample = args.url, None
+    else:
+        stand_in = StandIn(args.latency)
+        sample = stand_in.seed(args.ideas)
+        proc, url = start_server(
+            {**os.environ, "STORAGE_BACKEND": "supabase", "SUPABASE_URL": stand_in.url, "SUPABASE_ANON_KEY": "bench-key"}
+        )
+
+    sha = git_sha()
+    report = {
+        "meta": {
+            "git_sha": sha,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "url": args.url,
+            "latency_s": None if args.url else args.latency,
+            "ideas": None if args.url else args.ideas,
+            "duration_s": args.duration,
+            "mix": mix,
+        },
+        "stages": [],
+    }
+
+    async def run_all():
+        nonlocal sample
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(headers=HEADERS, timeout=args.timeout, limits=limits) as http:
+            if sample is None:
+                try:
+                    sample = await discover(http, url)
+                except httpx.HTTPError as e:
+                    raise SystemExit(f"{url} did not answer a tools/call: {e!r}")
+            # Warm up: indexes load and connections open before anything is timed.
+            await run_stage(http, url, sample, mix, min(4, max(levels)), 1.0, args.seed)
+            for i, concurrency in enumerate(levels):
+                before = stand_in.counters()[0] if stand_in else 0
+                stage = await run_stage(http, url, sample, mix, concurrency, args.duration, args.seed + i + 1)
+                if stand_in:
+                    stage["upstream_per_call"] = round((stand_in.counters()[0] - before) / max(1, stage["calls"]), 2)
+                report["stages"].append(stage)
+                print(
+                    f"  {concurrency:>4} workers: {stage['calls_per_sec']:>8.1f} calls/s  "
+                    f"p50 {stage['p50_ms']:>7.1f}  p95 {stage['p95_ms']:>7.1f}  p99 {stage['p99_ms']:>7.1f} ms  "
+                    f"errors {stage['error_rate']:.2%}  client cpu {stage['client_cpu']:.0%}"
+                )
+                for kind, example in stage["error_examples"].items():
+                    print(f"        {kind}: {example}")
+
+    print(f"=== {args.stages} workers x {args.duration:.0f} s, mix {args.mix} ===\n")
+    try:
+        asyncio.run(run_all())
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        if stand_in:
+            stand_in.stop()
+
+    report["summary"] = summarize(report["stages"])
+    print(f"\n  {report['summary']}")
+    out = args.out or os.path.join(ROOT, "bench", f"load-{sha or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
 """Seed the topics table with initial tags for each category."""
 
+import asyncio
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from supabase import create_client
 from dotenv import load_dotenv
 
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+from second_brain_mcp.storage import create_storage
+from second_brain_mcp.tools.topics import add_topics_bulk
 
-sb = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 SEED_TOPICS = [
     # Groceries
@@ -64,25 +65,25 @@ SEED_TOPICS = [
 ]
 
 
-def main():
+async def main():
     print(f"Seeding {len(SEED_TOPICS)} topics...\n")
 
-    created = 0
-    skipped = 0
-    for topic in SEED_TOPICS:
-        try:
-            sb.table("topics").insert(topic).execute()
+    # One upsert request; names that already exist come back as "exists".
+    store = create_storage()
+    try:
+        report = await add_topics_bulk(store, SEED_TOPICS)
+    finally:
+        await store.close()
+    for topic, row in zip(SEED_TOPICS, report["results"]):
+        if row["status"] == "created":
             print(f"  + {topic['name']} ({topic['category']})")
-            created += 1
-        except Exception as e:
-            if "duplicate" in str(e).lower() or "unique" in str(e).lower() or "23505" in str(e):
-                print(f"  ~ {topic['name']} (already exists, skipped)")
-                skipped += 1
-            else:
-                print(f"  ! {topic['name']} ERROR: {e}")
+        elif row["status"] == "exists":
+            print(f"  ~ {topic['name']} (already exists, skipped)")
+        else:
+            print(f"  ! {topic['name']} ERROR: {row['error']}")
 
-    print(f"\nDone. Created: {created}, Skipped: {skipped}")
+    print(f"\nDone. Created: {report['created']}, Skipped: {report['existing']}, Failed: {report['failed']}")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
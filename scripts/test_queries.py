@@ -47,8 +47,8 @@ def main():
     print(f"   Updated title: '{updated['title']}'\n")
 
     # 5. Search (full-text)
-    print("5. Full-text search for 'verify'...")
-    results = sb.table("ideas").select("*").text_search("content", "verify").execute().data
+    print("5. Ranked full-text search for 'verify'...")
+    results = sb.rpc("search_ideas_ranked", {"search_query": "verify", "max_results": 25}).execute().data
     found = any(r["id"] == idea_id for r in results)
     print(f"   Found test idea in search results: {found}\n")
 
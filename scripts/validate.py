@@ -1,15 +1,17 @@
 """Validation script: insert one test idea per category, test retrieval and linking."""
 
+import asyncio
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from supabase import create_client
 from dotenv import load_dotenv
 
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+from second_brain_mcp.storage import Storage, create_storage
+from second_brain_mcp.tools.ideas import add_ideas_bulk, list_by_category, search_ideas
+from second_brain_mcp.tools.relationships import get_related_ideas, link_ideas_bulk
 
-sb = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 TEST_IDEAS = [
     {
@@ -71,15 +73,23 @@ TEST_IDEAS = [
 ]
 
 
-def main():
+async def main():
+    store = create_storage()
+    try:
+        await validate(store)
+    finally:
+        await store.close()
+
+
+async def validate(store: Storage):
     print("=== Step 8: Validation ===\n")
 
     # 1. Insert one idea per category
-    print("1. Inserting one test idea per category...\n")
+    print("1. Inserting one test idea per category (single bulk request)...\n")
     idea_ids = {}
-    for idea in TEST_IDEAS:
-        result = sb.table("ideas").insert(idea).execute()
-        row = result.data[0]
+    report = await add_ideas_bulk(store, TEST_IDEAS)
+    for idea, row in zip(TEST_IDEAS, report["results"]):
+        assert row["status"] == "created", f"Insert failed: {row}"
         idea_ids[idea["category"]] = row["id"]
         print(f"   [{idea['category']}] {row['id']} — {idea['title']}")
 
@@ -88,7 +98,7 @@ def main():
     # 2. Retrieve by category
     print("2. Retrieving ideas by category...\n")
     for cat, iid in idea_ids.items():
-        rows = sb.table("ideas").select("id, title").eq("category", cat).execute().data
+        rows = await list_by_category(store, cat)
         titles = [r["title"] for r in rows]
         print(f"   [{cat}] {len(rows)} idea(s): {titles}")
 
@@ -96,29 +106,29 @@ def main():
     print("\n3. Testing idea linking...\n")
     src = idea_ids["finance_journal"]
     tgt = idea_ids["business_learning"]
-    link = sb.table("idea_relationships").insert({
+    link = (await link_ideas_bulk(store, [{
         "source_id": src,
         "target_id": tgt,
         "relationship_type": "informs",
         "note": "Investment thesis informed by blue ocean strategy thinking"
-    }).execute().data[0]
-    print(f"   Linked finance_journal -> business_learning (id: {link['id']})")
+    }]))["results"][0]
+    print(f"   Linked finance_journal -> business_learning ({link['status']}, id: {link.get('id')})")
 
     # Verify forward lookup
-    fwd = sb.table("idea_relationships").select("*, target:target_id(title)").eq("source_id", src).execute().data
+    fwd = [r for r in await get_related_ideas(store, src) if "target" in r]
     print(f"   Forward lookup from finance_journal: {len(fwd)} relationship(s)")
     for r in fwd:
         print(f"     -> {r['target']['title']} ({r['relationship_type']})")
 
     # Verify reverse lookup
-    rev = sb.table("idea_relationships").select("*, source:source_id(title)").eq("target_id", tgt).execute().data
+    rev = [r for r in await get_related_ideas(store, tgt) if "source" in r]
     print(f"   Reverse lookup from business_learning: {len(rev)} relationship(s)")
     for r in rev:
         print(f"     <- {r['source']['title']} ({r['relationship_type']})")
 
     # 4. Tag search across categories
     print("\n4. Cross-category tag search for 'strategy'...\n")
-    results = sb.table("ideas").select("id, title, category, tags").overlaps("tags", ["strategy"]).execute().data
+    results = await search_ideas(store, "", tags=["strategy"])
     for r in results:
         print(f"   [{r['category']}] {r['title']} — tags: {r['tags']}")
 
@@ -130,4 +140,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""Batch preparation and per-row status reporting for the *_bulk tools.
+
+Rows are validated client-side first so that one bad row doesn't fail the
+whole PostgREST request. Valid rows are written in a single request; rows
+that hit a unique key are reported as "exists" rather than raising, which is
+what the seeding scripts used to do by string-matching 23505 errors.
+"""
+
+from second_brain_mcp.categories import CATEGORIES
+
+MAX_BATCH_SIZE = 500
+
+
+def _check_size(rows: list) -> None:
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large: {len(rows)} rows (max {MAX_BATCH_SIZE}) — split it up")
+
+
+def _error(index: int, message: str) -> dict:
+    return {"index": index, "status": "error", "error": message}
+
+
+def prepare_ideas(ideas: list[dict]) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """Normalize idea rows for a bulk insert.
+
+    Returns (pending, results): pending is [(input index, row)] for valid rows,
+    results has one slot per input row, pre-filled for rows that failed validation.
+    """
+    _check_size(ideas)
+    pending, results = [], []
+    for i, idea in enumerate(ideas):
+        missing = [f for f in ("title", "content", "category") if not idea.get(f)]
+        if missing:
+            results.append(_error(i, f"missing {', '.join(missing)}"))
+            continue
+        if idea["category"] not in CATEGORIES:
+            results.append(_error(i, f"unknown category {idea['category']!r}"))
+            continue
+        results.append(None)
+        pending.append(
+            (
+                i,
+                {
+                    "title": idea["title"],
+                    "content": idea["content"],
+                    "category": idea["category"],
+                    "tags": idea.get("tags") or [],
+                    "metadata": idea.get("metadata") or {},
+                },
+            )
+        )
+    return pending, results
+
+
+def prepare_topics(topics: list[dict]) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """Normalize topic rows for an upsert on the unique name."""
+    _check_size(topics)
+    pending, results, seen = [], [], set()
+    for i, topic in enumerate(topics):
+        name = (topic.get("name") or "").strip()
+        if not name:
+            results.append(_error(i, "missing name"))
+            continue
+        if topic.get("category") and topic["category"] not in CATEGORIES:
+            results.append(_error(i, f"unknown category {topic['category']!r}"))
+            continue
+        if name in seen:
+            results.append({"index": i, "status": "exists"})
+            continue
+        seen.add(name)
+        results.append(None)
+        pending.append(
+            (
+                i,
+                {
+                    "name": name,
+                    "description": topic.get("description") or None,
+                    "category": topic.get("category") or None,
+                },
+            )
+        )
+    return pending, results
+
+
+def prepare_links(links: list[dict]) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """Normalize relationship rows for an upsert on (source_id, target_id)."""
+    _check_size(links)
+    pending, results, seen = [], [], set()
+    for i, link in enumerate(links):
+        source, target = link.get("source_id"), link.get("target_id")
+        if not source or not target:
+            results.append(_error(i, "missing source_id or target_id"))
+            continue
+        if source == target:
+            results.append(_error(i, "cannot link an idea to itself"))
+            continue
+        if (source, target) in seen:
+            results.append({"index": i, "status": "exists"})
+            continue
+        seen.add((source, target))
+        results.append(None)
+        pending.append(
+            (
+                i,
+                {
+                    "source_id": source,
+                    "target_id": target,
+                    "relationship_type": link.get("relationship_type") or "related",
+                    "note": link.get("note") or "",
+                },
+            )
+        )
+    return pending, results
+
+
+def record_inserted(results: list, pending: list, written: list[dict]) -> None:
+    """Fill results for a plain insert — PostgREST returns rows in input order."""
+    for (i, _), row in zip(pending, written):
+        results[i] = {"index": i, "status": "created", "id": row["id"]}
+
+
+def record_upserted(results: list, pending: list, written: list[dict], key) -> None:
+    """Fill results for an ignore-duplicates upsert, which only returns new rows."""
+    created = {key(row): row for row in written}
+    for i, row in pending:
+        hit = created.get(key(row))
+        if hit:
+            results[i] = {"index": i, "status": "created", "id": hit["id"]}
+        else:
+            results[i] = {"index": i, "status": "exists"}
+
+
+def summarize(results: list[dict]) -> dict:
+    """Counts plus per-row statuses, in input order."""
+    counts = {"created": 0, "exists": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    return {
+        "created": counts["created"],
+        "existing": counts["exists"],
+        "failed": counts["error"],
+        "results": results,
+    }
@@ -0,0 +1,150 @@
+"""In-process read-through cache for hot read tools.
+
+Entries live in a size-bounded LRU with a TTL per table. Each entry is also
+tagged with what it depends on ("idea:<id>", "category:<name>", ...) so a
+write can invalidate exactly the entries it affects instead of flushing the
+whole cache — e.g. archiving an idea drops its get_idea entry and every cached
+list page that contained it, and nothing else.
+
+Loads are single-flight: while one caller is loading a key, identical callers
+(a burst of phones, or a retried request) await the same load instead of each
+going upstream. Any invalidation starts a new generation: loads already in
+flight still answer the callers waiting on them but are not cached, and later
+callers start a fresh load, so a read issued after a write never gets a
+result fetched before it.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+# Seconds an entry stays fresh, per table. Topics change rarely; ideas are
+# the most write-heavy. Writes through this process invalidate precisely, so
+# TTLs only bound staleness from writes made elsewhere (scripts, dashboard).
+DEFAULT_TTLS = {
+    "ideas": 30.0,
+    "idea_relationships": 60.0,
+    "insights": 60.0,
+    "topics": 300.0,
+}
+
+
+class ReadCache:
+    def __init__(self, max_entries: int = 1024, ttls: dict[str, float] | None = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, object, frozenset]] = OrderedDict()
+        self._tagged: dict[str, set[tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._generation = 0
+
+    def _drop(self, key: tuple) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get(self, key: tuple):
+        """Return (hit, value); expired entries count as misses and are dropped."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self._drop(key)
+        self.misses += 1
+        return False, None
+
+    def set(self, key: tuple, value, tags=()) -> None:
+        """Store value under key; key[0] must be the table it was read from."""
+        if key in self._entries:
+            self._drop(key)
+        tags = frozenset(tags)
+        self._entries[key] = (self.clock() + self.ttls[key[0]], value, tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def coalesce(self, key: tuple, load):
+        """Single-flight without caching: concurrent calls with the same key share one load().
+
+        The load runs as its own task, so a caller that goes away (the phone
+        dropped the request) doesn't cancel it for the others waiting on it.
+        """
+        flight = (self._generation, key)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[flight] = task
+            task.add_done_callback(lambda t: self._landed(flight, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _landed(self, flight: tuple, task: asyncio.Future) -> None:
+        if self._inflight.get(flight) is task:
+            del self._inflight[flight]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller has gone
+
+    async def get_or_load(self, key: tuple, load, tags=()):
+        """Read-through: return the cached value or await load() and cache it.
+
+        tags may be a callable taking the loaded value, for tags that depend on
+        the result (e.g. the ids on a list page).
+        """
+        hit, value = self.get(key)
+        if hit:
+            return value
+        generation = self._generation
+
+        async def load_and_store():
+            value = await load()
+            if self._generation == generation:
+                self.set(key, value, tags(value) if callable(tags) else tags)
+            return value
+
+        return await self.coalesce(key, load_and_store)
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying any of the given tags. Returns entries dropped."""
+        self._generation += 1
+        dropped = 0
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._drop(key)
+                dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._tagged.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "ttls": self.ttls,
+        }
@@ -0,0 +1,12 @@
+"""Idea categories — mirrors the category_type enum in schema/schema.sql."""
+
+CATEGORIES = [
+    "groceries",
+    "religious_study",
+    "finance_journal",
+    "product_ideas",
+    "health_wellness",
+    "cf_care",
+    "cooking_recipes",
+    "business_learning",
+]
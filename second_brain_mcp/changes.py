@@ -0,0 +1,59 @@
+"""Delta sync: what changed since a cursor, for caches and client-side replicas.
+
+Triggers record every insert, update, archive and delete on the four tables
+in change_log, in the same transaction as the change (see schema.sql). A
+reader passes back the cursor from its previous response and gets the
+entries after it in commit order, each with its row as it is now:
+
+    {"changes": [{"table", "id", "op", "changed_at", "row"}, ...],
+     "next_cursor": "...", "has_more": false}
+
+- op "delete" is a tombstone (row is None); hard deletes such as
+  remove_relationship, and relationships removed with their idea, show up this way.
+- An idea archived by archive_idea comes through as op "archive", with the
+  archived row.
+- Several entries for one row within a page are collapsed to the last one:
+  the row attached is the current version anyway.
+
+Applying a page is idempotent (upsert rows by id, drop tombstoned ids), so a
+client that crashes before saving next_cursor can safely replay it. With no
+cursor the feed starts at the beginning of the log. Entries are kept for
+CHANGE_LOG_DAYS (30) days; a client that has been away longer starts again
+from an /export, like a new replica.
+"""
+
+from second_brain_mcp.pagination import CHANGE_KEY, decode_cursor, encode_cursor
+from second_brain_mcp.storage import Storage
+from second_brain_mcp.storage.base import EXPORT_TABLES, check_export_table
+
+MAX_LIMIT = 1000
+
+
+async def read_changes(
+    store: Storage, *, cursor: str | None = None, tables: list[str] | None = None, limit: int = 100
+) -> dict:
+    """One page of the change feed after cursor (see the module docstring)."""
+    tables = tuple(dict.fromkeys(tables)) if tables else EXPORT_TABLES
+    for table in tables:
+        check_export_table(table)
+    limit = max(1, min(limit, MAX_LIMIT))
+    after = tuple(decode_cursor(cursor, CHANGE_KEY)) if cursor else None
+    entries = await store.changes_since(after=after, tables=tables, limit=limit + 1)
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    latest = {}
+    for entry in entries:
+        key = (entry["table_name"], entry["row_id"])
+        latest.pop(key, None)  # re-insert so the row sits at its last change
+        latest[key] = {
+            "table": entry["table_name"],
+            "id": entry["row_id"],
+            "op": entry["op"],
+            "changed_at": entry["changed_at"],
+            "row": entry["row"],
+        }
+    return {
+        "changes": list(latest.values()),
+        "next_cursor": encode_cursor(entries[-1]["txid"], entries[-1]["seq"]) if entries else cursor,
+        "has_more": has_more,
+    }
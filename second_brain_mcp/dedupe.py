@@ -0,0 +1,258 @@
+"""In-process near-duplicate index behind add_idea's duplicate check.
+
+Each live idea is reduced to a MinHash signature over its word shingles
+(single words plus adjacent pairs from title and content), and the
+signature is split into BANDS bands of ROWS values. Two ideas that agree on
+a whole band land in the same bucket, which happens with probability
+1 - (1 - J**ROWS)**BANDS for Jaccard similarity J: about 0.99 at J = 0.8 and
+under 0.05 at J = 0.3. So:
+
+- a lookup hashes BANDS band keys, reads those buckets, and scores only the
+  few ideas found there by signature agreement (an estimate of J) — no scan;
+- find_clusters walks the buckets once and joins matching pairs with
+  union-find, near-linear in the number of ideas instead of all-pairs.
+
+Only ideas in the same category are compared: the same shopping list saved
+under groceries twice is a duplicate, a recipe that mentions it is not. A
+note with no words left after stopwords has no signature and is never
+reported as (or matched against) a duplicate: every such note would
+otherwise look identical to every other.
+
+Like the similarity index, it loads on first use, refreshes in the
+background after refresh_interval, and is patched by the write tools in
+between (see resident.py). numpy is imported on first use.
+"""
+
+import re
+import time
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from second_brain_mcp.resident import STOPWORDS, ResidentIndex
+
+if TYPE_CHECKING:
+    import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.7
+# Buckets this big are boilerplate (templates, empty notes); score them
+# against their first member only so one can't turn a scan quadratic.
+MAX_BUCKET_PAIRS = 64
+# What add_idea / add_ideas_bulk do with a capture that has a likely duplicate.
+ON_DUPLICATE = ("add", "skip", "merge")
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def words(idea: dict) -> list[str]:
+    """Words of title + content, lowercased, stopwords dropped."""
+    text = f"{idea.get('title') or ''} {idea.get('content') or ''}".lower()
+    return [w for w in _WORD.findall(text) if w not in STOPWORDS]
+
+
+# crc32 rather than hash(): Python's str hash is salted per process.
+_word_hash = lru_cache(maxsize=1 << 16)(lambda word: zlib.crc32(word.encode()))
+
+
+_params = None
+
+
+def _permutations():
+    global _params
+    if _params is None:
+        import numpy as np
+
+        rng = np.random.default_rng(0x5EED)
+        _params = (
+            rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1),
+            rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)[:, None],
+        )
+    return _params
+
+
+def signature(idea: dict) -> "np.ndarray | None":
+    """NUM_PERM-value MinHash of the idea's words and adjacent word pairs
+    (None for a note with no words)."""
+    import numpy as np
+
+    a, b = _permutations()
+    tokens = words(idea)
+    unigrams = np.fromiter(map(_word_hash, tokens), dtype=np.uint64, count=len(tokens))
+    # Word pairs are hashed from their words' hashes instead of as strings. A
+    # shingle repeated in the note hashes the same, so min() needs no dedupe.
+    bigrams = (unigrams[:-1] * np.uint64(0x9E3779B1) + unigrams[1:]) & np.uint64(0xFFFFFFFF)
+    hashes = np.concatenate([unigrams, bigrams])
+    if not len(hashes):
+        return None
+    # Multiply-shift hashing: (a*x + b) mod 2**64, top 32 bits. Wraps instead
+    # of taking a modulus, which is most of the cost in numpy.
+    return ((a * hashes + b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+def check_on_duplicate(value: str) -> None:
+    if value not in ON_DUPLICATE:
+        raise ValueError(f"on_duplicate must be one of: {', '.join(ON_DUPLICATE)}")
+
+
+def _bands(sig: "np.ndarray") -> list[bytes]:
+    return [sig[i * ROWS : (i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+
+class DuplicateIndex(ResidentIndex):
+    label = "Duplicate index"
+
+    def __init__(self, load, refresh_interval: float = 600.0, clock=time.monotonic):
+        """load: async () -> list of non-archived idea rows (id, title, content, category, tags)."""
+        super().__init__(load, refresh_interval, clock)
+        self._build([])
+
+    # -- building ------------------------------------------------------------
+
+    def _build(self, ideas: list[dict]) -> None:
+        self.signatures: dict[str, "np.ndarray"] = {}
+        self.meta: dict[str, dict] = {}
+        # One table per band: (category, band key) -> ids.
+        self.buckets: list[dict[tuple, set[str]]] = [{} for _ in range(BANDS)]
+        for idea in ideas:
+            self._put(idea)
+
+    def _put(self, idea: dict, sig=None) -> None:
+        self._drop(idea["id"])
+        sig = signature(idea) if sig is None else sig
+        if sig is None:
+            return  # nothing to compare; see the module docstring
+        self.signatures[idea["id"]] = sig
+        self.meta[idea["id"]] = {k: idea.get(k) for k in ("id", "title", "category")}
+        for table, key in zip(self.buckets, _bands(sig)):
+            table.setdefault((idea.get("category"), key), set()).add(idea["id"])
+
+    def _drop(self, idea_id: str) -> None:
+        sig = self.signatures.pop(idea_id, None)
+        if sig is None:
+            return
+        category = self.meta.pop(idea_id)["category"]
+        for table, key in zip(self.buckets, _bands(sig)):
+            bucket = table.get((category, key))
+            if bucket is not None:
+                bucket.discard(idea_id)
+                if not bucket:
+                    del table[(category, key)]
+
+    def _describe(self) -> str:
+        return f"{len(self.signatures)} ideas"
+
+    # -- querying ------------------------------------------------------------
+
+    def _similarity(self, a: "np.ndarray", b: "np.ndarray") -> float:
+        return float((a == b).mean())
+
+    def lookup(self, idea: dict, threshold: float = THRESHOLD, limit: int = 5, exclude=()) -> list[dict]:
+        """Existing ideas in idea's category whose estimated Jaccard similarity
+        to it is at least threshold, most similar first."""
+        return self._lookup(signature(idea), idea.get("category"), threshold, limit, exclude)
+
+    def _lookup(self, sig, category, threshold: float, limit: int, exclude=()) -> list[dict]:
+        if sig is None:
+            return []
+        candidates = set()
+        for table, key in zip(self.buckets, _bands(sig)):
+            candidates |= table.get((category, key), set())
+        candidates.difference_update(exclude)
+        if not candidates:
+            return []
+        import numpy as np
+
+        ids = list(candidates)
+        # One comparison for all candidates; a popular bucket can hold hundreds.
+        similarity = (np.stack([self.signatures[c] for c in ids]) == sig).mean(axis=1)
+        scored = sorted(
+            ((float(sim), c) for sim, c in zip(similarity, ids) if sim >= threshold), key=lambda s: (-s[0], s[1])
+        )[:limit]
+        return [{**self.meta[c], "similarity": round(sim, 3)} for sim, c in scored]
+
+    def find_clusters(self, category: str | None = None, threshold: float = THRESHOLD) -> list[list[tuple]]:
+        """Groups of mutually near-duplicate ideas, as [(id, similarity to the
+        group's first member)] lists, largest groups first."""
+        parent: dict[str, str] = {}
+
+        def root(x: str) -> str:
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        checked = set()
+        for table in self.buckets:
+            for (cat, _), ids in table.items():
+                if len(ids) < 2 or (category and cat != category):
+                    continue
+                ids = sorted(ids)
+                pairs = (
+                    ((a, b) for i, a in enumerate(ids) for b in ids[i + 1 :])
+                    if len(ids) * (len(ids) - 1) // 2 <= MAX_BUCKET_PAIRS
+                    else ((ids[0], b) for b in ids[1:])
+                )
+                for a, b in pairs:
+                    if (a, b) in checked or root(a) == root(b):
+                        continue
+                    checked.add((a, b))
+                    if self._similarity(self.signatures[a], self.signatures[b]) >= threshold:
+                        parent.setdefault(a, a)
+                        parent[root(b)] = root(a)
+        groups: dict[str, list[str]] = {}
+        for idea_id in parent:
+            groups.setdefault(root(idea_id), []).append(idea_id)
+        clusters = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            members.sort()
+            first = self.signatures[members[0]]
+            clusters.append([(m, self._similarity(first, self.signatures[m])) for m in members])
+        clusters.sort(key=lambda c: (-len(c), c[0][0]))
+        return clusters
+
+    def check_batch(self, ideas: list[dict], threshold: float = THRESHOLD) -> list[dict | None]:
+        """The likeliest duplicate of each idea in a batch about to be written:
+        a live idea ({id, title, category, similarity}), an earlier row of the
+        same batch ({index, similarity}), or None for a new idea."""
+        batch = DuplicateIndex(None)
+        hits = []
+        for i, idea in enumerate(ideas):
+            sig, category = signature(idea), idea.get("category")
+            found = self._lookup(sig, category, threshold, 1)
+            if not found:
+                found = [
+                    {"index": hit["id"], "similarity": hit["similarity"]}
+                    for hit in batch._lookup(sig, category, threshold, 1)
+                ]
+            hits.append(found[0] if found else None)
+            if not found and sig is not None:
+                batch._put({"id": i, "category": category}, sig)
+        return hits
+
+    def stats(self) -> dict:
+        return {
+            "ideas": len(self.signatures),
+            "buckets": sum(len(t) for t in self.buckets),
+            "age_seconds": self.age(),
+        }
+
+
+def merge_fields(existing: dict, new: dict) -> dict:
+    """update_idea fields that fold a near-duplicate capture into an existing idea.
+
+    The two differ by a few words at most, so the longer content is kept as
+    the more complete copy rather than concatenating both; tags are unioned
+    and the new metadata keys win.
+    """
+    fields = {
+        "tags": list(dict.fromkeys([*(existing.get("tags") or []), *(new.get("tags") or [])])),
+        "metadata": {**(existing.get("metadata") or {}), **(new.get("metadata") or {})},
+    }
+    if len(new.get("content") or "") > len(existing.get("content") or ""):
+        fields["content"] = new["content"]
+    return fields
@@ -0,0 +1,161 @@
+"""Streaming NDJSON export of the whole brain, full or incremental.
+
+An export is a sequence of JSON lines:
+
+    {"export": "second-brain", "version": 1, "since": null, "tables": [...]}
+    {"table": "ideas", "row": {...}}
+    ...
+    {"watermark": "2025-06-01T21:14:03.118204+00:00", "rows": {"ideas": 1200, ...}}
+
+Every table is read page by page on its (updated_at, id) index, and each page
+is written out before the next is fetched, so memory stays at one page
+however big the brain grows.
+
+Incremental exports pass the previous export's watermark as `since` and get
+only rows inserted or updated since then. The watermark is the newest
+updated_at the export saw (the database's clock, not ours); the next export
+starts OVERLAP earlier, so a row whose transaction began before the
+watermark but committed after it is not missed. Rows can therefore appear in
+two consecutive exports; restoring by id makes that harmless. Deleted rows
+are not in any export; the change feed (changes.py) carries them as tombstones.
+
+backup() is what both the export_backup tool and scripts/export.py run: a
+gzipped file per export in a directory, with the last watermark kept in
+export-state.json next to them. The file I/O runs on a worker thread, page by
+page, so a backup doesn't block other requests. The directory is local disk:
+on the Heroku dyno it is wiped on every restart, so a hosted deployment backs
+up by pulling GET /export (export_bytes) from somewhere durable instead.
+"""
+
+import asyncio
+import json
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from second_brain_mcp.storage import Storage
+from second_brain_mcp.storage.base import EXPORT_TABLES, check_export_table
+
+PAGE = 1000
+OVERLAP = timedelta(minutes=5)
+STATE_FILE = "export-state.json"
+
+
+def _iso(value: str) -> datetime:
+    stamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _utc(stamp: datetime) -> str:
+    # Same fixed-width form the SQLite backend stores, so text comparison works there too.
+    return stamp.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+async def export_records(store: Storage, *, since: str | None = None, tables=EXPORT_TABLES):
+    """Yield the export's records (header, one per row, trailer) as dicts."""
+    for table in tables:
+        check_export_table(table)
+    start = _utc(_iso(since) - OVERLAP) if since else None
+    yield {"export": "second-brain", "version": 1, "since": since, "tables": list(tables)}
+    counts, watermark = {}, since
+    for table in tables:
+        counts[table], after = 0, None
+        while True:
+            rows = await store.export_rows(table, since=start, after=after, limit=PAGE)
+            for row in rows:
+                yield {"table": table, "row": row}
+            counts[table] += len(rows)
+            if rows:
+                newest = rows[-1]["updated_at"]
+                if watermark is None or _iso(newest) > _iso(watermark):
+                    watermark = newest
+            if len(rows) < PAGE:
+                break
+            after = (rows[-1]["updated_at"], rows[-1]["id"])
+    yield {"watermark": watermark, "rows": counts}
+
+
+def encode(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode()
+
+
+async def export_bytes(store: Storage, *, since: str | None = None, tables=EXPORT_TABLES, compress: bool = False):
+    """The export as NDJSON (or gzip) chunks, one chunk per page-sized batch, for streaming."""
+    async for chunk in _chunks(export_records(store, since=since, tables=tables), compress):
+        yield chunk
+
+
+async def _chunks(records, compress: bool):
+    gz = zlib.compressobj(wbits=31) if compress else None
+    batch = []
+    async for record in records:
+        batch.append(encode(record))
+        if len(batch) >= PAGE:
+            chunk = b"".join(batch)
+            batch = []
+            chunk = gz.compress(chunk) if gz else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(batch)
+    if gz:
+        chunk = gz.compress(chunk) + gz.flush()
+    if chunk:
+        yield chunk
+
+
+def read_state(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+async def backup(store: Storage, directory: str, *, incremental: bool = True, compress: bool = True) -> dict:
+    """Write one export file into directory and advance its watermark.
+
+    incremental: export only rows changed since the last backup in this
+    directory (a full export when there is none yet).
+    """
+    os.makedirs(directory, exist_ok=True)
+    since = read_state(directory).get("watermark") if incremental else None
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    kind = "incremental" if since else "full"
+    suffix = ".ndjson.gz" if compress else ".ndjson"
+    name, n = f"second-brain-{stamp}-{kind}{suffix}", 1
+    while os.path.exists(os.path.join(directory, name)):
+        n += 1  # two backups in the same second
+        name = f"second-brain-{stamp}-{kind}-{n}{suffix}"
+    path = os.path.join(directory, name)
+    partial = path + ".partial"
+    trailer = None
+
+    async def records():
+        nonlocal trailer
+        async for record in export_records(store, since=since):
+            trailer = record
+            yield record
+
+    f = await asyncio.to_thread(open, partial, "wb")
+    try:
+        async for chunk in _chunks(records(), compress):
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    # Only a finished export becomes visible or moves the watermark.
+    state = {"watermark": trailer["watermark"], "last_export": name}
+    size = await asyncio.to_thread(_publish, partial, path, os.path.join(directory, STATE_FILE), state)
+    return {
+        "path": path,
+        "since": since,
+        "watermark": trailer["watermark"],
+        "rows": trailer["rows"],
+        "bytes": size,
+    }
+
+
+def _publish(partial: str, path: str, state_path: str, state: dict) -> int:
+    os.replace(partial, path)
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+    return os.path.getsize(path)
@@ -0,0 +1,312 @@
+"""Bulk import of a Markdown / Obsidian vault.
+
+Walks a directory of .md files and writes them as ideas without going
+through the LLM one note at a time:
+
+- YAML front-matter supplies title, category, tags and aliases; every other
+  key lands in metadata. Inline #tags are added to tags. category falls back
+  to the note's top-level folder when that is a category name, then to the
+  caller's default.
+- [[wiki-links]] (by note name, path or alias) become idea_relationships
+  rows of type "links_to".
+- New notes are inserted in chunks of bulk.MAX_BATCH_SIZE and changed notes
+  updated one by one, all on a pool of `workers` concurrent requests.
+  A storage error fails only the chunk or note it hit: those notes are
+  listed in errors and the rest of the import carries on.
+- Every imported idea carries metadata.source = {"path", "hash"} (path
+  relative to the vault, sha256 of the file). A re-run skips notes whose hash
+  is unchanged and updates the ones that changed instead of duplicating them;
+  links are upserted, so they never duplicate either.
+- With skip_duplicates, a new note that is a near-duplicate of a live idea
+  (or of another new note) is not written; links to it resolve to the idea
+  it duplicates. See dedupe.py.
+
+The front-matter reader covers what Obsidian writes (scalars, inline
+[a, b] lists and "- item" block lists), not all of YAML.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from datetime import date
+
+from second_brain_mcp import bulk
+from second_brain_mcp.categories import CATEGORIES
+from second_brain_mcp.dedupe import DuplicateIndex
+from second_brain_mcp.storage import Storage
+
+LINK_TYPE = "links_to"
+SKIP_DIRS = frozenset({".obsidian", ".trash", ".git", "node_modules"})
+
+_FRONT_MATTER = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.S)
+_KEY = re.compile(r"^([A-Za-z_][\w -]*?)\s*:\s*(.*)$")
+_WIKI_LINK = re.compile(r"!?\[\[([^\]|#^]+)(?:[#^][^\]|]*)?(?:\|[^\]]*)?\]\]")
+_INLINE_TAG = re.compile(r"(?<![\w/&#])#([A-Za-z][\w/-]*)")
+_CODE = re.compile(r"```.*?```|`[^`\n]*`", re.S)
+
+
+# -- parsing -------------------------------------------------------------------
+
+
+def _scalar(raw: str):
+    raw = raw.strip()
+    if len(raw) > 1 and raw[0] == raw[-1] and raw[0] in "'\"":
+        return raw[1:-1]
+    if raw in ("true", "false"):
+        return raw == "true"
+    if raw in ("", "~", "null"):
+        return None
+    if re.fullmatch(r"-?\d+", raw):
+        return int(raw)
+    if re.fullmatch(r"-?\d+\.\d+", raw):
+        return float(raw)
+    try:
+        return date.fromisoformat(raw).isoformat()
+    except ValueError:
+        return raw
+
+
+def parse_front_matter(text: str) -> tuple[dict, str]:
+    """(front-matter dict, body) for a note; ({}, text) when there is none."""
+    m = _FRONT_MATTER.match(text)
+    if not m:
+        return {}, text
+    data, key = {}, None
+    for line in m.group(1).splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        item = re.match(r"^\s*-\s+(.*)$", line)
+        if item and key is not None:
+            if not isinstance(data.get(key), list):
+                data[key] = []
+            data[key].append(_scalar(item.group(1)))
+            continue
+        kv = _KEY.match(line)
+        if not kv:
+            continue
+        key, raw = kv.group(1).strip(), kv.group(2).strip()
+        if raw.startswith("[") and raw.endswith("]"):
+            data[key] = [_scalar(v) for v in raw[1:-1].split(",") if v.strip()]
+        else:
+            data[key] = _scalar(raw)
+    return data, text[m.end() :]
+
+
+def _as_list(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v is not None]
+    return [v for v in re.split(r"[,\s]+", str(value)) if v]
+
+
+def parse_note(path: str, root: str, raw: bytes, default_category: str | None) -> dict:
+    """Everything the import needs from one file; no storage access."""
+    rel = os.path.relpath(path, root).replace(os.sep, "/")
+    front, body = parse_front_matter(raw.decode("utf-8", errors="replace"))
+    name = os.path.splitext(os.path.basename(rel))[0]
+    folder = rel.split("/", 1)[0] if "/" in rel else None
+    category = front.pop("category", None)
+    if category not in CATEGORIES:
+        category = folder if folder in CATEGORIES else default_category
+    prose = _CODE.sub("", body)
+    tags = [t.lstrip("#") for t in _as_list(front.pop("tags", None)) + _as_list(front.pop("tag", None))]
+    tags += _INLINE_TAG.findall(prose)
+    title = str(front.pop("title", None) or name)
+    aliases = _as_list(front.pop("aliases", None)) + _as_list(front.pop("alias", None))
+    return {
+        "path": rel,
+        "names": [name, rel[:-3] if rel.lower().endswith(".md") else rel, *aliases],
+        "links": list(dict.fromkeys(t.strip() for t in _WIKI_LINK.findall(prose))),
+        "idea": {
+            "title": title,
+            "content": body.strip() or title,
+            "category": category,
+            "tags": list(dict.fromkeys(t for t in tags if t)),
+            "metadata": {**front, "source": {"path": rel, "hash": hashlib.sha256(raw).hexdigest()}},
+        },
+    }
+
+
+def walk(root: str):
+    """Paths of the vault's .md files, skipping hidden and tool folders."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".md"):
+                yield os.path.join(dirpath, filename)
+
+
+# -- writing -------------------------------------------------------------------
+
+
+class Progress:
+    """Counts plus rows/sec, reported through an optional callback."""
+
+    def __init__(self, total: int, report=None, every: float = 1.0):
+        self.total = total
+        self.report = report
+        self.every = every
+        self.started = time.perf_counter()
+        self.last = 0.0
+        self.counts = {"created": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "failed": 0, "links": 0}
+        self.errors: list[dict] = []
+
+    def fail(self, paths, error: Exception, key: str | None = "failed") -> None:
+        """Record a storage error for each note in paths; the import goes on."""
+        message = f"{type(error).__name__}: {error}"
+        for path in paths:
+            self.errors.append({"path": path, "error": message})
+            if key:
+                self.add(key)
+
+    def add(self, key: str, n: int = 1) -> None:
+        self.counts[key] += n
+        now = time.perf_counter()
+        if self.report and now - self.last >= self.every:
+            self.last = now
+            self.report(self.snapshot())
+
+    @property
+    def notes_done(self) -> int:
+        return sum(self.counts[k] for k in ("created", "updated", "unchanged", "duplicates", "failed"))
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        written = self.counts["created"] + self.counts["updated"] + self.counts["links"]
+        return {
+            **self.counts,
+            "notes": self.total,
+            "done": self.notes_done,
+            "seconds": round(elapsed, 2),
+            "rows_per_sec": round(written / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+async def import_vault(
+    store: Storage,
+    root: str,
+    *,
+    default_category: str | None = None,
+    workers: int = 4,
+    dry_run: bool = False,
+    skip_duplicates: bool = False,
+    report=None,
+) -> dict:
+    """Import every note under root; returns counts, errors and rows/sec."""
+    if default_category is not None and default_category not in CATEGORIES:
+        raise ValueError(f"unknown category {default_category!r}")
+    root = os.path.abspath(root)
+    existing = {row["source"]["path"]: row for row in await store.imported_ideas() if row.get("source")}
+
+    notes = []
+    for path in walk(root):
+        with open(path, "rb") as f:
+            notes.append(parse_note(path, root, f.read(), default_category))
+    progress = Progress(len(notes), report)
+
+    new, changed = [], []
+    for note in notes:
+        seen = existing.get(note["path"])
+        if seen is None:
+            new.append(note)
+        elif seen["source"].get("hash") != note["idea"]["metadata"]["source"]["hash"]:
+            note["id"] = seen["id"]
+            changed.append(note)
+        else:
+            note["id"] = seen["id"]
+            progress.add("unchanged")
+    if skip_duplicates and new:
+        index = DuplicateIndex(store.all_ideas_text)
+        await index.ensure_fresh()
+        hits = index.check_batch([note["idea"] for note in new])
+        for note, hit in zip(new, hits):
+            if hit is not None:
+                # An earlier note in this run only has an id once it is inserted.
+                note["duplicate_of"] = new[hit["index"]] if "index" in hit else {"id": hit["id"]}
+                progress.add("duplicates")
+        new = [note for note, hit in zip(new, hits) if hit is None]
+    if dry_run:
+        progress.counts.update(created=len(new), updated=len(changed))
+        return {**progress.snapshot(), "dry_run": True, "errors": []}
+
+    pool = asyncio.Semaphore(max(1, workers))
+
+    async def insert(chunk: list[dict]) -> None:
+        pending, results = bulk.prepare_ideas([note["idea"] for note in chunk])
+        try:
+            async with pool:
+                written = await store.insert_ideas([row for _, row in pending]) if pending else []
+        except Exception as e:
+            progress.fail([note["path"] for note in chunk], e)
+            return
+        bulk.record_inserted(results, pending, written)
+        for note, result in zip(chunk, results):
+            if result["status"] == "created":
+                note["id"] = result["id"]
+                progress.add("created")
+            else:
+                progress.errors.append({"path": note["path"], "error": result["error"]})
+                progress.add("failed")
+
+    async def update(note: dict) -> None:
+        idea = note["idea"]
+        if idea["category"] not in CATEGORIES:
+            progress.errors.append({"path": note["path"], "error": f"unknown category {idea['category']!r}"})
+            progress.add("failed")
+            return
+        try:
+            async with pool:
+                await store.update_idea(note["id"], idea)
+        except Exception as e:
+            progress.fail([note["path"]], e)
+            return
+        progress.add("updated")
+
+    size = bulk.MAX_BATCH_SIZE
+    await asyncio.gather(
+        *(insert(new[i : i + size]) for i in range(0, len(new), size)),
+        *(update(note) for note in changed),
+    )
+
+    # Resolve links against every note in the vault, written now or earlier,
+    # so a link to a note imported in a later run is picked up on that run.
+    for note in notes:
+        if "duplicate_of" in note:
+            note["id"] = note["duplicate_of"].get("id")
+    ids = {}
+    for note in notes:
+        if note.get("id"):
+            for name in note["names"]:
+                ids.setdefault(name.lower(), note["id"])
+    links = {}
+    for note in notes:
+        for target in note["links"]:
+            target_id = ids.get(target.lower()) or ids.get(target.lower().removesuffix(".md"))
+            if note.get("id") and target_id and target_id != note["id"]:
+                links[(note["id"], target_id)] = {
+                    "source_id": note["id"],
+                    "target_id": target_id,
+                    "relationship_type": LINK_TYPE,
+                }
+
+    paths = {}
+    for note in notes:
+        if note.get("id"):
+            paths.setdefault(note["id"], note["path"])
+
+    async def link(chunk: list[dict]) -> None:
+        try:
+            async with pool:
+                written = await store.upsert_links(chunk)
+        except Exception as e:
+            # The notes themselves were written; only their links are missing.
+            progress.fail(dict.fromkeys(paths[row["source_id"]] for row in chunk), e, key=None)
+            return
+        progress.add("links", len(written))
+
+    rows = list(links.values())
+    await asyncio.gather(*(link(rows[i : i + size]) for i in range(0, len(rows), size)))
+    return {**progress.snapshot(), "errors": progress.errors}
@@ -0,0 +1,70 @@
+"""Import-time profile behind `server.py --import-profile`.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (so
+nothing is already cached in sys.modules) and summarises the report: total
+import time, the slowest modules by cumulative and by self time, and the
+self time per top-level package. Modules the server deliberately defers are
+listed with whether they still got imported, so a regression shows up here.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Only needed on first use (storage backend, suggest_links) or with
+# WRITE_BEHIND=1 (the journal); importing the server must not pull them in.
+DEFERRED = (
+    "numpy",
+    "supabase",
+    "postgrest",
+    "second_brain_mcp.storage.supabase_store",
+    "second_brain_mcp.storage.sqlite_store",
+    "second_brain_mcp.journal",
+    "sqlite3",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run(module: str) -> list[tuple[str, int, int, int]]:
+    """(name, self_us, cumulative_us, depth) for every module the import loads."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def profile(module: str, top: int = 20) -> str:
+    rows = run(module)
+    total = next((cum for name, _, cum, _ in rows if name == module), sum(s for _, s, _, _ in rows))
+    by_package = Counter()
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    loaded = {name for name, _, _, _ in rows}
+
+    def ms(us: int) -> str:
+        return f"{us / 1000:8.1f} ms"
+
+    out = [f"import {module}: {ms(total).strip()} across {len(rows)} modules", ""]
+    out.append(f"Slowest {top} by cumulative time:")
+    out += [f"  {ms(cum)}  {'  ' * depth}{name}" for name, _, cum, depth in sorted(rows, key=lambda r: -r[2])[:top]]
+    out += ["", f"Slowest {top} by self time:"]
+    out += [f"  {ms(self_us)}  {name}" for name, self_us, _, _ in sorted(rows, key=lambda r: -r[1])[:top]]
+    out += ["", "Self time by top-level package:"]
+    out += [f"  {ms(us)}  {pkg}" for pkg, us in by_package.most_common(top)]
+    out += ["", "Deferred until first use:"]
+    out += [f"  {'IMPORTED' if name in loaded else 'deferred'}  {name}" for name in DEFERRED]
+    return "\n".join(out)
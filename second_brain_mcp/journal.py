@@ -0,0 +1,263 @@
+"""Write-behind journal for captures (WRITE_BEHIND=1).
+
+By default add_idea waits for the insert to reach the database, so a slow or
+unreachable upstream means a slow or failed capture. In write-behind mode a
+capture is instead given its id and created_at here, committed to a local
+SQLite journal with synchronous=FULL (on disk before the tool returns), and
+acknowledged at once with "pending": true.
+
+A background flusher drains the journal oldest first, in batches of up to
+bulk.MAX_BATCH_SIZE, through Storage.upsert_ideas, which overwrites ids that
+are already there: a flush whose response got lost is simply sent again, and
+an edit made to the row since then goes out with it. A failed
+batch is retried with exponential backoff, and its rows one at a time, so one
+bad row can't hold back the rest. Nothing is dropped; a row that can't be
+written stays in the journal, with its last error, until it can. Whatever is
+left at shutdown is flushed on the next start.
+
+Until a row is flushed the server reads it from here: get_idea, the first
+page of list_by_category and search_ideas merge pending rows, and
+update_idea/archive_idea edit them in place. Those edits take the flush lock,
+so they never race a flush that is sending the same row.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from second_brain_mcp import bulk
+from second_brain_mcp.categories import CATEGORIES
+from second_brain_mcp.storage.base import IDEA_SUMMARY_FIELDS, IDEA_UPDATABLE, check_fields, prefix_snippet
+
+log = logging.getLogger("second-brain")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "second_brain_journal.db")
+LINGER = 0.2
+MAX_BACKOFF = 300.0
+
+
+def split_query(query: str) -> list[str]:
+    """Split on whitespace, keeping "quoted phrases" together."""
+    return [m.group(1) or m.group(2) for m in re.finditer(r'"([^"]*)"|(\S+)', query)]
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class WriteJournal:
+    def __init__(self, path: str, write, *, on_flushed=None, linger: float = LINGER, max_backoff: float = MAX_BACKOFF):
+        """write: async (rows) -> rows written, i.e. Storage.upsert_ideas.
+        on_flushed: called with each batch once it is in the database."""
+        self.path = path
+        self._write = write
+        self.on_flushed = on_flushed
+        self.linger = linger
+        self.max_backoff = max_backoff
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        # FULL: fsync the WAL on every commit, so an acknowledged capture survives a power cut.
+        self.conn.execute("PRAGMA synchronous = FULL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            " id TEXT PRIMARY KEY, row TEXT NOT NULL, queued_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)"
+        )
+        # Appends run on a worker thread (the fsync), edits and removals on the loop.
+        self._db_lock = threading.Lock()
+        self.rows: dict[str, dict] = {
+            row_id: json.loads(row)
+            for row_id, row in self.conn.execute("SELECT id, row FROM pending ORDER BY queued_at, id")
+        }
+        self.flushed = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        if self.rows:
+            log.info("Write journal: %d captures left from last run", len(self.rows))
+
+    # -- writing -------------------------------------------------------------
+
+    def _execute(self, sql: str, params_seq) -> None:
+        with self._db_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(sql, params_seq)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    async def append(self, rows: list[dict]) -> list[dict]:
+        """Journal new ideas (validated, without id) and return them as they will be stored."""
+        ts = now_iso()
+        rows = [
+            {"id": str(uuid.uuid4()), "tags": [], "metadata": {}, "is_archived": False, **row,
+             "created_at": ts, "updated_at": ts}
+            for row in rows
+        ]
+        queued = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO pending (id, row, queued_at) VALUES (?, ?, ?)",
+            [(row["id"], json.dumps(row), queued) for row in rows],
+        )
+        for row in rows:
+            self.rows[row["id"]] = row
+        self._wake.set()
+        return [{**row, "pending": True} for row in rows]
+
+    async def update(self, idea_id: str, fields: dict) -> dict | None:
+        """Apply update_idea fields to a pending idea; None once it has been flushed."""
+        # Checked here: the database would only reject a bad row at flush time.
+        check_fields(fields, IDEA_UPDATABLE)
+        if "category" in fields and fields["category"] not in CATEGORIES:
+            raise ValueError(f"unknown category {fields['category']!r}")
+        if idea_id not in self.rows:
+            return None  # flushed: don't queue behind a flush that may be retrying
+        async with self._flush_lock:
+            if idea_id not in self.rows:
+                return None  # flushed while we waited
+            row = {**self.rows[idea_id], **fields, "updated_at": now_iso()}
+            self._execute("UPDATE pending SET row = ? WHERE id = ?", [(json.dumps(row), idea_id)])
+            self.rows[idea_id] = row
+            return {**row, "pending": True}
+
+    # -- reading -------------------------------------------------------------
+
+    def get(self, idea_id: str) -> dict | None:
+        row = self.rows.get(idea_id)
+        return {**row, "pending": True} if row else None
+
+    def recent(self, *, category=None, tags=None, query: str = "", view: str = "summary") -> list[dict]:
+        """Live pending ideas matching the filters, newest first. A query is
+        matched as plain substrings (no stemming): every term, or any with OR,
+        and none of the -excluded ones; rank is the share of terms found."""
+        terms = split_query(query.lower())
+        excluded = [t[1:] for t in terms if t.startswith("-") and len(t) > 1]
+        terms = [t for t in terms if t and not t.startswith("-") and t != "or"]
+        needed = min(1, len(terms)) if " or " in f" {query.lower()} " else len(terms)
+        out = []
+        for row in reversed(self.rows.values()):
+            if row["is_archived"] or (category and row["category"] != category):
+                continue
+            if tags and not set(tags) & set(row["tags"]):
+                continue
+            text = f"{row['title']} {row['content']}".lower()
+            found = sum(t in text for t in terms)
+            if found < needed or any(t in text for t in excluded):
+                continue
+            if view == "summary":
+                row = {f: prefix_snippet(row["content"]) if f == "snippet" else row[f] for f in IDEA_SUMMARY_FIELDS}
+            if query:
+                row = {**row, "rank": found / len(terms) if terms else 0.0}
+            out.append({**row, "pending": True})
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.rows),
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    # -- flushing ------------------------------------------------------------
+
+    def _done(self, rows: list[dict]) -> None:
+        self._execute("DELETE FROM pending WHERE id = ?", [(row["id"],) for row in rows])
+        for row in rows:
+            self.rows.pop(row["id"], None)
+        self.flushed += len(rows)
+        if self.on_flushed:
+            self.on_flushed(rows)
+
+    def _failed(self, rows: list[dict], error: Exception) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._execute(
+            "UPDATE pending SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+            [(self.last_error, row["id"]) for row in rows],
+        )
+
+    async def flush(self) -> int:
+        """Write everything pending now; returns how many rows went out.
+        A row that fails doesn't stop the rest; the last upstream error is
+        raised at the end if any row is still pending."""
+        written, tried, error = 0, set(), None
+        async with self._flush_lock:
+            # Each row is tried once per flush, including rows appended meanwhile.
+            while batch := [row for row in self.rows.values() if row["id"] not in tried][: bulk.MAX_BATCH_SIZE]:
+                tried.update(row["id"] for row in batch)
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    self._failed(batch, e)
+                    error = e
+                    if len(batch) == 1:
+                        continue
+                    # Find out whether one row is to blame; the others still go out.
+                    for row in batch:
+                        try:
+                            await self._write([row])
+                        except Exception as row_error:
+                            self._failed([row], row_error)
+                            error = row_error
+                            continue
+                        self._done([row])
+                        written += 1
+                    continue
+                self._done(batch)
+                written += len(batch)
+        if error is not None and any(i in self.rows for i in tried):
+            raise error
+        return written
+
+    async def ensure_flushed(self, ids) -> None:
+        """Flush first if any of ids is still pending, e.g. before linking to it."""
+        if any(i in self.rows for i in ids):
+            await self.flush()
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            if not self.rows:
+                self._wake.clear()
+                await self._wake.wait()
+            # Let a burst of captures go out as one batch.
+            await asyncio.sleep(self.linger)
+            try:
+                n = await self.flush()
+            except Exception as e:
+                log.warning("Write journal: flush failed (%d pending), retrying in %.0fs: %s", len(self.rows), backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 1.0
+            if n:
+                log.info("Write journal: flushed %d captures", n)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher, try one last flush, and close the journal.
+        Anything still pending stays on disk for the next start."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.rows:
+            try:
+                await asyncio.wait_for(self.flush(), timeout)
+            except Exception as e:
+                log.warning("Write journal: %d captures left for next start: %s", len(self.rows), e)
+        self.conn.close()
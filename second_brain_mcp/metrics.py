@@ -0,0 +1,152 @@
+"""Per-tool metrics, exposed in Prometheus text format at /metrics, and error logging.
+
+ToolMetrics is FastMCP middleware, so every registered tool is measured without
+touching the tool functions themselves. For each call it records:
+
+- latency (histogram) and outcome (calls_total{status="ok"|"error"});
+- result rows — items on a page, rows in a list, nodes in a traversal;
+- response size in bytes, as serialised for the client;
+- upstream requests — PostgREST round trips, or SQL statements on SQLite.
+
+Upstream requests are counted through a context variable: storage backends call
+count_upstream() for every request they send, and the middleware gives each
+tool call its own counter. Work a call starts with asyncio.gather or
+create_task inherits the same counter.
+
+ToolErrorLog is the one place a failed tool call is logged, with its
+traceback, so the tools themselves don't each need a try/except.
+"""
+
+import contextvars
+import logging
+import time
+import traceback
+
+from fastmcp.server.middleware import Middleware
+
+log = logging.getLogger("second-brain")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+UPSTREAM_BUCKETS = (0, 1, 2, 3, 5, 10, 25)
+
+_upstream: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("upstream_requests", default=None)
+
+
+def count_upstream(n: int = 1) -> None:
+    """Called by storage backends for every request they send upstream."""
+    counter = _upstream.get()
+    if counter is not None:
+        counter[0] += n
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out = [f'{name}_bucket{{{labels},le="{bound}"}} {n}' for bound, n in zip(self.buckets, self.counts)]
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:g}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+class ToolStats:
+    def __init__(self):
+        self.ok = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+        self.response_bytes = Histogram(BYTE_BUCKETS)
+        self.upstream = Histogram(UPSTREAM_BUCKETS)
+
+
+def row_count(structured) -> int:
+    """How many rows a tool result carries, from its structured content."""
+    if structured is None:
+        return 0
+    if isinstance(structured, dict) and set(structured) == {"result"}:
+        structured = structured["result"]
+    if isinstance(structured, list):
+        return len(structured)
+    if isinstance(structured, dict):
+        for key in ("items", "nodes", "results"):
+            if isinstance(structured.get(key), list):
+                return len(structured[key])
+        return 1
+    return 0
+
+
+class ToolMetrics(Middleware):
+    def __init__(self):
+        self.tools: dict[str, ToolStats] = {}
+        self.started = time.time()
+
+    async def on_call_tool(self, context, call_next):
+        stats = self.tools.setdefault(context.message.name, ToolStats())
+        counter = [0]
+        token = _upstream.set(counter)
+        t0 = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            stats.errors += 1
+            raise
+        else:
+            stats.ok += 1
+            stats.rows.observe(row_count(result.structured_content))
+            stats.response_bytes.observe(sum(len(getattr(c, "text", "") or "") for c in result.content))
+            return result
+        finally:
+            stats.latency.observe(time.perf_counter() - t0)
+            stats.upstream.observe(counter[0])
+            _upstream.reset(token)
+
+    def render(self, extra: list[tuple[str, str, float]] = ()) -> str:
+        """Prometheus text exposition. extra: additional (name, type, value) samples."""
+        lines = [
+            "# HELP second_brain_tool_calls_total Tool calls by outcome.",
+            "# TYPE second_brain_tool_calls_total counter",
+        ]
+        for tool, s in sorted(self.tools.items()):
+            lines.append(f'second_brain_tool_calls_total{{tool="{tool}",status="ok"}} {s.ok}')
+            lines.append(f'second_brain_tool_calls_total{{tool="{tool}",status="error"}} {s.errors}')
+        for name, attr, help_text in (
+            ("second_brain_tool_duration_seconds", "latency", "Tool call latency."),
+            ("second_brain_tool_result_rows", "rows", "Rows returned per successful call."),
+            ("second_brain_tool_response_bytes", "response_bytes", "Serialised response size per successful call."),
+            ("second_brain_tool_upstream_requests", "upstream", "Storage round trips per call."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for tool, s in sorted(self.tools.items()):
+                lines += getattr(s, attr).lines(name, f'tool="{tool}"')
+        lines += [
+            "# HELP second_brain_uptime_seconds Seconds since the server started.",
+            "# TYPE second_brain_uptime_seconds gauge",
+            f"second_brain_uptime_seconds {time.time() - self.started:.0f}",
+        ]
+        for name, kind, value in extra:
+            lines += [f"# TYPE {name} {kind}", f"{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+class ToolErrorLog(Middleware):
+    async def on_call_tool(self, context, call_next):
+        try:
+            return await call_next(context)
+        except Exception as e:
+            # FastMCP wraps tool exceptions in a ToolError; log the original.
+            log.error("  -> FAILED: %s\n%s", e.__cause__ or e, traceback.format_exc())
+            raise
@@ -0,0 +1,102 @@
+"""Opaque keyset cursors for paginated list/search tools.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and base64'd
+so callers treat it as an opaque token. The next page is fetched with a
+"strictly after this key" filter instead of OFFSET, so every page costs the
+same regardless of how deep the caller has browsed.
+
+A cursor comes back from the caller, and its values end up inside PostgREST
+filter strings (after_created/after_updated), so decode_cursor checks each
+one against the kind of key it should be before anything uses it.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+MAX_PAGE_SIZE = 100
+
+
+def _timestamp(value) -> None:
+    datetime.fromisoformat(value)  # TypeError for a non-string
+
+
+def _uuid(value) -> None:
+    uuid.UUID(value)
+
+
+def _number(value) -> None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(value)
+
+
+def _text(value) -> None:
+    if not isinstance(value, str):
+        raise ValueError(value)
+
+
+def _digits(value) -> None:
+    if isinstance(value, bool) or not (isinstance(value, int) or isinstance(value, str) and value.isascii() and value.isdigit()):
+        raise ValueError(value)
+
+
+# The sort keys cursors carry, one check per value.
+CREATED_KEY = (_timestamp, _uuid)  # (created_at, id)
+RANKED_KEY = (_number, _timestamp, _uuid)  # (rank, created_at, id)
+NAME_KEY = (_text,)  # topic name
+CHANGE_KEY = (_digits, _digits)  # change_log (txid, seq)
+
+
+def encode_cursor(*values) -> str:
+    """Pack a row's sort key into an opaque cursor token."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: tuple) -> list:
+    """Unpack a cursor token, checking it carries a sort key of the expected
+    shape (one of the *_KEY tuples above)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError as e:
+        raise ValueError("Invalid cursor — pass next_cursor from a previous page unchanged") from e
+    if not isinstance(values, list) or len(values) != len(key):
+        raise ValueError("Cursor does not belong to this query — start again without a cursor")
+    for check, value in zip(key, values):
+        try:
+            check(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor — pass next_cursor from a previous page unchanged") from e
+    return values
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def after_created(created_at: str, row_id: str) -> str:
+    """PostgREST or= filter for rows strictly after (created_at, id) in DESC order.
+
+    Backed by the composite (created_at DESC, id DESC) indexes in schema.sql.
+    """
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+
+
+def after_updated(updated_at: str, row_id: str) -> str:
+    """PostgREST or= filter for rows strictly after (updated_at, id) in ASC order.
+
+    Backed by the (updated_at, id) indexes in schema.sql.
+    """
+    return f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt.{row_id})'
+
+
+def build_page(rows: list, limit: int, key) -> dict:
+    """Trim a limit+1 fetch to a page and derive next_cursor from its last row."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_cursor(*key(rows[-1])) if has_more else None,
+    }
@@ -0,0 +1,142 @@
+"""Shared lifecycle of the in-process indexes (similarity, tag stats, topics,
+duplicates).
+
+Each one is built from a single load query on first use, refreshed in the
+background once it is older than refresh_interval (to pick up writes made
+outside this process), and patched by the write tools in between.
+
+A load reads a snapshot, so a write made while it is in flight may be
+missing from what it returns. Writes are therefore recorded while a load is
+running and applied again on top of the freshly built index; every change
+is idempotent or close to it (a put replaces, a drop of an absent row does
+nothing), so one the snapshot already had does no harm.
+
+Indexes built from the same rows (similarity and duplicates both read the
+whole corpus) are tied together with share_load: a load fetches the rows
+once and rebuilds every index of the group already in use, so they refresh
+together off one download instead of one each.
+"""
+
+import asyncio
+import logging
+import time
+
+log = logging.getLogger("second-brain")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in into is it its me my of on or so "
+    "that the this to was we were what when which will with you your".split()
+)
+
+
+class ResidentIndex:
+    """Subclasses implement _build(loaded), _put(row), _drop(row_id) and
+    _describe(), and set label for the log line."""
+
+    label = "Index"
+
+    def __init__(self, load, refresh_interval: float = 600.0, clock=time.monotonic):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.loaded_at: float | None = None
+        self._refreshing: asyncio.Task | None = None
+        self._lock = asyncio.Lock()  # shared by the share_load group
+        self._peers: tuple["ResidentIndex", ...] = (self,)
+        # Changes made while a load is in flight, replayed after the swap.
+        self._replay: list[tuple] | None = None
+
+    def _build(self, loaded) -> None:
+        raise NotImplementedError
+
+    def _put(self, row: dict) -> None:
+        raise NotImplementedError
+
+    def _drop(self, row_id: str) -> None:
+        raise NotImplementedError
+
+    def _describe(self) -> str:
+        raise NotImplementedError
+
+    def _stale(self) -> bool:
+        return self.loaded_at is None or self.clock() - self.loaded_at > self.refresh_interval
+
+    async def _reload(self) -> None:
+        # Peers not in use yet stay cold until their own first use.
+        group = [self, *(peer for peer in self._peers if peer is not self and peer.loaded_at is not None)]
+        for index in group:
+            index._replay = []
+        try:
+            loaded = await self._load()
+        finally:
+            replays = [(index, index._replay) for index in group]
+            for index in group:
+                index._replay = None
+        for index, replay in replays:
+            index._build(loaded)
+            for change, args in replay:
+                change(*args)
+            index.loaded_at = index.clock()
+            log.info("%s loaded: %s", index.label, index._describe())
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            if self._stale():  # a peer's load may have rebuilt this one meanwhile
+                await self._reload()
+
+    async def ensure_fresh(self) -> None:
+        """Load on first use; afterwards refresh in the background when stale."""
+        if self.loaded_at is None:
+            await self._refresh()
+        elif self._stale():
+            self._in_background()
+
+    def load_in_background(self) -> None:
+        """Start the first load without waiting for it."""
+        if self.loaded_at is None:
+            self._in_background()
+
+    def _in_background(self) -> None:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh())
+            self._refreshing.add_done_callback(self._refreshed)
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        # Nothing awaits a background load, so its failure is logged here.
+        # loaded_at is left as it was: the index stays stale (or cold) and the next call retries.
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("%s load failed, the next use retries: %s", self.label, task.exception())
+
+    def _apply(self, change, *args) -> None:
+        """Run change(*args) on the index, and again after a load in flight."""
+        if self._replay is not None:
+            self._replay.append((change, args))
+        if self.loaded_at is not None:
+            change(*args)  # before the first load there is nothing to patch
+
+    def _upsert(self, row: dict) -> None:
+        if row.get("is_archived"):
+            self._drop(row["id"])
+        else:
+            self._put(row)
+
+    def upsert(self, row: dict) -> None:
+        """Apply one added or updated row (archived rows are dropped instead)."""
+        self._apply(self._upsert, row)
+
+    def remove(self, row_id: str) -> None:
+        self._apply(self._drop, row_id)
+
+    def age(self) -> float | None:
+        return round(self.clock() - self.loaded_at, 1) if self.loaded_at is not None else None
+
+
+def share_load(*indexes: ResidentIndex) -> None:
+    """Build indexes from one load of the same rows (they must all be given
+    the same load). A first load or refresh of any of them also rebuilds the
+    others already in use, and they take turns on one lock, so the rows are
+    fetched once per refresh however many indexes read them."""
+    lock = asyncio.Lock()
+    for index in indexes:
+        index._peers = indexes
+        index._lock = lock
@@ -5,49 +5,234 @@ Every tool description is the sole source of context for Claude on mobile.
 Descriptions must be thorough enough that Claude can operate without CLAUDE.md.
 """
 
+import argparse
+import asyncio
+import atexit
+import hmac
+import importlib
 import logging
 import os
-import traceback
+import queue
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import TYPE_CHECKING
+
+# Procfile runs this file as a script, so make the package importable.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from dotenv import load_dotenv
 from fastmcp import FastMCP
-from supabase import create_client
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from second_brain_mcp import bulk, changes, export
+from second_brain_mcp.cache import ReadCache
+from second_brain_mcp.categories import CATEGORIES
+from second_brain_mcp.dedupe import DuplicateIndex, check_on_duplicate, merge_fields
+from second_brain_mcp.metrics import ToolErrorLog, ToolMetrics
+from second_brain_mcp.pagination import CREATED_KEY, NAME_KEY, RANKED_KEY, build_page, clamp_limit, decode_cursor
+from second_brain_mcp.resident import share_load
+from second_brain_mcp.similarity import SimilarityIndex
+from second_brain_mcp.storage import ACTIVITY_PERIODS, LazyStorage, check_view
+from second_brain_mcp.tag_stats import TagStats
+from second_brain_mcp.tools import insights as insight_tools
+from second_brain_mcp.tools import topics as topic_tools
+from second_brain_mcp.topic_index import TopicIndex
+
+if TYPE_CHECKING:
+    # Imported by the lifespan only with WRITE_BEHIND=1: it brings in sqlite3.
+    from second_brain_mcp.journal import WriteJournal
 
 load_dotenv()
 
 # ---------------------------------------------------------------------------
-# Logging setup — logs to file + console so we can diagnose mobile issues
+# Logging setup — logs to file + console so we can diagnose mobile issues.
+# Tools only put records on a queue; a listener thread does the file/console
+# I/O, and the file rotates instead of growing without bound. Configured by
+# the entrypoint, so importing this module (scripts, benchmarks) has no
+# side effects on disk.
 # ---------------------------------------------------------------------------
 LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "server.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
+# Where export_backup writes; scripts/export.py takes --out instead. Local disk:
+# on the Heroku dyno it is lost on restart, so hosted backups pull GET /export.
+BACKUP_DIR = os.environ.get("BACKUP_DIR") or os.path.join(os.path.dirname(__file__), "..", "backups")
+# Write-behind mode: captures are acknowledged once they are in a local
+# journal and flushed to storage in the background (see journal.py).
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+JOURNAL_PATH = os.environ.get("JOURNAL_PATH")  # default: journal.DEFAULT_PATH
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
 log = logging.getLogger("second-brain")
 
-log.info("Connecting to Supabase...")
-supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"])
-log.info("Supabase client ready")
-
-CATEGORIES = [
-    "groceries",
-    "religious_study",
-    "finance_journal",
-    "product_ideas",
-    "health_wellness",
-    "cf_care",
-    "cooking_recipes",
-    "business_learning",
-]
+
+def configure_logging() -> None:
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    log_format = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    handlers = [
+        RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"),
+        logging.StreamHandler(),
+    ]
+    for handler in handlers:
+        handler.setFormatter(log_format)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler = QueueHandler(log_queue)
+    # Only merge args (and any traceback) into the message; the listener's
+    # handlers add the timestamp and level.
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
+
+# Tools only talk to the Storage interface; STORAGE_BACKEND picks Supabase
+# (default) or a local SQLite file. See storage/__init__.py. The backend is
+# created on first use or by the startup warm-up below, whichever is first.
+store = LazyStorage()
+
+# Hot reads (get_idea, list_by_category, list_topics, ...) go through this
+# cache; every write tool invalidates the tags it affects.
+cache = ReadCache()
+
+
+async def load_topic_index() -> tuple[list[dict], dict[str, int]]:
+    """Fetch the whole topic registry plus per-tag usage counts."""
+    return await store.all_topics(), await store.tag_usage_counts()
+
+
+# search_topics is answered from memory; see topic_index.py.
+topic_index = TopicIndex(load_topic_index)
+
+
+async def load_ideas_text() -> list[dict]:
+    """Fetch the text of every live idea, for the similarity and duplicate indexes."""
+    return await store.all_ideas_text()
+
+
+# suggest_links ranks neighbours in memory; see similarity.py.
+similarity_index = SimilarityIndex(load_ideas_text)
+
+# tag_stats/related_tags are answered from memory; see tag_stats.py.
+tag_stats_index = TagStats(lambda: store.all_idea_tags())
+
+# add_idea/add_ideas_bulk check captures against it; see dedupe.py.
+dedupe_index = DuplicateIndex(load_ideas_text)
+
+# Both are built from the whole corpus: one download per refresh feeds both.
+share_load(similarity_index, dedupe_index)
+
+# Pending captures in write-behind mode; opened by the lifespan, None otherwise.
+journal: "WriteJournal | None" = None
+
+
+def journal_flushed(rows: list[dict]) -> None:
+    # Cached pages from before the flush don't have these rows yet.
+    cache.invalidate(*{f"category:{row['category']}" for row in rows}, *{f"idea:{row['id']}" for row in rows})
+
+
+async def ensure_dedupe_index() -> None:
+    """Refresh the duplicate index before checking a capture against it.
+
+    The check is best-effort and never holds up a capture: a cold index is
+    loaded in the background (a failed load is logged and retried on the next
+    capture), and until it is ready captures go in unchecked.
+    """
+    if dedupe_index.loaded_at is None:
+        dedupe_index.load_in_background()
+        log.info("  -> duplicate check skipped, index still loading")
+        return
+    await dedupe_index.ensure_fresh()
+
 
 CATEGORY_LIST = ", ".join(CATEGORIES)
 
+
+def page_tags(page: dict, prefix: str, *extra: str) -> set[str]:
+    """Cache tags for a list page: the list scope plus one tag per row on it."""
+    return {*extra, *(f"{prefix}:{row['id']}" for row in page["items"])}
+
+
+async def expand_related_ideas(insights: list[dict]) -> None:
+    """Attach `related_ideas` (idea summaries) to each insight, with one lookup for the whole page."""
+    ids = [i for insight in insights for i in insight.get("related_idea_ids") or []]
+    ideas = {row["id"]: row for row in await store.ideas_by_ids(ids)} if ids else {}
+    for insight in insights:
+        insight["related_ideas"] = [ideas[i] for i in insight.get("related_idea_ids") or [] if i in ideas]
+
+
+def with_pending(page: dict, pending: list[dict]) -> dict:
+    """A first page of ideas with pending captures on top (they are the newest).
+    Rows already flushed but still in a cached page are not repeated."""
+    if not pending:
+        return page
+    ids = {row["id"] for row in pending}
+    return {**page, "items": pending + [row for row in page["items"] if row["id"] not in ids]}
+
+
+def related_idea_tags(page: dict) -> set[str]:
+    """An expanded page embeds idea summaries, so it goes stale when any of them changes."""
+    return {f"idea:{i}" for row in page["items"] for i in row.get("related_idea_ids") or []}
+
+
+# FastMCP imports these (about 0.6 s, mostly beartype decoration) inside the
+# first tool call, to build its session-state store. Loading them during the
+# warm-up keeps that off the first request.
+FIRST_CALL_IMPORTS = ("key_value.aio.adapters.pydantic", "key_value.aio.stores.memory")
+
+
+def preload_first_call_imports() -> None:
+    for name in FIRST_CALL_IMPORTS:
+        importlib.import_module(name)
+
+
+async def warm_up() -> None:
+    """Connect to storage and load lazy imports before the first tool call needs them."""
+    t0 = time.perf_counter()
+    storage, imports = await asyncio.gather(
+        store.warm(), asyncio.to_thread(preload_first_call_imports), return_exceptions=True
+    )
+    if isinstance(imports, Exception):
+        log.warning("Preloading imports failed: %s", imports)
+    if isinstance(storage, Exception):
+        log.warning("Storage warm-up failed, the first tool call will retry: %s", storage)
+        return
+    log.info("Storage ready (%s) in %.0f ms", store.name, (time.perf_counter() - t0) * 1000)
+
+
+# The lifespan's warm-up task, for callers that must not overlap it (benchmarks).
+warming: asyncio.Task | None = None
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    global journal, warming
+    if WRITE_BEHIND:
+        from second_brain_mcp.journal import DEFAULT_PATH, WriteJournal
+
+        journal = WriteJournal(
+            JOURNAL_PATH or DEFAULT_PATH, lambda rows: store.upsert_ideas(rows), on_flushed=journal_flushed
+        )
+        journal.start()
+    # Warm up in the background: the server starts accepting requests
+    # immediately, and a request that beats the warm-up builds the store itself.
+    warming = asyncio.create_task(warm_up())
+    try:
+        yield {}
+    finally:
+        warming.cancel()
+        warming = None
+        if journal is not None:
+            await journal.stop()
+            journal = None
+        await store.close()
+
+
 mcp = FastMCP(
     "Second Brain",
+    lifespan=lifespan,
     instructions=(
         "You are Cole's second brain — a personal knowledge capture system. "
         "Cole is often on his phone, so keep responses SHORT and conversational. "
@@ -58,46 +243,61 @@ mcp = FastMCP(
     ),
 )
 
+# Latency, errors, rows, response size and upstream requests for every tool
+# call; served at /metrics.
+tool_metrics = ToolMetrics()
+mcp.add_middleware(tool_metrics)
+# Every failed tool call is logged once here, with its traceback.
+mcp.add_middleware(ToolErrorLog())
+
 
 # ---------------------------------------------------------------------------
 # System / orientation
 # ---------------------------------------------------------------------------
 
+# Static — built once at import instead of on every call.
+SYSTEM_INFO = {
+    "categories": {
+        "groceries": "Shopping lists, meal-prep ingredients, household supplies",
+        "religious_study": "Bible study notes, sermon reflections, theology questions — always ask if it connects to past notes",
+        "finance_journal": "Budget thoughts, investment ideas, financial goals — always ask if it connects to past notes",
+        "product_ideas": "App concepts, SaaS ideas, side-project plans",
+        "health_wellness": "Exercise, nutrition, mental-health reflections",
+        "cf_care": "Cystic fibrosis care — ALWAYS include metadata.type as one of: treatment, insurance, medication, appointment",
+        "cooking_recipes": "Recipes, cooking techniques, meal plans",
+        "business_learning": "Books, courses, frameworks, career insights",
+    },
+    "tables": {
+        "ideas": "Core notes. Fields: id, title, content, category, tags[], metadata{}, created_at, is_archived",
+        "topics": "Tag registry for autocomplete. Fields: id, name, description, category",
+        "idea_relationships": "Links between ideas. Fields: id, source_id, target_id, relationship_type, note",
+        "insights": "AI-generated patterns. Fields: id, title, summary, related_idea_ids[], tags[], category, action_item, is_actioned",
+    },
+    "guidelines": [
+        "Keep responses SHORT — Cole is usually on mobile",
+        "Confirm every write with a brief summary of what was saved",
+        "For cf_care: always store metadata.type (treatment/insurance/medication/appointment)",
+        "For religious_study and finance_journal: ask if it connects to existing notes",
+        "When Cole asks 'what have I been thinking about X': search across ALL categories",
+        "Use tags liberally — they power cross-category discovery",
+        "If add_idea reports possible_duplicates, tell Cole and offer to archive one; pass on_duplicate='skip' for repeat captures like lists",
+        "For overviews ('what have I been tagging lately'), start with tag_stats / related_tags instead of pulling ideas",
+        "For counts over time ('how much did I log this month'), use activity_summary — never count list results",
+        "List/search tools return short summaries with a snippet — call get_idea when you need a note's full text",
+        "If a search finds nothing, retry once with fuzzy=true before telling Cole it isn't there — it tolerates typos",
+    ],
+}
+
 
 @mcp.tool()
-def get_system_info() -> dict:
+async def get_system_info() -> dict:
     """Return the full schema of Cole's second brain: available categories,
     how ideas/tags/relationships/insights work, and behavioral guidelines.
 
     CALL THIS FIRST in any new conversation to orient yourself before doing anything else.
     """
     log.info("TOOL CALL: get_system_info()")
-    return {
-        "categories": {
-            "groceries": "Shopping lists, meal-prep ingredients, household supplies",
-            "religious_study": "Bible study notes, sermon reflections, theology questions — always ask if it connects to past notes",
-            "finance_journal": "Budget thoughts, investment ideas, financial goals — always ask if it connects to past notes",
-            "product_ideas": "App concepts, SaaS ideas, side-project plans",
-            "health_wellness": "Exercise, nutrition, mental-health reflections",
-            "cf_care": "Cystic fibrosis care — ALWAYS include metadata.type as one of: treatment, insurance, medication, appointment",
-            "cooking_recipes": "Recipes, cooking techniques, meal plans",
-            "business_learning": "Books, courses, frameworks, career insights",
-        },
-        "tables": {
-            "ideas": "Core notes. Fields: id, title, content, category, tags[], metadata{}, created_at, is_archived",
-            "topics": "Tag registry for autocomplete. Fields: id, name, description, category",
-            "idea_relationships": "Links between ideas. Fields: id, source_id, target_id, relationship_type, note",
-            "insights": "AI-generated patterns. Fields: id, title, summary, related_idea_ids[], tags[], category, action_item, is_actioned",
-        },
-        "guidelines": [
-            "Keep responses SHORT — Cole is usually on mobile",
-            "Confirm every write with a brief summary of what was saved",
-            "For cf_care: always store metadata.type (treatment/insurance/medication/appointment)",
-            "For religious_study and finance_journal: ask if it connects to existing notes",
-            "When Cole asks 'what have I been thinking about X': search across ALL categories",
-            "Use tags liberally — they power cross-category discovery",
-        ],
-    }
+    return SYSTEM_INFO
 
 
 # ---------------------------------------------------------------------------
@@ -106,12 +306,13 @@ def get_system_info() -> dict:
 
 
 @mcp.tool()
-def add_idea(
+async def add_idea(
     title: str,
     content: str,
     category: str,
     tags: list[str] | None = None,
     metadata: dict | None = None,
+    on_duplicate: str = "add",
 ) -> dict:
     """Capture a new idea into Cole's second brain.
 
@@ -120,139 +321,350 @@ def add_idea(
     tags: free-form list of keywords for cross-category discovery (e.g. ["prayer", "healing", "insurance"]).
     metadata: optional JSON object. For cf_care, MUST include {"type": "treatment|insurance|medication|appointment"}.
 
-    Returns the saved idea with its generated UUID.
+    Every capture is checked for near-duplicates (nearly the same words, same category) first.
+    on_duplicate: what to do when one is found —
+        "add" (default): save anyway; the result lists them under `possible_duplicates`.
+        "skip": save nothing; returns {"status": "skipped", "duplicate_of", "possible_duplicates"}.
+        "merge": fold this capture into the closest match (tags unioned, metadata merged,
+            longer content kept) and return that idea with `merged_into` set to its id.
+
+    Returns the saved idea with its generated UUID. With `pending: true` the server has saved it
+    locally and is still writing it to the database; it is safe — confirm it to Cole as saved.
     """
     log.info("TOOL CALL: add_idea(title=%r, category=%r, tags=%r)", title, category, tags)
-    try:
-        result = (
-            supabase.table("ideas")
-            .insert(
-                {
-                    "title": title,
-                    "content": content,
-                    "category": category,
-                    "tags": tags or [],
-                    "metadata": metadata or {},
-                }
-            )
-            .execute()
-            .data[0]
+    check_on_duplicate(on_duplicate)
+    idea = {
+        "title": title,
+        "content": content,
+        "category": category,
+        "tags": tags or [],
+        "metadata": metadata or {},
+    }
+    await ensure_dedupe_index()
+    duplicates = dedupe_index.lookup(idea)
+    if duplicates and on_duplicate == "skip":
+        log.info("  -> skipped, duplicate of %s", duplicates[0]["id"])
+        return {"status": "skipped", "duplicate_of": duplicates[0], "possible_duplicates": duplicates}
+    if duplicates and on_duplicate == "merge":
+        existing = (journal and journal.get(duplicates[0]["id"])) or await store.get_idea(duplicates[0]["id"])
+        fields = merge_fields(existing, idea)
+        result = (journal and await journal.update(existing["id"], fields)) or await store.update_idea(
+            existing["id"], fields
         )
-        log.info("  -> saved idea %s", result.get("id"))
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+        cache.invalidate(f"idea:{existing['id']}", f"category:{category}")
+        topic_index.count_usage([t for t in result.get("tags") or [] if t not in (existing.get("tags") or [])])
+        similarity_index.upsert(result)
+        tag_stats_index.upsert(result)
+        dedupe_index.upsert(result)
+        log.info("  -> merged into idea %s", existing["id"])
+        return {**result, "merged_into": existing["id"]}
+    if journal is not None:
+        pending, results = bulk.prepare_ideas([idea])
+        if not pending:
+            raise ValueError(results[0]["error"])
+        result = (await journal.append([pending[0][1]]))[0]
+    else:
+        result = await store.insert_idea(idea)
+    cache.invalidate(f"category:{category}")
+    topic_index.count_usage(result.get("tags") or [])
+    similarity_index.upsert(result)
+    tag_stats_index.upsert(result)
+    dedupe_index.upsert(result)
+    if duplicates:
+        result = {**result, "possible_duplicates": duplicates}
+    log.info("  -> saved idea %s (%d possible duplicates)", result.get("id"), len(duplicates))
+    return result
 
 
 @mcp.tool()
-def search_ideas(
+async def add_ideas_bulk(ideas: list[dict], on_duplicate: str = "add") -> dict:
+    """Capture many ideas at once in a single write — use for brain dumps, imports, or
+    when Cole lists several separate things to save. Prefer this over calling add_idea repeatedly.
+
+    ideas: list of objects, each with title, content, category (one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning),
+        and optional tags (list) and metadata (object; for cf_care MUST include "type"). Max 500 per call.
+    on_duplicate: "add" (default) saves near-duplicates of existing ideas (or of an earlier row in the
+        same call) anyway and flags them with `duplicate_of`; "skip" leaves them out with status "exists".
+
+    Returns {"created", "existing", "failed", "results"} where results has one entry per input row
+    (same order) with status "created" (plus id), "exists" (plus duplicate_of) or "error" (the reason is in `error`).
+    Invalid rows don't block valid ones.
+    """
+    log.info("TOOL CALL: add_ideas_bulk(n=%d, on_duplicate=%r)", len(ideas), on_duplicate)
+    if on_duplicate not in ("add", "skip"):
+        raise ValueError("on_duplicate must be one of: add, skip")
+    pending, results = bulk.prepare_ideas(ideas)
+    if pending:
+        await ensure_dedupe_index()
+        duplicates = {}
+        for (i, _), hit in zip(pending, dedupe_index.check_batch([row for _, row in pending])):
+            if hit is not None:
+                # Batch-local hits point at a pending position; report the input index.
+                duplicates[i] = {**hit, "index": pending[hit["index"]][0]} if "index" in hit else hit
+        if on_duplicate == "skip":
+            for i in duplicates:
+                results[i] = {"index": i, "status": "exists", "duplicate_of": duplicates[i]}
+            pending = [(i, row) for i, row in pending if i not in duplicates]
+    if pending:
+        rows = [row for _, row in pending]
+        written = await (journal.append(rows) if journal is not None else store.insert_ideas(rows))
+        bulk.record_inserted(results, pending, written)
+        cache.invalidate(*{f"category:{row['category']}" for row in written})
+        for row in written:
+            topic_index.count_usage(row.get("tags") or [])
+            similarity_index.upsert(row)
+            tag_stats_index.upsert(row)
+            dedupe_index.upsert(row)
+        if on_duplicate == "add":
+            for i in duplicates:
+                results[i]["duplicate_of"] = duplicates[i]
+    report = bulk.summarize(results)
+    log.info("  -> created %d, failed %d", report["created"], report["failed"])
+    return report
+
+
+@mcp.tool()
+async def search_ideas(
     query: str = "",
     category: str | None = None,
     tags: list[str] | None = None,
-) -> list:
+    limit: int = 25,
+    cursor: str | None = None,
+    view: str = "summary",
+    fuzzy: bool = False,
+) -> dict:
     """Full-text search across all ideas. Use this when Cole asks 'what have I noted about X'.
 
-    query: free-text search (searches title + content).
+    query: free-text search over title + content. Supports web-search syntax:
+        "exact phrase", OR, and -excluded words.
     category: optional filter — one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning
     tags: optional — return ideas that have ANY of these tags.
-
-    Returns a list of matching ideas (most recent first, max 25).
+    limit: page size (default 25, max 100).
+    cursor: pass `next_cursor` from a previous call (with the same query/filters) to get the next page.
+    view: "summary" (default) returns id, title, category, tags, created_at and a short `snippet`
+        with matched words in **bold**; "full" returns every column. Use get_idea for one note's full text.
+    fuzzy: match titles by trigram similarity instead of words, so misspellings still hit
+        ("brisket recpie", "trikafa"). Try this when an exact search comes back empty.
+
+    Returns {"items": [...], "next_cursor": str | null}. Items are best match first
+    (each has a relevance `rank`); with no query, most recent first. next_cursor is null on the last page.
     """
-    log.info("TOOL CALL: search_ideas(query=%r, category=%r, tags=%r)", query, category, tags)
-    try:
-        q = supabase.table("ideas").select("*").eq("is_archived", False)
-        if category:
-            q = q.eq("category", category)
-        if tags:
-            q = q.overlaps("tags", tags)
+    log.info(
+        "TOOL CALL: search_ideas(query=%r, category=%r, tags=%r, cursor=%r, view=%r, fuzzy=%r)",
+        query, category, tags, cursor, view, fuzzy,
+    )
+    limit = clamp_limit(limit)
+    check_view(view)
+    # Tags match ANY, so their order doesn't matter; normalise for coalescing.
+    tags = sorted(set(tags)) if tags else None
+
+    async def load():
         if query:
-            # text_search returns a different builder that doesn't support .order()/.limit()
-            # so we apply ordering and limit before text_search, or just execute after it
-            results = q.text_search("content", query).execute().data
-            # Sort and limit in Python since the builder doesn't chain
-            results.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-            results = results[:25]
-        else:
-            results = q.order("created_at", desc=True).limit(25).execute().data
-        log.info("  -> returned %d ideas", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+            rows = await store.search_ideas(
+                query,
+                category=category,
+                tags=tags,
+                fuzzy=fuzzy,
+                view=view,
+                limit=limit + 1,
+                after=decode_cursor(cursor, RANKED_KEY) if cursor else None,
+            )
+            return build_page(rows, limit, lambda r: (r["rank"], r["created_at"], r["id"]))
+        rows = await store.recent_ideas(
+            category=category,
+            tags=tags,
+            view=view,
+            limit=limit + 1,
+            after=decode_cursor(cursor, CREATED_KEY) if cursor else None,
+        )
+        return build_page(rows, limit, lambda r: (r["created_at"], r["id"]))
+
+    # Not cached (queries rarely repeat), but identical concurrent searches share one request.
+    page = await cache.coalesce(
+        ("ideas", "search_ideas", query, category, tuple(tags or ()), limit, cursor, view, fuzzy), load
+    )
+    if journal is not None and not cursor and not fuzzy:
+        page = with_pending(page, journal.recent(category=category, tags=tags, query=query, view=view))
+    log.info("  -> returned %d ideas", len(page["items"]))
+    return page
+
+
+async def read_idea(idea_id: str) -> dict:
+    """The current version of an idea: pending in the journal, else through the cache."""
+    if journal is not None and (result := journal.get(idea_id)):
+        return result
+    return await cache.get_or_load(
+        ("ideas", "get_idea", idea_id), lambda: store.get_idea(idea_id), tags=(f"idea:{idea_id}",)
+    )
 
 
 @mcp.tool()
-def get_idea(idea_id: str) -> dict:
+async def get_idea(idea_id: str) -> dict:
     """Retrieve a single idea by its UUID. Use when you need full detail on a specific note."""
     log.info("TOOL CALL: get_idea(id=%r)", idea_id)
-    try:
-        result = supabase.table("ideas").select("*").eq("id", idea_id).execute().data[0]
-        log.info("  -> found: %r", result.get("title"))
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    result = await read_idea(idea_id)
+    log.info("  -> found%s: %r", " pending" if result.get("pending") else "", result.get("title"))
+    return result
 
 
 @mcp.tool()
-def update_idea(idea_id: str, fields: dict) -> dict:
+async def update_idea(idea_id: str, fields: dict) -> dict:
     """Update fields on an existing idea. Pass only the fields to change.
 
     Updatable fields: title, content, category (must be one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning), tags, metadata.
     """
     log.info("TOOL CALL: update_idea(id=%r, fields=%r)", idea_id, list(fields.keys()))
-    try:
-        result = supabase.table("ideas").update(fields).eq("id", idea_id).execute().data[0]
-        log.info("  -> updated idea %s", idea_id)
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    # The old tags are needed to move topic usage counts from the tags taken off to the ones added.
+    before = await read_idea(idea_id) if "tags" in fields else None
+    result = (journal and await journal.update(idea_id, fields)) or await store.update_idea(idea_id, fields)
+    # idea:<id> covers get_idea and every cached page showing the old version;
+    # the category tag covers a move into a new category.
+    cache.invalidate(f"idea:{idea_id}", f"category:{result['category']}")
+    if before is not None and not result.get("is_archived"):
+        old_tags, new_tags = before.get("tags") or [], result.get("tags") or []
+        topic_index.count_usage([t for t in old_tags if t not in new_tags], -1)
+        topic_index.count_usage([t for t in new_tags if t not in old_tags])
+    similarity_index.upsert(result)
+    tag_stats_index.upsert(result)
+    dedupe_index.upsert(result)
+    log.info("  -> updated idea %s", idea_id)
+    return result
 
 
 @mcp.tool()
-def list_by_category(category: str, limit: int = 20) -> list:
+async def list_by_category(
+    category: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    view: str = "summary",
+) -> dict:
     """Browse recent ideas in a category. Good for 'show me my recent X'.
 
     category MUST be one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning
+    limit: page size (default 20, max 100).
+    cursor: pass `next_cursor` from a previous call to get the next (older) page.
+    view: "summary" (default) returns id, title, category, tags, created_at and a short content
+        `snippet`; "full" returns every column. Use get_idea for one note's full text.
+
+    Returns {"items": [...], "next_cursor": str | null}, most recent first.
     """
-    log.info("TOOL CALL: list_by_category(category=%r, limit=%d)", category, limit)
-    try:
-        results = (
-            supabase.table("ideas")
-            .select("*")
-            .eq("category", category)
-            .eq("is_archived", False)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
-            .data
+    log.info("TOOL CALL: list_by_category(category=%r, limit=%d, cursor=%r, view=%r)", category, limit, cursor, view)
+    limit = clamp_limit(limit)
+    check_view(view)
+
+    async def load():
+        rows = await store.recent_ideas(
+            category=category,
+            view=view,
+            limit=limit + 1,
+            after=decode_cursor(cursor, CREATED_KEY) if cursor else None,
         )
-        log.info("  -> returned %d ideas", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+        return build_page(rows, limit, lambda r: (r["created_at"], r["id"]))
+
+    page = await cache.get_or_load(
+        ("ideas", "list_by_category", category, limit, cursor, view),
+        load,
+        tags=lambda page: page_tags(page, "idea", f"category:{category}"),
+    )
+    if journal is not None and not cursor:
+        page = with_pending(page, journal.recent(category=category, view=view))
+    log.info("  -> returned %d ideas", len(page["items"]))
+    return page
+
+
+def utc_day(value: str, name: str) -> str:
+    """YYYY-MM-DD for an ISO date, or the UTC day of an ISO datetime."""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).astimezone(timezone.utc).date().isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date like 2025-06-01, got {value!r}") from None
 
 
 @mcp.tool()
-def archive_idea(idea_id: str) -> dict:
+async def activity_summary(
+    group_by: str = "week",
+    since: str | None = None,
+    until: str | None = None,
+    category: str | None = None,
+) -> dict:
+    """Count ideas per period and category, computed in the database — use this for "how much have I
+    logged in cf_care this month" or "weekly activity by category" instead of listing and counting notes.
+
+    group_by: "day", "week" (Monday start), "month", "year", or "all" for one total per category.
+    since: first day to include, ISO date (e.g. "2025-06-01"); until: first day to EXCLUDE. Days are UTC.
+    category: optional, one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning
+    Counts live (non-archived) ideas by the day they were created.
+
+    Returns {"total", "periods": [{"period", "total", "by_category": {category: count}}]}, oldest period
+    first; periods with nothing logged are omitted. For group_by="all", period is null.
+    """
+    log.info(
+        "TOOL CALL: activity_summary(group_by=%r, since=%r, until=%r, category=%r)", group_by, since, until, category
+    )
+    if group_by not in ACTIVITY_PERIODS:
+        raise ValueError(f"group_by must be one of: {', '.join(ACTIVITY_PERIODS)}")
+    rows = await store.activity_summary(
+        group_by=group_by,
+        since=utc_day(since, "since") if since else None,
+        until=utc_day(until, "until") if until else None,
+        category=category,
+    )
+    periods: dict[str | None, dict] = {}
+    for row in rows:
+        period = periods.setdefault(row["period"], {"period": row["period"], "total": 0, "by_category": {}})
+        period["total"] += row["ideas"]
+        period["by_category"][row["category"]] = row["ideas"]
+    for period in periods.values():
+        period["by_category"] = dict(sorted(period["by_category"].items(), key=lambda kv: -kv[1]))
+    log.info("  -> %d periods", len(periods))
+    return {"total": sum(p["total"] for p in periods.values()), "periods": list(periods.values())}
+
+
+@mcp.tool()
+async def archive_idea(idea_id: str) -> dict:
     """Soft-delete an idea by marking it archived. It won't appear in searches."""
     log.info("TOOL CALL: archive_idea(id=%r)", idea_id)
-    try:
-        result = (
-            supabase.table("ideas")
-            .update({"is_archived": True})
-            .eq("id", idea_id)
-            .execute()
-            .data[0]
-        )
-        log.info("  -> archived idea %s", idea_id)
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    before = await read_idea(idea_id)
+    fields = {"is_archived": True}
+    result = (journal and await journal.update(idea_id, fields)) or await store.update_idea(idea_id, fields)
+    cache.invalidate(f"idea:{idea_id}")
+    if not before.get("is_archived"):
+        topic_index.count_usage(before.get("tags") or [], -1)
+    similarity_index.remove(idea_id)
+    tag_stats_index.remove(idea_id)
+    dedupe_index.remove(idea_id)
+    log.info("  -> archived idea %s", idea_id)
+    return result
+
+
+@mcp.tool()
+async def find_duplicates(category: str | None = None, threshold: float = 0.7, limit: int = 20) -> list:
+    """Maintenance: scan the whole brain for groups of near-duplicate ideas (nearly the same
+    words, same category), e.g. a grocery list or medication note captured twice.
+
+    category: only scan this category. threshold: minimum similarity, 0.5-1.0 (default 0.7;
+    1.0 means the same words). limit: max groups (default 20, max 100).
+    Returns groups, largest first: {"size", "ideas": [{id, title, category, similarity}]} where
+    similarity is to the group's first idea. Offer to archive the extras (archive_idea) — never do it unasked.
+    """
+    log.info("TOOL CALL: find_duplicates(category=%r, threshold=%r, limit=%d)", category, threshold, limit)
+    if not 0.5 <= threshold <= 1.0:
+        raise ValueError("threshold must be between 0.5 and 1.0")
+    await dedupe_index.ensure_fresh()
+    clusters = dedupe_index.find_clusters(category, threshold=threshold)[: clamp_limit(limit)]
+    results = [
+        {
+            "size": len(cluster),
+            "ideas": [{**dedupe_index.meta[i], "similarity": round(sim, 3)} for i, sim in cluster],
+        }
+        for cluster in clusters
+    ]
+    log.info("  -> returned %d groups", len(results))
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -261,61 +673,123 @@ def archive_idea(idea_id: str) -> dict:
 
 
 @mcp.tool()
-def add_topic(name: str, description: str = "", category: str | None = None) -> dict:
+async def add_topic(name: str, description: str = "", category: str | None = None) -> dict:
     """Register a new topic/tag for autocomplete and discovery.
 
     category (optional): one of groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning
     """
     log.info("TOOL CALL: add_topic(name=%r, category=%r)", name, category)
-    try:
-        data = {"name": name}
-        if description:
-            data["description"] = description
-        if category:
-            data["category"] = category
-        result = supabase.table("topics").insert(data).execute().data[0]
-        log.info("  -> created topic %s", result.get("id"))
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    result = await topic_tools.add_topic(store, name, description, category)
+    cache.invalidate("topics:*", f"topics:{category or '*'}")
+    topic_index.add(result)
+    log.info("  -> created topic %s", result.get("id"))
+    return result
+
+
+@mcp.tool()
+async def add_topics_bulk(topics: list[dict]) -> dict:
+    """Register many topics/tags in a single write. Topics that already exist (by name) are left untouched.
+
+    topics: list of objects with name, optional description, optional category (one of: groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning). Max 500 per call.
+
+    Returns {"created", "existing", "failed", "results"} with one status per input row:
+    "created" (plus id), "exists", or "error" (the reason is in `error`).
+    """
+    log.info("TOOL CALL: add_topics_bulk(n=%d)", len(topics))
+    pending, results = bulk.prepare_topics(topics)
+    if pending:
+        written = await store.upsert_topics([row for _, row in pending])
+        bulk.record_upserted(results, pending, written, key=lambda r: r["name"])
+        cache.invalidate("topics:*", *{f"topics:{row['category']}" for row in written})
+        for row in written:
+            topic_index.add(row)
+    report = bulk.summarize(results)
+    log.info("  -> created %d, existing %d, failed %d", report["created"], report["existing"], report["failed"])
+    return report
 
 
 @mcp.tool()
-def list_topics(category: str | None = None) -> list:
-    """List all registered topics, optionally filtered by category (groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning).
+async def list_topics(category: str | None = None, limit: int = 100, cursor: str | None = None) -> dict:
+    """List registered topics alphabetically, optionally filtered by category (groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning).
     Useful for suggesting tags when capturing new ideas.
+
+    limit: page size (default 100, max 100).
+    cursor: pass `next_cursor` from a previous call to continue the list.
+
+    Returns {"items": [...], "next_cursor": str | null}.
     """
-    log.info("TOOL CALL: list_topics(category=%r)", category)
-    try:
-        q = supabase.table("topics").select("*")
-        if category:
-            q = q.eq("category", category)
-        results = q.order("name").execute().data
-        log.info("  -> returned %d topics", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    log.info("TOOL CALL: list_topics(category=%r, cursor=%r)", category, cursor)
+    limit = clamp_limit(limit)
+
+    async def load():
+        # Topic names are unique, so the name alone is a complete keyset.
+        after = decode_cursor(cursor, NAME_KEY)[0] if cursor else None
+        rows = await store.list_topics(category=category, limit=limit + 1, after=after)
+        return build_page(rows, limit, lambda r: (r["name"],))
+
+    page = await cache.get_or_load(
+        ("topics", "list_topics", category, limit, cursor),
+        load,
+        tags=(f"topics:{category or '*'}",),
+    )
+    log.info("  -> returned %d topics", len(page["items"]))
+    return page
 
 
 @mcp.tool()
-def search_topics(query: str) -> list:
-    """Search topics by partial name match. Use for tag autocomplete."""
-    log.info("TOOL CALL: search_topics(query=%r)", query)
-    try:
-        results = (
-            supabase.table("topics")
-            .select("*")
-            .ilike("name", f"%{query}%")
-            .execute()
-            .data
-        )
-        log.info("  -> returned %d topics", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+async def search_topics(query: str, limit: int = 10, fuzzy: bool = False) -> list:
+    """Autocomplete topics/tags by name. Use for tag suggestions while capturing ideas.
+
+    Matches prefixes and substrings ("pray" finds "prayer" and "daily-prayer"). Ranked exact match first,
+    then prefix, then word-start, then substring; most-used tags first within each group.
+    Answered from an in-memory index, so it is instant — call it freely.
+
+    limit: max suggestions (default 10, max 50).
+    fuzzy: tolerate typos ("scripure" finds "scripture"); results are ranked by `similarity` instead.
+    Returns topics with a `uses` count (how many ideas carry that tag).
+    """
+    log.info("TOOL CALL: search_topics(query=%r, fuzzy=%r)", query, fuzzy)
+    await topic_index.ensure_fresh()
+    limit = max(1, min(limit, 50))
+    results = topic_index.fuzzy(query, limit=limit) if fuzzy else topic_index.complete(query, limit=limit)
+    log.info("  -> returned %d topics", len(results))
+    return results
+
+
+@mcp.tool()
+async def tag_stats(category: str | None = None, tags: list[str] | None = None, limit: int = 25) -> list:
+    """How tags are used across live ideas — answers "what have I been thinking about".
+
+    With no arguments, returns the most-used tags. category: rank by use within that category only.
+    tags: return stats for exactly these tags instead (unknown ones are skipped).
+    limit: max tags (default 25, max 100).
+    Each row has `uses` (ideas carrying the tag), `last_used` (newest such idea's created_at) and a
+    per-category `by_category` breakdown. Answered from an in-memory index, so it is instant.
+    """
+    log.info("TOOL CALL: tag_stats(category=%r, tags=%r, limit=%d)", category, tags, limit)
+    await tag_stats_index.ensure_fresh()
+    if tags:
+        results = tag_stats_index.get(tags)
+    else:
+        results = tag_stats_index.top(category, limit=clamp_limit(limit))
+    log.info("  -> returned %d tags", len(results))
+    return results
+
+
+@mcp.tool()
+async def related_tags(tag: str, limit: int = 10) -> list:
+    """Tags that are used together with `tag` on the same ideas. Good for picking tags
+    while capturing an idea, or for spotting themes.
+
+    limit: max tags (default 10, max 100).
+    Returns rows with `together` (ideas carrying both), `uses` (ideas carrying the other tag) and
+    `jaccard` (together / ideas with either), most frequent first.
+    """
+    log.info("TOOL CALL: related_tags(tag=%r, limit=%d)", tag, limit)
+    await tag_stats_index.ensure_fresh()
+    results = tag_stats_index.related(tag, limit=clamp_limit(limit))
+    log.info("  -> returned %d tags", len(results))
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -324,7 +798,7 @@ def search_topics(query: str) -> list:
 
 
 @mcp.tool()
-def link_ideas(
+async def link_ideas(
     source_id: str,
     target_id: str,
     relationship_type: str = "related",
@@ -336,74 +810,128 @@ def link_ideas(
     note: optional explanation of the connection.
     """
     log.info("TOOL CALL: link_ideas(source=%r, target=%r, type=%r)", source_id, target_id, relationship_type)
-    try:
-        result = (
-            supabase.table("idea_relationships")
-            .insert(
-                {
-                    "source_id": source_id,
-                    "target_id": target_id,
-                    "relationship_type": relationship_type,
-                    "note": note,
-                }
-            )
-            .execute()
-            .data[0]
-        )
-        log.info("  -> linked ideas")
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    if journal is not None:
+        # The link's foreign keys need both ideas in the database.
+        await journal.ensure_flushed((source_id, target_id))
+    result = await store.insert_link(
+        {
+            "source_id": source_id,
+            "target_id": target_id,
+            "relationship_type": relationship_type,
+            "note": note,
+        }
+    )
+    cache.invalidate(f"links:{source_id}", f"links:{target_id}")
+    log.info("  -> linked ideas")
+    return result
+
+
+@mcp.tool()
+async def link_ideas_bulk(links: list[dict]) -> dict:
+    """Create many links between ideas in a single write. Pairs that are already linked are left untouched.
+
+    links: list of objects with source_id, target_id, optional relationship_type (default 'related'; e.g. 'builds_on', 'contradicts', 'action_from') and optional note. Max 500 per call.
+
+    Returns {"created", "existing", "failed", "results"} with one status per input row:
+    "created" (plus id), "exists", or "error" (the reason is in `error`).
+    """
+    log.info("TOOL CALL: link_ideas_bulk(n=%d)", len(links))
+    pending, results = bulk.prepare_links(links)
+    if pending and journal is not None:
+        await journal.ensure_flushed({row[k] for _, row in pending for k in ("source_id", "target_id")})
+    if pending:
+        written = await store.upsert_links([row for _, row in pending])
+        bulk.record_upserted(results, pending, written, key=lambda r: (r["source_id"], r["target_id"]))
+        cache.invalidate(*{f"links:{row[k]}" for row in written for k in ("source_id", "target_id")})
+    report = bulk.summarize(results)
+    log.info("  -> created %d, existing %d, failed %d", report["created"], report["existing"], report["failed"])
+    return report
 
 
 @mcp.tool()
-def get_related_ideas(idea_id: str) -> list:
+async def get_related_ideas(idea_id: str, view: str = "summary") -> list:
     """Fetch all ideas linked to a given idea (both directions).
 
+    view: "summary" (default) embeds id, title, category, tags, created_at and a content `snippet`
+        for each linked idea; "full" embeds every column.
+
     Returns the relationship record with the linked idea embedded.
     """
-    log.info("TOOL CALL: get_related_ideas(id=%r)", idea_id)
-    try:
-        fwd = (
-            supabase.table("idea_relationships")
-            .select("*, target:target_id(*)")
-            .eq("source_id", idea_id)
-            .execute()
-            .data
-        )
-        rev = (
-            supabase.table("idea_relationships")
-            .select("*, source:source_id(*)")
-            .eq("target_id", idea_id)
-            .execute()
-            .data
-        )
-        results = fwd + rev
-        log.info("  -> returned %d relationships", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    log.info("TOOL CALL: get_related_ideas(id=%r, view=%r)", idea_id, view)
+    check_view(view)
+    results = await cache.get_or_load(
+        ("idea_relationships", "get_related_ideas", idea_id, view),
+        lambda: store.related(idea_id, view=view),
+        # Embedded neighbours go stale when they're edited, so tag them too.
+        tags=lambda rows: {
+            f"links:{idea_id}",
+            *(f"idea:{r['source_id']}" for r in rows),
+            *(f"idea:{r['target_id']}" for r in rows),
+        },
+    )
+    log.info("  -> returned %d relationships", len(results))
+    return results
+
+
+@mcp.tool()
+async def traverse_related(
+    idea_id: str,
+    depth: int = 2,
+    relationship_types: list[str] | None = None,
+    direction: str = "both",
+    max_nodes: int = 50,
+) -> dict:
+    """Explore how an idea is connected — walks links several hops out in ONE call.
+    Use for "how is this connected", "what does this lead to", or mapping a topic cluster.
+    For direct neighbours only, get_related_ideas is enough.
+
+    depth: hops to follow (1-4, default 2).
+    relationship_types: optional — only follow these link types (e.g. ["builds_on", "action_from"]).
+    direction: "out" (follow source -> target), "in" (follow target -> source), or "both" (default).
+    max_nodes: cap on ideas returned (default 50, max 200); closest ideas are kept first.
+
+    Returns {"nodes": [...], "edges": [...], "truncated": bool}. Each node is an idea summary
+    with its `depth` (hops from the start; the start idea is depth 0). Edges are the links between returned nodes.
+    """
+    log.info("TOOL CALL: traverse_related(id=%r, depth=%d, types=%r, direction=%r)", idea_id, depth, relationship_types, direction)
+    if direction not in ("out", "in", "both"):
+        raise ValueError("direction must be one of: out, in, both")
+    result = await store.traverse(
+        idea_id,
+        max_depth=max(1, min(depth, 4)),
+        relationship_types=relationship_types or None,
+        direction=direction,
+        max_nodes=max(1, min(max_nodes, 200)),
+    )
+    log.info("  -> returned %d nodes, %d edges", len(result["nodes"]), len(result["edges"]))
+    return result
+
+
+@mcp.tool()
+async def suggest_links(idea_id: str, k: int = 10) -> list:
+    """Suggest ideas worth linking to this one — the most textually similar notes (by title, content
+    and tags) that are NOT already linked to it in either direction. Use before link_ideas instead of
+    searching and comparing notes yourself; then confirm with Cole and call link_ideas.
+
+    k: number of suggestions (default 10, max 50).
+    Returns [{id, title, category, tags, score, shared_tags}], best first. score is cosine similarity
+    (0–1); below ~0.2 the connection is usually weak.
+    """
+    log.info("TOOL CALL: suggest_links(id=%r, k=%d)", idea_id, k)
+    _, linked = await asyncio.gather(similarity_index.ensure_fresh(), store.linked_ids(idea_id))
+    results = similarity_index.neighbours(idea_id, k=max(1, min(k, 50)), exclude=linked)
+    log.info("  -> suggested %d ideas (%d already linked)", len(results), len(linked))
+    return results
 
 
 @mcp.tool()
-def remove_relationship(relationship_id: str) -> dict:
-    """Remove a link between two ideas."""
+async def remove_relationship(relationship_id: str) -> list:
+    """Remove a link between two ideas. Returns the removed link (empty list if it didn't exist)."""
     log.info("TOOL CALL: remove_relationship(id=%r)", relationship_id)
-    try:
-        result = (
-            supabase.table("idea_relationships")
-            .delete()
-            .eq("id", relationship_id)
-            .execute()
-            .data
-        )
-        log.info("  -> removed relationship")
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    result = await store.delete_link(relationship_id)
+    cache.invalidate(*{f"links:{row[k]}" for row in result for k in ("source_id", "target_id")})
+    log.info("  -> removed relationship")
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -412,7 +940,7 @@ def remove_relationship(relationship_id: str) -> dict:
 
 
 @mcp.tool()
-def add_insight(
+async def add_insight(
     title: str,
     summary: str,
     related_idea_ids: list[str] | None = None,
@@ -427,71 +955,258 @@ def add_insight(
     action_item: a concrete next step Cole should consider.
     """
     log.info("TOOL CALL: add_insight(title=%r, category=%r)", title, category)
-    try:
-        data = {
-            "title": title,
-            "summary": summary,
-            "related_idea_ids": related_idea_ids or [],
-            "tags": tags or [],
-        }
-        if category:
-            data["category"] = category
-        if action_item:
-            data["action_item"] = action_item
-        result = supabase.table("insights").insert(data).execute().data[0]
-        log.info("  -> created insight %s", result.get("id"))
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    result = await insight_tools.add_insight(store, title, summary, related_idea_ids, tags, category, action_item)
+    cache.invalidate("insights")
+    log.info("  -> created insight %s", result.get("id"))
+    return result
 
 
 @mcp.tool()
-def list_insights(category: str | None = None, unactioned_only: bool = False) -> list:
-    """List past insights, optionally filtered.
+async def list_insights(
+    category: str | None = None,
+    unactioned_only: bool = False,
+    limit: int = 25,
+    cursor: str | None = None,
+    view: str = "summary",
+    expand: bool = False,
+) -> dict:
+    """List past insights, newest first, optionally filtered.
 
     category: one of groceries, religious_study, finance_journal, product_ideas, health_wellness, cf_care, cooking_recipes, business_learning
     unactioned_only: if true, only show insights with pending action items.
+    limit: page size (default 25, max 100).
+    cursor: pass `next_cursor` from a previous call to get the next (older) page.
+    view: "summary" (default) replaces the full summary text with a short `snippet`; "full" returns every column.
+    expand: if true, each insight also gets `related_ideas`: summaries of the ideas in
+        related_idea_ids (deleted ones skipped), all fetched in one batched query.
+
+    Returns {"items": [...], "next_cursor": str | null}.
     """
-    log.info("TOOL CALL: list_insights(category=%r, unactioned_only=%r)", category, unactioned_only)
-    try:
-        q = supabase.table("insights").select("*")
-        if category:
-            q = q.eq("category", category)
-        if unactioned_only:
-            q = q.eq("is_actioned", False)
-        results = q.order("created_at", desc=True).execute().data
-        log.info("  -> returned %d insights", len(results))
-        return results
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    log.info(
+        "TOOL CALL: list_insights(category=%r, unactioned_only=%r, cursor=%r, view=%r, expand=%r)",
+        category, unactioned_only, cursor, view, expand,
+    )
+    limit = clamp_limit(limit)
+    check_view(view)
+
+    async def load():
+        rows = await store.list_insights(
+            category=category,
+            unactioned_only=unactioned_only,
+            view=view,
+            limit=limit + 1,
+            after=decode_cursor(cursor, CREATED_KEY) if cursor else None,
+        )
+        page = build_page(rows, limit, lambda r: (r["created_at"], r["id"]))
+        if expand:
+            await expand_related_ideas(page["items"])
+        return page
+
+    page = await cache.get_or_load(
+        ("insights", "list_insights", category, unactioned_only, limit, cursor, view, expand),
+        load,
+        tags=lambda page: page_tags(page, "insight", "insights") | related_idea_tags(page),
+    )
+    log.info("  -> returned %d insights", len(page["items"]))
+    return page
+
+
+@mcp.tool()
+async def insights_for_idea(
+    idea_id: str,
+    limit: int = 25,
+    cursor: str | None = None,
+    view: str = "summary",
+) -> dict:
+    """List the insights that cite an idea in their related_idea_ids, newest first.
+
+    limit: page size (default 25, max 100).
+    cursor: pass `next_cursor` from a previous call to get the next (older) page.
+    view: "summary" (default) replaces the full summary text with a short `snippet`; "full" returns every column.
+
+    Returns {"items": [...], "next_cursor": str | null}.
+    """
+    log.info("TOOL CALL: insights_for_idea(id=%r, cursor=%r, view=%r)", idea_id, cursor, view)
+    limit = clamp_limit(limit)
+    check_view(view)
+
+    async def load():
+        rows = await store.insights_for_idea(
+            idea_id, view=view, limit=limit + 1, after=decode_cursor(cursor, CREATED_KEY) if cursor else None
+        )
+        return build_page(rows, limit, lambda r: (r["created_at"], r["id"]))
+
+    page = await cache.get_or_load(
+        ("insights", "insights_for_idea", idea_id, limit, cursor, view),
+        load,
+        tags=lambda page: page_tags(page, "insight", "insights", f"idea:{idea_id}"),
+    )
+    log.info("  -> returned %d insights", len(page["items"]))
+    return page
 
 
 @mcp.tool()
-def mark_actioned(insight_id: str) -> dict:
+async def mark_actioned(insight_id: str) -> dict:
     """Mark an insight's action item as completed."""
     log.info("TOOL CALL: mark_actioned(id=%r)", insight_id)
+    result = await store.update_insight(insight_id, {"is_actioned": True})
+    cache.invalidate(f"insight:{insight_id}")
+    log.info("  -> marked insight as actioned")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Backup
+# ---------------------------------------------------------------------------
+
+
+@mcp.tool()
+async def export_backup(incremental: bool = True) -> dict:
+    """Back up every table (ideas, topics, relationships, insights) to a gzipped NDJSON file on the server.
+
+    incremental: true (default) writes only rows added or changed since the previous backup;
+        false writes a full copy. The first backup is always full.
+    Returns {"path", "since", "watermark", "rows": {table: count}, "bytes"}. Only run when Cole asks for a backup.
+    The file stays on the server's own disk, so this is for local or self-hosted installs; on the
+    hosted server that disk is wiped on restart, and a lasting backup is a download of /export instead.
+    """
+    log.info("TOOL CALL: export_backup(incremental=%r)", incremental)
+    result = await export.backup(store, BACKUP_DIR, incremental=incremental)
+    log.info("  -> wrote %s (%d rows)", result["path"], sum(result["rows"].values()))
+    return result
+
+
+def check_export_token(request: Request) -> PlainTextResponse | None:
+    """The error response for a request without "Authorization: Bearer $EXPORT_TOKEN",
+    or None when it may proceed. Every data route is disabled unless EXPORT_TOKEN is set."""
+    token = os.environ.get("EXPORT_TOKEN")
+    if not token:
+        return PlainTextResponse("Export is disabled; set EXPORT_TOKEN to enable it.", status_code=404)
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        return PlainTextResponse("Unauthorized", status_code=401)
+    return None
+
+
+@mcp.custom_route("/export", methods=["GET"])
+async def export_route(request: Request):
+    """Stream an NDJSON export: GET /export?since=<watermark>&gzip=1 with
+    "Authorization: Bearer $EXPORT_TOKEN"."""
+    denied = check_export_token(request)
+    if denied:
+        return denied
+    since = request.query_params.get("since") or None
+    compress = request.query_params.get("gzip") in ("1", "true")
+    log.info("EXPORT: since=%r gzip=%r", since, compress)
+    return StreamingResponse(
+        export.export_bytes(store, since=since, compress=compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+    )
+
+
+@mcp.tool()
+async def changes_since(cursor: str | None = None, tables: list[str] | None = None, limit: int = 50) -> dict:
+    """What was added, changed, archived or deleted since a previous call, oldest first —
+    for keeping a copy of the data fresh without re-reading whole lists. Not needed for normal note-taking.
+
+    cursor: next_cursor from the previous call; omit to start from the beginning of the change log.
+    tables: any of ideas, topics, idea_relationships, insights (default all). limit: max changes (default 50, max 100).
+    Returns {"changes": [{table, id, op, changed_at, row}], "next_cursor", "has_more"}. op is insert, update,
+    archive or delete; row is the full current row (null for deletes). Keep calling with next_cursor while has_more.
+    """
+    log.info("TOOL CALL: changes_since(cursor=%r, tables=%r, limit=%d)", cursor, tables, limit)
+    result = await changes.read_changes(store, cursor=cursor, tables=tables, limit=clamp_limit(limit))
+    log.info("  -> returned %d changes", len(result["changes"]))
+    return result
+
+
+@mcp.custom_route("/changes", methods=["GET"])
+async def changes_route(request: Request):
+    """The changes_since feed over HTTP for replicas: GET /changes?cursor=...&tables=ideas,topics&limit=500
+    (limit up to 1000) with "Authorization: Bearer $EXPORT_TOKEN"."""
+    denied = check_export_token(request)
+    if denied:
+        return denied
+    params = request.query_params
     try:
-        result = (
-            supabase.table("insights")
-            .update({"is_actioned": True})
-            .eq("id", insight_id)
-            .execute()
-            .data[0]
+        result = await changes.read_changes(
+            store,
+            cursor=params.get("cursor") or None,
+            tables=[t for t in (params.get("tables") or "").split(",") if t] or None,
+            limit=int(params.get("limit") or 500),
         )
-        log.info("  -> marked insight as actioned")
-        return result
-    except Exception as e:
-        log.error("  -> FAILED: %s\n%s", e, traceback.format_exc())
-        raise
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=400)
+    log.info("CHANGES: cursor=%r -> %d changes", params.get("cursor"), len(result["changes"]))
+    return JSONResponse(result)
+
+
+# ---------------------------------------------------------------------------
+# Diagnostics
+# ---------------------------------------------------------------------------
+
+
+@mcp.tool()
+async def get_cache_stats() -> dict:
+    """Read-cache counters (hits, misses, hit rate, evictions, invalidations, coalesced, TTLs).
+    Diagnostics only — not needed for normal note-taking.
+    """
+    log.info("TOOL CALL: get_cache_stats()")
+    return cache.stats()
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint, served next to /mcp."""
+    stats = cache.stats()
+    extra = [
+        ("second_brain_cache_entries", "gauge", stats["entries"]),
+        ("second_brain_cache_hits_total", "counter", stats["hits"]),
+        ("second_brain_cache_misses_total", "counter", stats["misses"]),
+        ("second_brain_cache_evictions_total", "counter", stats["evictions"]),
+        ("second_brain_cache_invalidations_total", "counter", stats["invalidations"]),
+        ("second_brain_cache_coalesced_total", "counter", stats["coalesced"]),
+        ("second_brain_cache_in_flight", "gauge", stats["in_flight"]),
+        ("second_brain_topic_index_topics", "gauge", len(topic_index.topics)),
+        ("second_brain_similarity_index_ideas", "gauge", len(similarity_index.ids)),
+        ("second_brain_tag_stats_tags", "gauge", len(tag_stats_index.postings)),
+        ("second_brain_dedupe_index_ideas", "gauge", len(dedupe_index.signatures)),
+        *(
+            [
+                ("second_brain_journal_pending", "gauge", len(journal.rows)),
+                ("second_brain_journal_flushed_total", "counter", journal.flushed),
+                ("second_brain_journal_flush_failures_total", "counter", journal.failures),
+            ]
+            if journal is not None
+            else []
+        ),
+        # Retries and circuit-breaker state; only once the backend exists.
+        *(store.metrics() if store.ready else []),
+    ]
+    return PlainTextResponse(tool_metrics.render(extra), media_type="text/plain; version=0.0.4")
 
 
 # ---------------------------------------------------------------------------
 # Entrypoint
 # ---------------------------------------------------------------------------
 
-if __name__ == "__main__":
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Second Brain MCP server.")
+    parser.add_argument(
+        "--import-profile",
+        nargs="?",
+        type=int,
+        const=20,
+        metavar="TOP",
+        help="report the slowest imports of this module (python -X importtime) and exit",
+    )
+    args = parser.parse_args()
+    if args.import_profile is not None:
+        from second_brain_mcp.importtime import profile
+
+        print(profile("second_brain_mcp.server", top=args.import_profile))
+        return
+
+    configure_logging()
     port = int(os.environ.get("PORT", 8000))
     log.info("Starting Second Brain MCP on port %s (stateless mode)", port)
     mcp.run(
@@ -501,3 +1216,7 @@ if __name__ == "__main__":
         path="/mcp",
         stateless_http=True,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""In-process similarity index behind suggest_links.
+
+Every non-archived idea is turned into a hashed bag-of-words vector over its
+title, content and tags (no external embedding service, so this works
+offline) and stored as one row of a contiguous float32 matrix. Rows are
+L2-normalised, so the cosine similarity of one idea against all others is a
+single matrix-vector product.
+
+- Tokens are hashed into DIM buckets with a sign bit (the "hashing trick"),
+  so there is no vocabulary to maintain and new words never resize anything.
+- Counts are sublinear (1 + log tf); title words and tags weigh more than body
+  words because they are what Cole chose to summarise the note with.
+- add_idea/update_idea/archive_idea patch single rows; a full reload only
+  happens on first use and then in the background once refresh_interval passes.
+
+Memory is rows x DIM x 4 bytes: 8 MB per thousand ideas at the default DIM.
+The matrix is capped at max_mb (MAX_MATRIX_MB, about 64k ideas): ideas past
+the cap are left out with a warning, and suggest_links can't rank them or
+against them, rather than the process growing without bound. numpy is
+imported on first use, not at server start-up.
+"""
+
+import logging
+import math
+import re
+import time
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from second_brain_mcp.resident import STOPWORDS, ResidentIndex
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DIM = 2048
+TITLE_WEIGHT = 2.0
+TAG_WEIGHT = 3.0
+MAX_MATRIX_MB = 512
+
+log = logging.getLogger("second-brain")
+
+
+def tokenize(text: str) -> list[str]:
+    return [w for w in re.findall(r"[0-9a-z]+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _bucket(token: str) -> tuple[int, float]:
+    # crc32 rather than hash(): Python's str hash is salted per process.
+    h = zlib.crc32(token.encode())
+    return h % DIM, 1.0 if h & 0x80000000 else -1.0
+
+
+def vectorize(idea: dict) -> "np.ndarray":
+    """Hashed, sublinear-tf, L2-normalised vector for one idea."""
+    import numpy as np
+
+    weights = Counter()
+    for token, n in Counter(tokenize(idea.get("content") or "")).items():
+        weights[token] += 1 + math.log(n)
+    for token, n in Counter(tokenize(idea.get("title") or "")).items():
+        weights[token] += TITLE_WEIGHT * (1 + math.log(n))
+    for tag in idea.get("tags") or []:
+        weights["#" + tag.lower()] += TAG_WEIGHT
+    vec = np.zeros(DIM, dtype=np.float32)
+    for token, w in weights.items():
+        bucket, sign = _bucket(token)
+        vec[bucket] += sign * w
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SimilarityIndex(ResidentIndex):
+    label = "Similarity index"
+
+    def __init__(self, load, refresh_interval: float = 600.0, clock=time.monotonic, max_mb: float = MAX_MATRIX_MB):
+        """load: async () -> list of non-archived idea rows (id, title, content, category, tags)."""
+        super().__init__(load, refresh_interval, clock)
+        self.max_ideas = int(max_mb * 2**20) // (DIM * 4)
+        self.left_out = 0
+        # Empty until the first load, which is also when numpy gets imported.
+        self.matrix: "np.ndarray | None" = None
+        self.ids: list[str] = []
+        self.meta: list[dict] = []
+        self.positions: dict[str, int] = {}
+
+    # -- building ------------------------------------------------------------
+
+    def _build(self, ideas: list[dict]) -> None:
+        import numpy as np
+
+        self.matrix = np.zeros((min(max(len(ideas), 64), self.max_ideas), DIM), dtype=np.float32)
+        self.ids: list[str] = []
+        self.meta: list[dict] = []
+        self.positions: dict[str, int] = {}
+        self.left_out = 0
+        for idea in ideas:
+            self._put(idea)
+        if self.left_out:
+            log.warning(
+                "Similarity index full at %d ideas (MAX_MATRIX_MB); %d left out", self.max_ideas, self.left_out
+            )
+
+    def _put(self, idea: dict) -> None:
+        pos = self.positions.get(idea["id"])
+        if pos is None:
+            pos = len(self.ids)
+            if pos == self.max_ideas:
+                self.left_out += 1
+                return
+            if pos == len(self.matrix):
+                import numpy as np
+
+                grown = np.zeros((min(pos * 2, self.max_ideas), DIM), dtype=np.float32)
+                grown[:pos] = self.matrix
+                self.matrix = grown
+            self.ids.append(idea["id"])
+            self.meta.append({})
+            self.positions[idea["id"]] = pos
+        self.matrix[pos] = vectorize(idea)
+        self.meta[pos] = {k: idea.get(k) for k in ("id", "title", "category", "tags")}
+
+    def _drop(self, idea_id: str) -> None:
+        pos = self.positions.pop(idea_id, None)
+        if pos is None:
+            return
+        # Move the last row into the hole so the live rows stay contiguous.
+        last = len(self.ids) - 1
+        if pos != last:
+            self.matrix[pos] = self.matrix[last]
+            self.ids[pos], self.meta[pos] = self.ids[last], self.meta[last]
+            self.positions[self.ids[pos]] = pos
+        self.ids.pop()
+        self.meta.pop()
+
+    def _describe(self) -> str:
+        return f"{len(self.ids)} ideas"
+
+    # -- querying ------------------------------------------------------------
+
+    def neighbours(self, idea_id: str, k: int = 10, exclude: set[str] = frozenset()) -> list[dict]:
+        """Top-k ideas by cosine similarity to idea_id, skipping itself and exclude."""
+        import numpy as np
+
+        pos = self.positions.get(idea_id)
+        if pos is None:
+            raise ValueError(f"Idea {idea_id} not found (archived, or left out of a full similarity index)")
+        n = len(self.ids)
+        scores = self.matrix[:n] @ self.matrix[pos]
+        scores[pos] = -np.inf
+        for other in exclude:
+            if other in self.positions:
+                scores[self.positions[other]] = -np.inf
+        k = min(k, n)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        tags = set(self.meta[pos].get("tags") or [])
+        return [
+            {
+                **self.meta[i],
+                "score": round(float(scores[i]), 3),
+                "shared_tags": sorted(tags & set(self.meta[i].get("tags") or [])),
+            }
+            for i in top
+            if scores[i] > 0
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "ideas": len(self.ids),
+            "matrix_mb": round(self.matrix.nbytes / 2**20, 1) if self.matrix is not None else 0.0,
+            "left_out": self.left_out,
+            "age_seconds": self.age(),
+        }
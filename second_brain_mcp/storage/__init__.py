@@ -0,0 +1,78 @@
+"""Storage backends. STORAGE_BACKEND picks one:
+
+- "supabase" (default): hosted Postgres via PostgREST; needs SUPABASE_URL and SUPABASE_ANON_KEY.
+- "sqlite": a local file at SQLITE_PATH (default second_brain.db in the repo root);
+  no network, no Supabase project.
+
+The server holds a LazyStorage: the backend (and its client library) is only
+imported and connected on first use or in the startup warm-up, so importing
+the server needs neither credentials nor a network round trip.
+"""
+
+import asyncio
+import os
+import threading
+
+from second_brain_mcp.storage.base import ACTIVITY_PERIODS, Storage, check_view
+
+BACKENDS = ("supabase", "sqlite")
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "second_brain.db")
+
+
+def backend_name(backend: str | None = None) -> str:
+    return (backend or os.environ.get("STORAGE_BACKEND") or "supabase").lower()
+
+
+def create_storage(backend: str | None = None) -> Storage:
+    backend = backend_name(backend)
+    # Imported lazily so each deployment only needs its own backend's dependencies.
+    if backend == "supabase":
+        from second_brain_mcp.storage.supabase_store import SupabaseStorage
+
+        return SupabaseStorage(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"])
+    if backend == "sqlite":
+        from second_brain_mcp.storage.sqlite_store import SQLiteStorage
+
+        return SQLiteStorage(os.environ.get("SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+    raise ValueError(f"STORAGE_BACKEND must be one of: {', '.join(BACKENDS)} (got {backend!r})")
+
+
+class LazyStorage:
+    """Stands in for a Storage, creating it on first attribute access."""
+
+    def __init__(self, backend: str | None = None):
+        self.name = backend_name(backend)
+        self._backend = backend
+        self._store: Storage | None = None
+        # warm() builds the store on a worker thread while tools may already
+        # be asking for it on the event loop.
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._store is not None
+
+    def get(self) -> Storage:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = create_storage(self._backend)
+        return self._store
+
+    def __getattr__(self, attr: str):
+        return getattr(self.get(), attr)
+
+    async def warm(self) -> None:
+        """Import and build the backend off the event loop, then open its connection."""
+        store = self._store or await asyncio.to_thread(self.get)
+        await store.warm()
+
+    async def close(self) -> None:
+        # Forget the store as well, so a later use (the server's lifespan can
+        # run more than once in one process) reconnects instead of failing.
+        store, self._store = self._store, None
+        if store is not None:
+            await store.close()
+
+
+__all__ = ["ACTIVITY_PERIODS", "BACKENDS", "LazyStorage", "Storage", "backend_name", "check_view", "create_storage"]
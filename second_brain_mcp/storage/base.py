@@ -0,0 +1,250 @@
+"""The storage interface every backend implements.
+
+Tools in server.py only talk to a Storage, never to a client library, so the
+same tools run against Supabase (the hosted deployment) or a local SQLite file
+(single-user installs, offline runs). Methods return plain dicts shaped like
+PostgREST rows: lists for array columns, dicts for JSON, bools for flags.
+
+List/search methods take the decoded keyset of the last row already seen
+(`after`) and return up to `limit` rows; callers fetch limit + 1 and let
+pagination.build_page decide whether there is a next page.
+"""
+
+from abc import ABC, abstractmethod
+
+# Columns returned by summary views; "snippet" is a short prefix of the body
+# (or, for ranked search, an excerpt around the matched words).
+IDEA_SUMMARY_FIELDS = ("id", "title", "category", "tags", "created_at", "snippet")
+INSIGHT_SUMMARY_FIELDS = (
+    "id", "title", "category", "tags", "related_idea_ids", "action_item", "is_actioned", "created_at", "snippet",
+)
+VIEWS = ("summary", "full")
+# activity_summary periods; "all" is one total per category over the range.
+ACTIVITY_PERIODS = ("day", "week", "month", "year", "all")
+
+# Every table, in the order exports write them (ideas before the rows that reference them).
+EXPORT_TABLES = ("ideas", "topics", "idea_relationships", "insights")
+
+# Days change_log entries are kept (prune_change_log in schema.sql).
+CHANGE_LOG_DAYS = 30
+
+# Columns update_idea/update_insight may touch.
+IDEA_UPDATABLE = frozenset({"title", "content", "category", "tags", "metadata", "is_archived"})
+INSIGHT_UPDATABLE = frozenset({"title", "summary", "related_idea_ids", "tags", "category", "action_item", "is_actioned"})
+
+
+def check_view(view: str) -> None:
+    if view not in VIEWS:
+        raise ValueError(f"view must be one of: {', '.join(VIEWS)}")
+
+
+def prefix_snippet(text: str | None, width: int = 160) -> str | None:
+    """Same as the snippet(ideas)/snippet(insights) computed columns."""
+    if text is None or len(text) <= width:
+        return text
+    return " ".join(text.split())[: width - 3] + "..."
+
+
+def check_export_table(table: str) -> None:
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"table must be one of: {', '.join(EXPORT_TABLES)}")
+
+
+def check_fields(fields: dict, allowed: frozenset) -> None:
+    unknown = set(fields) - allowed
+    if unknown:
+        raise ValueError(f"Cannot update: {', '.join(sorted(unknown))} (allowed: {', '.join(sorted(allowed))})")
+    if not fields:
+        raise ValueError("No fields to update")
+
+
+def one(rows: list[dict], what: str) -> dict:
+    """First row of a single-row result, or LookupError naming what was missing."""
+    if not rows:
+        raise LookupError(f"{what} not found")
+    return rows[0]
+
+
+class Storage(ABC):
+    name: str
+
+    # -- ideas ---------------------------------------------------------------
+
+    @abstractmethod
+    async def insert_idea(self, row: dict) -> dict: ...
+
+    @abstractmethod
+    async def insert_ideas(self, rows: list[dict]) -> list[dict]:
+        """Insert many ideas in one round trip; returns them in input order."""
+
+    @abstractmethod
+    async def upsert_ideas(self, rows: list[dict]) -> list[dict]:
+        """Write ideas that already carry their id and created_at (journaled
+        captures). An id that exists is overwritten with the given row, so a
+        repeated flush can't duplicate it and the newest version wins."""
+
+    @abstractmethod
+    async def get_idea(self, idea_id: str) -> dict: ...
+
+    @abstractmethod
+    async def update_idea(self, idea_id: str, fields: dict) -> dict: ...
+
+    @abstractmethod
+    async def recent_ideas(
+        self,
+        *,
+        category: str | None = None,
+        tags: list[str] | None = None,
+        view: str = "summary",
+        limit: int,
+        after: tuple | None = None,
+    ) -> list[dict]:
+        """Live ideas newest first; after is (created_at, id)."""
+
+    @abstractmethod
+    async def search_ideas(
+        self,
+        query: str,
+        *,
+        category: str | None = None,
+        tags: list[str] | None = None,
+        fuzzy: bool = False,
+        view: str = "summary",
+        limit: int,
+        after: tuple | None = None,
+    ) -> list[dict]:
+        """Live ideas best match first, each with a `rank`; after is (rank, created_at, id).
+
+        fuzzy ranks titles by trigram word similarity instead of full-text relevance.
+        """
+
+    @abstractmethod
+    async def all_ideas_text(self) -> list[dict]:
+        """id, title, content, category and tags of every live idea."""
+
+    @abstractmethod
+    async def all_idea_tags(self) -> list[dict]:
+        """id, category, tags and created_at of every live idea."""
+
+    @abstractmethod
+    async def imported_ideas(self) -> list[dict]:
+        """{id, source} for every idea (archived included) whose metadata has a
+        "source" object, i.e. every note written by importer.py."""
+
+    @abstractmethod
+    async def ideas_by_ids(self, ids: list[str], *, view: str = "summary") -> list[dict]:
+        """The ideas with these ids (archived included, missing ids skipped), in a
+        constant number of queries however many ids there are."""
+
+    @abstractmethod
+    async def activity_summary(
+        self, *, group_by: str, since: str | None = None, until: str | None = None, category: str | None = None
+    ) -> list[dict]:
+        """{period, category, ideas} rows counting live ideas by created_at. period is the
+        ISO date starting the day/week (Monday)/month/year, or None for group_by="all";
+        since (inclusive) and until (exclusive) are ISO dates, in UTC. Served from a
+        per-day rollup, so the cost does not grow with the number of ideas."""
+
+    # -- topics --------------------------------------------------------------
+
+    @abstractmethod
+    async def insert_topic(self, row: dict) -> dict: ...
+
+    @abstractmethod
+    async def upsert_topics(self, rows: list[dict]) -> list[dict]:
+        """Insert topics whose name is new; returns only the rows actually created."""
+
+    @abstractmethod
+    async def list_topics(self, *, category: str | None = None, limit: int, after: str | None = None) -> list[dict]:
+        """Topics by name; after is the last name seen."""
+
+    @abstractmethod
+    async def all_topics(self) -> list[dict]: ...
+
+    @abstractmethod
+    async def tag_usage_counts(self) -> dict[str, int]:
+        """tag -> number of live ideas carrying it."""
+
+    # -- relationships -------------------------------------------------------
+
+    @abstractmethod
+    async def insert_link(self, row: dict) -> dict: ...
+
+    @abstractmethod
+    async def upsert_links(self, rows: list[dict]) -> list[dict]:
+        """Insert links whose (source_id, target_id) is new; returns only the rows created."""
+
+    @abstractmethod
+    async def related(self, idea_id: str, *, view: str = "summary") -> list[dict]:
+        """Links touching idea_id with the idea on the other end embedded as
+        `target` (outgoing links) or `source` (incoming links)."""
+
+    @abstractmethod
+    async def linked_ids(self, idea_id: str) -> set[str]:
+        """Ids of ideas linked to idea_id in either direction."""
+
+    @abstractmethod
+    async def traverse(
+        self, start_id: str, *, max_depth: int, relationship_types: list[str] | None, direction: str, max_nodes: int
+    ) -> dict:
+        """Multi-hop neighbourhood as {"nodes", "edges", "truncated"} (see traverse_related in schema.sql)."""
+
+    @abstractmethod
+    async def delete_link(self, relationship_id: str) -> list[dict]:
+        """Delete a link; returns the deleted rows (empty if it didn't exist)."""
+
+    # -- insights ------------------------------------------------------------
+
+    @abstractmethod
+    async def insert_insight(self, row: dict) -> dict: ...
+
+    @abstractmethod
+    async def list_insights(
+        self,
+        *,
+        category: str | None = None,
+        unactioned_only: bool = False,
+        view: str = "summary",
+        limit: int,
+        after: tuple | None = None,
+    ) -> list[dict]:
+        """Insights newest first; after is (created_at, id)."""
+
+    @abstractmethod
+    async def insights_for_idea(
+        self, idea_id: str, *, view: str = "summary", limit: int, after: tuple | None = None
+    ) -> list[dict]:
+        """Insights whose related_idea_ids contain idea_id, newest first; after is (created_at, id)."""
+
+    @abstractmethod
+    async def update_insight(self, insight_id: str, fields: dict) -> dict: ...
+
+    # -- export --------------------------------------------------------------
+
+    @abstractmethod
+    async def export_rows(
+        self, table: str, *, since: str | None = None, after: tuple | None = None, limit: int
+    ) -> list[dict]:
+        """Full rows of one EXPORT_TABLES table with updated_at >= since, in
+        (updated_at, id) order, starting strictly after the `after` key."""
+
+    # -- change feed ---------------------------------------------------------
+
+    @abstractmethod
+    async def changes_since(
+        self, *, after: tuple | None = None, tables: tuple[str, ...] = EXPORT_TABLES, limit: int
+    ) -> list[dict]:
+        """change_log entries for the given tables in commit order, strictly
+        after the (txid, seq) key: {txid, seq, table_name, row_id, op,
+        changed_at, row}. op is insert, update, archive or delete; row is the
+        full row as it is now, None for deletes and rows deleted since."""
+
+    def metrics(self) -> list[tuple[str, str, float]]:
+        """Backend-specific (name, type, value) samples for /metrics; optional."""
+        return []
+
+    async def warm(self) -> None:
+        """Open connections ahead of the first tool call; optional."""
+
+    async def close(self) -> None:
+        """Release connections; optional."""
@@ -0,0 +1,663 @@
+"""Storage in a local SQLite file — for single-user installs and offline runs.
+
+Mirrors schema/schema.sql: the same tables and keyset indexes, JSON1 for the
+array/JSON columns (tags, metadata, related_idea_ids), an external-content
+FTS5 table over title + content kept in sync by triggers for ranked search,
+and WAL mode so reads never wait on a write. Every call is a local B-tree
+lookup, so reads take well under a millisecond and run inline on the event loop.
+
+pg_trgm's word_similarity and the snippet() computed columns are registered as
+SQL functions, so fuzzy search and summary views behave like the Postgres side.
+"""
+
+import json
+import re
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from second_brain_mcp.categories import CATEGORIES
+from second_brain_mcp.metrics import count_upstream
+from second_brain_mcp.storage.base import (
+    CHANGE_LOG_DAYS,
+    EXPORT_TABLES,
+    IDEA_SUMMARY_FIELDS,
+    IDEA_UPDATABLE,
+    INSIGHT_SUMMARY_FIELDS,
+    INSIGHT_UPDATABLE,
+    Storage,
+    check_export_table,
+    check_fields,
+    one,
+    prefix_snippet,
+)
+from second_brain_mcp.topic_index import FUZZY_THRESHOLD, word_similarity
+
+_CATEGORY_CHECK = ", ".join(f"'{c}'" for c in CATEGORIES)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS ideas (
+  id TEXT PRIMARY KEY,
+  title TEXT NOT NULL,
+  content TEXT NOT NULL,
+  category TEXT NOT NULL CHECK (category IN ({_CATEGORY_CHECK})),
+  tags TEXT NOT NULL DEFAULT '[]' CHECK (json_valid(tags)),
+  metadata TEXT NOT NULL DEFAULT '{{}}' CHECK (json_valid(metadata)),
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  is_archived INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS topics (
+  id TEXT PRIMARY KEY,
+  name TEXT UNIQUE NOT NULL,
+  description TEXT,
+  category TEXT CHECK (category IN ({_CATEGORY_CHECK})),
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS idea_relationships (
+  id TEXT PRIMARY KEY,
+  source_id TEXT REFERENCES ideas(id) ON DELETE CASCADE,
+  target_id TEXT REFERENCES ideas(id) ON DELETE CASCADE,
+  relationship_type TEXT DEFAULT 'related',
+  note TEXT,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  UNIQUE (source_id, target_id)
+);
+
+CREATE TABLE IF NOT EXISTS insights (
+  id TEXT PRIMARY KEY,
+  title TEXT NOT NULL,
+  summary TEXT NOT NULL,
+  related_idea_ids TEXT NOT NULL DEFAULT '[]' CHECK (json_valid(related_idea_ids)),
+  tags TEXT NOT NULL DEFAULT '[]' CHECK (json_valid(tags)),
+  category TEXT CHECK (category IN ({_CATEGORY_CHECK})),
+  action_item TEXT,
+  is_actioned INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ideas_category ON ideas(category);
+CREATE INDEX IF NOT EXISTS idx_ideas_created_at ON ideas(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ideas_category_keyset ON ideas(category, created_at DESC, id DESC) WHERE NOT is_archived;
+CREATE INDEX IF NOT EXISTS idx_insights_keyset ON insights(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_relationships_target ON idea_relationships(target_id, source_id);
+-- Incremental exports page on (updated_at, id); see export.py.
+CREATE INDEX IF NOT EXISTS idx_ideas_updated ON ideas(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_topics_updated ON topics(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_idea_relationships_updated ON idea_relationships(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_insights_updated ON insights(updated_at, id);
+
+-- Reverse index of insights.related_idea_ids (what the GIN index does in
+-- Postgres), kept in step by triggers so "insights citing idea X" is an
+-- index lookup instead of a scan over every insight's JSON array.
+CREATE TABLE IF NOT EXISTS insight_ideas (
+  idea_id TEXT NOT NULL,
+  insight_id TEXT NOT NULL,
+  PRIMARY KEY (idea_id, insight_id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS insight_ideas_insert AFTER INSERT ON insights BEGIN
+  INSERT OR IGNORE INTO insight_ideas SELECT value, new.id FROM json_each(new.related_idea_ids);
+END;
+CREATE TRIGGER IF NOT EXISTS insight_ideas_update AFTER UPDATE OF related_idea_ids ON insights BEGIN
+  DELETE FROM insight_ideas WHERE insight_id = old.id;
+  INSERT OR IGNORE INTO insight_ideas SELECT value, new.id FROM json_each(new.related_idea_ids);
+END;
+CREATE TRIGGER IF NOT EXISTS insight_ideas_delete AFTER DELETE ON insights BEGIN
+  DELETE FROM insight_ideas WHERE insight_id = old.id;
+END;
+
+-- Live ideas per (UTC day of created_at, category), kept in step by triggers
+-- like idea_activity_daily in schema.sql; activity_summary reads only this.
+CREATE TABLE IF NOT EXISTS idea_activity_daily (
+  day TEXT NOT NULL,
+  category TEXT NOT NULL,
+  ideas INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, category)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS idea_activity_insert AFTER INSERT ON ideas WHEN NOT new.is_archived BEGIN
+  INSERT INTO idea_activity_daily VALUES (date(new.created_at), new.category, 1)
+  ON CONFLICT (day, category) DO UPDATE SET ideas = ideas + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS idea_activity_update AFTER UPDATE OF category, is_archived, created_at ON ideas BEGIN
+  UPDATE idea_activity_daily SET ideas = ideas - 1
+  WHERE day = date(old.created_at) AND category = old.category AND NOT old.is_archived;
+  INSERT INTO idea_activity_daily SELECT date(new.created_at), new.category, 1 WHERE NOT new.is_archived
+  ON CONFLICT (day, category) DO UPDATE SET ideas = ideas + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS idea_activity_delete AFTER DELETE ON ideas WHEN NOT old.is_archived BEGIN
+  UPDATE idea_activity_daily SET ideas = ideas - 1 WHERE day = date(old.created_at) AND category = old.category;
+END;
+
+-- Change log behind changes_since, like change_log in schema.sql. SQLite runs
+-- one write transaction at a time, so seq order is already commit order.
+CREATE TABLE IF NOT EXISTS change_log (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  table_name TEXT NOT NULL,
+  row_id TEXT NOT NULL,
+  op TEXT NOT NULL,
+  changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now'))
+);
+{{change_log_triggers}}
+
+CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5(
+  title, content, content='ideas', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS ideas_fts_insert AFTER INSERT ON ideas BEGIN
+  INSERT INTO ideas_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS ideas_fts_delete AFTER DELETE ON ideas BEGIN
+  INSERT INTO ideas_fts(ideas_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS ideas_fts_update AFTER UPDATE OF title, content ON ideas BEGIN
+  INSERT INTO ideas_fts(ideas_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+  INSERT INTO ideas_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+"""
+
+# An update that archives an idea is logged as "archive".
+_UPDATE_OP = {"ideas": "CASE WHEN new.is_archived AND NOT old.is_archived THEN 'archive' ELSE 'update' END"}
+
+
+def _change_log_triggers(table: str) -> str:
+    def trigger(event: str, ref: str, op: str) -> str:
+        return (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_log_{event.lower()} AFTER {event} ON {table} BEGIN\n"
+            f"  INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {ref}.id, {op});\n"
+            "END;"
+        )
+
+    return "\n".join(
+        [
+            trigger("INSERT", "new", "'insert'"),
+            trigger("UPDATE", "new", _UPDATE_OP.get(table, "'update'")),
+            trigger("DELETE", "old", "'delete'"),
+        ]
+    )
+
+
+SCHEMA = SCHEMA.replace("{change_log_triggers}", "\n".join(_change_log_triggers(t) for t in EXPORT_TABLES))
+
+JSON_COLUMNS = frozenset({"tags", "metadata", "related_idea_ids"})
+BOOL_COLUMNS = frozenset({"is_archived", "is_actioned"})
+
+# upsert_ideas: a journaled row that is already there is overwritten (newest version wins).
+_IDEA_UPSERT = "ON CONFLICT (id) DO UPDATE SET " + ", ".join(
+    f"{c} = excluded.{c}" for c in (*sorted(IDEA_UPDATABLE), "updated_at")
+)
+
+IDEA_SUMMARY_SQL = ", ".join(
+    "prefix_snippet(i.content) AS snippet" if f == "snippet" else f"i.{f}" for f in IDEA_SUMMARY_FIELDS
+)
+INSIGHT_SUMMARY_SQL = ", ".join(
+    "prefix_snippet(summary) AS snippet" if f == "snippet" else f for f in INSIGHT_SUMMARY_FIELDS
+)
+
+
+# date_trunc(group_by, day) for the activity_summary periods.
+ACTIVITY_PERIOD_SQL = {
+    "day": "day",
+    "week": "date(day, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', day)",
+    "year": "strftime('%Y-01-01', day)",
+    "all": "NULL",
+}
+
+
+def now_iso() -> str:
+    # Fixed-width timestamps so text order is time order.
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def fts_query(text: str) -> str:
+    """Translate websearch_to_tsquery syntax ("phrase", OR, -word) into FTS5 MATCH syntax."""
+    clauses, current = [], []
+    for raw in re.findall(r'-?"[^"]*"|\S+', text):
+        if raw.lower() == "or":
+            clauses.append(current)
+            current = []
+            continue
+        words = re.findall(r"\w+", raw)
+        if words:
+            current.append((raw.startswith("-"), '"' + " ".join(words) + '"'))
+    clauses.append(current)
+    parts = []
+    for clause in clauses:
+        positive = [term for neg, term in clause if not neg]
+        if not positive:
+            continue
+        expr = "(" + " AND ".join(positive) + ")"
+        for neg, term in clause:
+            if neg:
+                expr = f"({expr} NOT {term})"
+        parts.append(expr)
+    return " OR ".join(parts)
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    out = {}
+    for key in row.keys():
+        value = row[key]
+        if key in JSON_COLUMNS and value is not None:
+            value = json.loads(value)
+        elif key in BOOL_COLUMNS and value is not None:
+            value = bool(value)
+        out[key] = value
+    return out
+
+
+def _encode(row: dict) -> dict:
+    return {k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in row.items()}
+
+
+def _placeholders(values) -> str:
+    return ", ".join("?" * len(values))
+
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        self.conn.create_function("word_similarity", 2, word_similarity, deterministic=True)
+        self.conn.create_function("prefix_snippet", 1, prefix_snippet, deterministic=True)
+        self.conn.executescript(SCHEMA)
+        # change_log retention; the Supabase schema prunes with pg_cron instead.
+        self.conn.execute(
+            "DELETE FROM change_log WHERE changed_at < strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now', ?)",
+            (f"-{CHANGE_LOG_DAYS} days",),
+        )
+        # Each statement counts as one upstream request in the tool metrics;
+        # trigger bodies are traced as "-- TRIGGER ..." and are not counted.
+        self.conn.set_trace_callback(lambda sql: sql.startswith("--") or count_upstream())
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _query(self, sql: str, params=()) -> list[dict]:
+        return [_decode(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def _insert(self, table: str, row: dict, conflict: str = "") -> list[dict]:
+        row = _encode(row)
+        sql = (
+            f"INSERT INTO {table} ({', '.join(row)}) VALUES ({_placeholders(row)}) "
+            f"{conflict} RETURNING *"
+        )
+        return self._query(sql, list(row.values()))
+
+    def _update(self, table: str, row_id: str, fields: dict) -> list[dict]:
+        fields = _encode(fields)
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        return self._query(
+            f"UPDATE {table} SET {assignments} WHERE id = ? RETURNING *", [*fields.values(), row_id]
+        )
+
+    # -- ideas ---------------------------------------------------------------
+
+    @staticmethod
+    def _new_idea(row: dict) -> dict:
+        ts = now_iso()
+        return {
+            "id": str(uuid.uuid4()),
+            "tags": [],
+            "metadata": {},
+            "is_archived": False,
+            **row,
+            "created_at": ts,
+            "updated_at": ts,
+        }
+
+    async def insert_idea(self, row: dict) -> dict:
+        return self._insert("ideas", self._new_idea(row))[0]
+
+    async def insert_ideas(self, rows: list[dict]) -> list[dict]:
+        with self._transaction():
+            return [self._insert("ideas", self._new_idea(row))[0] for row in rows]
+
+    async def upsert_ideas(self, rows: list[dict]) -> list[dict]:
+        with self._transaction():
+            written = []
+            for row in rows:
+                new = {**self._new_idea(row), "created_at": row["created_at"]}
+                written += self._insert("ideas", new, _IDEA_UPSERT)
+            return written
+
+    async def get_idea(self, idea_id: str) -> dict:
+        return one(self._query("SELECT * FROM ideas WHERE id = ?", (idea_id,)), f"Idea {idea_id}")
+
+    async def update_idea(self, idea_id: str, fields: dict) -> dict:
+        check_fields(fields, IDEA_UPDATABLE)
+        return one(self._update("ideas", idea_id, {**fields, "updated_at": now_iso()}), f"Idea {idea_id}")
+
+    @staticmethod
+    def _idea_filters(category, tags) -> tuple[list[str], list]:
+        where, params = ["NOT i.is_archived"], []
+        if category:
+            where.append("i.category = ?")
+            params.append(category)
+        if tags:
+            where.append(f"EXISTS (SELECT 1 FROM json_each(i.tags) WHERE value IN ({_placeholders(tags)}))")
+            params += tags
+        return where, params
+
+    async def recent_ideas(self, *, category=None, tags=None, view="summary", limit, after=None):
+        where, params = self._idea_filters(category, tags)
+        if after:
+            where.append("(i.created_at, i.id) < (?, ?)")
+            params += list(after)
+        columns = IDEA_SUMMARY_SQL if view == "summary" else "i.*"
+        return self._query(
+            f"SELECT {columns} FROM ideas i WHERE {' AND '.join(where)} "
+            "ORDER BY i.created_at DESC, i.id DESC LIMIT ?",
+            [*params, limit],
+        )
+
+    async def search_ideas(self, query, *, category=None, tags=None, fuzzy=False, view="summary", limit, after=None):
+        where, params = self._idea_filters(category, tags)
+        columns = ", ".join(f"i.{f}" for f in IDEA_SUMMARY_FIELDS if f != "snippet") if view == "summary" else "i.*"
+        if fuzzy:
+            sql = (
+                f"SELECT {columns}, word_similarity(?, i.title) AS relevance, prefix_snippet(i.content) AS snippet "
+                f"FROM ideas i WHERE {' AND '.join(where)}"
+            )
+            params = [query, *params]
+            floor = FUZZY_THRESHOLD
+        else:
+            match = fts_query(query)
+            if not match:
+                return []
+            # bm25 is lower-is-better; negate it so rank sorts like ts_rank_cd.
+            sql = (
+                f"SELECT {columns}, -bm25(ideas_fts, 2.0, 1.0) AS relevance, "
+                "snippet(ideas_fts, 1, '**', '**', '...', 20) AS snippet "
+                f"FROM ideas_fts JOIN ideas i ON i.rowid = ideas_fts.rowid "
+                f"WHERE ideas_fts MATCH ? AND {' AND '.join(where)}"
+            )
+            params = [match, *params]
+            floor = None
+        outer, outer_params = [], []
+        if floor is not None:
+            outer.append("relevance > ?")
+            outer_params.append(floor)
+        if after:
+            outer.append("(relevance, created_at, id) < (?, ?, ?)")
+            outer_params += list(after)
+        rows = self._query(
+            f"SELECT * FROM ({sql}) {'WHERE ' + ' AND '.join(outer) if outer else ''} "
+            "ORDER BY relevance DESC, created_at DESC, id DESC LIMIT ?",
+            [*params, *outer_params, limit],
+        )
+        for row in rows:
+            row["rank"] = row.pop("relevance")
+        return rows
+
+    async def all_ideas_text(self) -> list[dict]:
+        return self._query("SELECT id, title, content, category, tags FROM ideas WHERE NOT is_archived")
+
+    async def all_idea_tags(self) -> list[dict]:
+        return self._query("SELECT id, category, tags, created_at FROM ideas WHERE NOT is_archived")
+
+    async def imported_ideas(self) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT id, json_extract(metadata, '$.source') AS source FROM ideas WHERE source IS NOT NULL"
+        ).fetchall()
+        return [{"id": row_id, "source": json.loads(source)} for row_id, source in rows]
+
+    async def ideas_by_ids(self, ids: list[str], *, view: str = "summary") -> list[dict]:
+        # The ids travel as one JSON array parameter, so this is one query at any size.
+        columns = IDEA_SUMMARY_SQL if view == "summary" else "i.*"
+        return self._query(
+            f"SELECT {columns} FROM ideas i WHERE i.id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(dict.fromkeys(ids))),),
+        )
+
+    async def activity_summary(self, *, group_by, since=None, until=None, category=None):
+        where, params = ["ideas > 0"], []
+        if since:
+            where.append("day >= ?")
+            params.append(since)
+        if until:
+            where.append("day < ?")
+            params.append(until)
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        return self._query(
+            f"SELECT {ACTIVITY_PERIOD_SQL[group_by]} AS period, category, sum(ideas) AS ideas "
+            f"FROM idea_activity_daily WHERE {' AND '.join(where)} GROUP BY 1, 2 ORDER BY 1, 2",
+            params,
+        )
+
+    # -- topics --------------------------------------------------------------
+
+    @staticmethod
+    def _new_topic(row: dict) -> dict:
+        ts = now_iso()
+        return {"id": str(uuid.uuid4()), **row, "created_at": ts, "updated_at": ts}
+
+    async def insert_topic(self, row: dict) -> dict:
+        return self._insert("topics", self._new_topic(row))[0]
+
+    async def upsert_topics(self, rows: list[dict]) -> list[dict]:
+        with self._transaction():
+            written = []
+            for row in rows:
+                written += self._insert("topics", self._new_topic(row), "ON CONFLICT (name) DO NOTHING")
+            return written
+
+    async def list_topics(self, *, category=None, limit, after=None):
+        where, params = ["1"], []
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if after:
+            where.append("name > ?")
+            params.append(after)
+        return self._query(
+            f"SELECT * FROM topics WHERE {' AND '.join(where)} ORDER BY name LIMIT ?", [*params, limit]
+        )
+
+    async def all_topics(self) -> list[dict]:
+        return self._query("SELECT id, name, description, category FROM topics ORDER BY name")
+
+    async def tag_usage_counts(self) -> dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT t.value, count(*) FROM ideas, json_each(ideas.tags) AS t WHERE NOT ideas.is_archived GROUP BY t.value"
+        ).fetchall()
+        return {tag: uses for tag, uses in rows}
+
+    # -- relationships -------------------------------------------------------
+
+    @staticmethod
+    def _new_link(row: dict) -> dict:
+        ts = now_iso()
+        return {"id": str(uuid.uuid4()), "relationship_type": "related", **row, "created_at": ts, "updated_at": ts}
+
+    async def insert_link(self, row: dict) -> dict:
+        return self._insert("idea_relationships", self._new_link(row))[0]
+
+    async def upsert_links(self, rows: list[dict]) -> list[dict]:
+        with self._transaction():
+            written = []
+            for row in rows:
+                written += self._insert(
+                    "idea_relationships", self._new_link(row), "ON CONFLICT (source_id, target_id) DO NOTHING"
+                )
+            return written
+
+    def _ideas_by_id(self, ids, columns: str) -> dict[str, dict]:
+        ids = list(ids)
+        if not ids:
+            return {}
+        rows = self._query(f"SELECT {columns} FROM ideas i WHERE i.id IN ({_placeholders(ids)})", ids)
+        return {row["id"]: row for row in rows}
+
+    async def related(self, idea_id: str, *, view: str = "summary") -> list[dict]:
+        fwd = self._query("SELECT * FROM idea_relationships WHERE source_id = ?", (idea_id,))
+        rev = self._query("SELECT * FROM idea_relationships WHERE target_id = ?", (idea_id,))
+        ideas = self._ideas_by_id(
+            {r["target_id"] for r in fwd} | {r["source_id"] for r in rev},
+            IDEA_SUMMARY_SQL if view == "summary" else "i.*",
+        )
+        return [{**r, "target": ideas.get(r["target_id"])} for r in fwd] + [
+            {**r, "source": ideas.get(r["source_id"])} for r in rev
+        ]
+
+    async def linked_ids(self, idea_id: str) -> set[str]:
+        rows = self.conn.execute(
+            "SELECT target_id FROM idea_relationships WHERE source_id = ? "
+            "UNION SELECT source_id FROM idea_relationships WHERE target_id = ?",
+            (idea_id, idea_id),
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    async def traverse(self, start_id, *, max_depth, relationship_types, direction, max_nodes):
+        # Breadth-first, one indexed query per hop, like traverse_related in
+        # schema.sql: min depth per node, closest kept first, and no further
+        # hops once more than the cap are known.
+        cap = min(max_nodes, 200)
+        type_filter, type_params = "", []
+        if relationship_types:
+            type_filter = f" AND relationship_type IN ({_placeholders(relationship_types)})"
+            type_params = list(relationship_types)
+        depth_of, frontier = {start_id: 0}, [start_id]
+        for depth in range(1, min(max_depth, 4) + 1):
+            if not frontier or len(depth_of) > cap:
+                break
+            hops = []
+            marks = _placeholders(frontier)
+            if direction in ("out", "both"):
+                hops.append(
+                    (f"SELECT target_id FROM idea_relationships WHERE source_id IN ({marks}){type_filter}",
+                     [*frontier, *type_params])
+                )
+            if direction in ("in", "both"):
+                hops.append(
+                    (f"SELECT source_id FROM idea_relationships WHERE target_id IN ({marks}){type_filter}",
+                     [*frontier, *type_params])
+                )
+            reached = {row[0] for sql, params in hops for row in self.conn.execute(sql, params)}
+            frontier = sorted(n for n in reached if n not in depth_of)
+            depth_of.update((n, depth) for n in frontier)
+        kept = sorted(depth_of, key=lambda n: (depth_of[n], n))[:cap]
+        ideas = self._ideas_by_id(kept, "i.id, i.title, i.category, i.tags, i.is_archived, prefix_snippet(i.content) AS snippet")
+        marks = _placeholders(kept)
+        edges = self._query(
+            "SELECT id, source_id, target_id, relationship_type, note FROM idea_relationships "
+            f"WHERE source_id IN ({marks}) AND target_id IN ({marks}){type_filter} ORDER BY created_at, id",
+            [*kept, *kept, *type_params],
+        )
+        return {
+            "nodes": [{**ideas[n], "depth": depth_of[n]} for n in kept if n in ideas],
+            "edges": edges,
+            "truncated": len(depth_of) > cap,
+        }
+
+    async def delete_link(self, relationship_id: str) -> list[dict]:
+        return self._query("DELETE FROM idea_relationships WHERE id = ? RETURNING *", (relationship_id,))
+
+    # -- insights ------------------------------------------------------------
+
+    async def insert_insight(self, row: dict) -> dict:
+        ts = now_iso()
+        row = {
+            "id": str(uuid.uuid4()),
+            "related_idea_ids": [],
+            "tags": [],
+            "is_actioned": False,
+            **row,
+            "created_at": ts,
+            "updated_at": ts,
+        }
+        return self._insert("insights", row)[0]
+
+    async def list_insights(self, *, category=None, unactioned_only=False, view="summary", limit, after=None):
+        where, params = ["1"], []
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if unactioned_only:
+            where.append("NOT is_actioned")
+        if after:
+            where.append("(created_at, id) < (?, ?)")
+            params += list(after)
+        columns = INSIGHT_SUMMARY_SQL if view == "summary" else "*"
+        return self._query(
+            f"SELECT {columns} FROM insights WHERE {' AND '.join(where)} ORDER BY created_at DESC, id DESC LIMIT ?",
+            [*params, limit],
+        )
+
+    async def insights_for_idea(self, idea_id, *, view="summary", limit, after=None):
+        where, params = ["s.id IN (SELECT insight_id FROM insight_ideas WHERE idea_id = ?)"], [idea_id]
+        if after:
+            where.append("(s.created_at, s.id) < (?, ?)")
+            params += list(after)
+        columns = INSIGHT_SUMMARY_SQL if view == "summary" else "*"
+        return self._query(
+            f"SELECT {columns} FROM insights s WHERE {' AND '.join(where)} ORDER BY s.created_at DESC, s.id DESC LIMIT ?",
+            [*params, limit],
+        )
+
+    async def update_insight(self, insight_id: str, fields: dict) -> dict:
+        check_fields(fields, INSIGHT_UPDATABLE)
+        return one(self._update("insights", insight_id, {**fields, "updated_at": now_iso()}), f"Insight {insight_id}")
+
+    # -- export --------------------------------------------------------------
+
+    async def export_rows(self, table, *, since=None, after=None, limit):
+        check_export_table(table)
+        where, params = [], []
+        if since:
+            where.append("updated_at >= ?")
+            params.append(since)
+        if after:
+            where.append("(updated_at, id) > (?, ?)")
+            params += list(after)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        return self._query(f"{sql} ORDER BY updated_at, id LIMIT ?", [*params, limit])
+
+    # -- change feed ---------------------------------------------------------
+
+    async def changes_since(self, *, after=None, tables=EXPORT_TABLES, limit):
+        for table in tables:
+            check_export_table(table)
+        where, params = [f"table_name IN ({_placeholders(tables)})"], list(tables)
+        if after:
+            where.append("seq > ?")
+            params.append(after[1])
+        changes = self._query(
+            "SELECT '0' AS txid, seq, table_name, row_id, op, changed_at FROM change_log "
+            f"WHERE {' AND '.join(where)} ORDER BY seq LIMIT ?",
+            [*params, limit],
+        )
+        rows = {}
+        for table in {c["table_name"] for c in changes}:
+            ids = [c["row_id"] for c in changes if c["table_name"] == table and c["op"] != "delete"]
+            found = self._query(f"SELECT * FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+            rows.update(((table, row["id"]), row) for row in found)
+        for change in changes:
+            change["row"] = None if change["op"] == "delete" else rows.get((change["table_name"], change["row_id"]))
+        return changes
+
+    async def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,291 @@
+"""Storage backed by Supabase (PostgREST) — the hosted deployment.
+
+Ranking, keyset filters and LIMIT are pushed into Postgres (see the SQL
+functions in schema/schema.sql) so only one page crosses the wire per call.
+"""
+
+import asyncio
+
+from supabase import AsyncClient, AsyncClientOptions
+
+from second_brain_mcp.metrics import count_upstream
+from second_brain_mcp.pagination import after_created, after_updated
+from second_brain_mcp.storage.base import (
+    EXPORT_TABLES,
+    IDEA_SUMMARY_FIELDS,
+    IDEA_UPDATABLE,
+    INSIGHT_SUMMARY_FIELDS,
+    INSIGHT_UPDATABLE,
+    Storage,
+    check_export_table,
+    check_fields,
+    one,
+)
+from second_brain_mcp.storage.transport import ResilientTransport, build_client
+
+IDEA_SUMMARY_COLUMNS = ",".join(IDEA_SUMMARY_FIELDS)
+INSIGHT_SUMMARY_COLUMNS = ",".join(INSIGHT_SUMMARY_FIELDS)
+PAGE = 1000
+# Ids per in.(...) filter: keeps each request URL well under proxy limits
+# (~40 bytes per UUID). A page of insights rarely needs more than one chunk.
+IN_CHUNK = 150
+# Read-only SQL functions: safe to retry like GETs (see transport.py).
+READ_RPCS = frozenset(
+    {
+        "search_ideas_ranked",
+        "search_ideas_fuzzy",
+        "tag_usage_counts",
+        "traverse_related",
+        "activity_summary",
+        "changes_since",
+    }
+)
+
+
+def _columns(view: str, summary_columns: str) -> str:
+    return summary_columns if view == "summary" else "*"
+
+
+class SupabaseStorage(Storage):
+    name = "supabase"
+
+    def __init__(self, url: str, key: str):
+        # The async client keeps every PostgREST round trip off the event loop,
+        # so concurrent mobile requests don't queue behind each other. Our own
+        # httpx client adds pooling, timeouts, retries and circuit breaking
+        # (transport.py) and counts every request for the tool metrics.
+        self.transport = ResilientTransport(READ_RPCS, on_send=count_upstream)
+        self.http = build_client(self.transport)
+        self.client = AsyncClient(url, key, options=AsyncClientOptions(httpx_client=self.http))
+
+    async def warm(self) -> None:
+        # One cheap request opens the TLS + HTTP/2 connection that later
+        # tool calls reuse from the pool.
+        await self.client.table("topics").select("id").limit(1).execute()
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+    def metrics(self) -> list[tuple[str, str, float]]:
+        return self.transport.metrics()
+
+    async def _all(self, query, key: str) -> list[dict]:
+        """Drain query() in keyset-paged chunks ordered by a unique column.
+
+        query is a factory because PostgREST builders are mutated in place.
+        """
+        rows, after = [], None
+        while True:
+            page = query().order(key).limit(PAGE)
+            if after is not None:
+                page = page.gt(key, after)
+            chunk = (await page.execute()).data
+            rows += chunk
+            if len(chunk) < PAGE:
+                return rows
+            after = chunk[-1][key]
+
+    # -- ideas ---------------------------------------------------------------
+
+    async def insert_idea(self, row: dict) -> dict:
+        return (await self.client.table("ideas").insert(row).execute()).data[0]
+
+    async def insert_ideas(self, rows: list[dict]) -> list[dict]:
+        return (await self.client.table("ideas").insert(rows).execute()).data
+
+    async def upsert_ideas(self, rows: list[dict]) -> list[dict]:
+        return (await self.client.table("ideas").upsert(rows, on_conflict="id").execute()).data
+
+    async def get_idea(self, idea_id: str) -> dict:
+        rows = (await self.client.table("ideas").select("*").eq("id", idea_id).execute()).data
+        return one(rows, f"Idea {idea_id}")
+
+    async def update_idea(self, idea_id: str, fields: dict) -> dict:
+        check_fields(fields, IDEA_UPDATABLE)
+        rows = (await self.client.table("ideas").update(fields).eq("id", idea_id).execute()).data
+        return one(rows, f"Idea {idea_id}")
+
+    async def recent_ideas(self, *, category=None, tags=None, view="summary", limit, after=None):
+        q = self.client.table("ideas").select(_columns(view, IDEA_SUMMARY_COLUMNS)).eq("is_archived", False)
+        if category:
+            q = q.eq("category", category)
+        if tags:
+            q = q.overlaps("tags", tags)
+        if after:
+            q = q.or_(after_created(*after))
+        return (await q.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()).data
+
+    async def search_ideas(self, query, *, category=None, tags=None, fuzzy=False, view="summary", limit, after=None):
+        params = {
+            "search_query": query,
+            "filter_category": category,
+            "filter_tags": tags or None,
+            "max_results": limit,
+        }
+        if after:
+            params.update(zip(("after_rank", "after_created_at", "after_id"), after))
+        rpc = self.client.rpc("search_ideas_fuzzy" if fuzzy else "search_ideas_ranked", params)
+        if view == "summary":
+            rpc = rpc.select(f"{IDEA_SUMMARY_COLUMNS},rank")
+        return (await rpc.execute()).data
+
+    async def all_ideas_text(self) -> list[dict]:
+        return await self._all(
+            lambda: self.client.table("ideas").select("id,title,content,category,tags").eq("is_archived", False),
+            "id",
+        )
+
+    async def all_idea_tags(self) -> list[dict]:
+        return await self._all(
+            lambda: self.client.table("ideas").select("id,category,tags,created_at").eq("is_archived", False),
+            "id",
+        )
+
+    async def imported_ideas(self) -> list[dict]:
+        # Served by the partial index idx_ideas_imported.
+        return await self._all(
+            lambda: self.client.table("ideas").select("id,source:metadata->source").not_.is_("metadata->source", "null"),
+            "id",
+        )
+
+    async def ideas_by_ids(self, ids: list[str], *, view: str = "summary") -> list[dict]:
+        ids = list(dict.fromkeys(ids))
+        columns = _columns(view, IDEA_SUMMARY_COLUMNS)
+        # One batched in.(...) query per chunk, all chunks in flight at once.
+        chunks = await asyncio.gather(
+            *(
+                self.client.table("ideas").select(columns).in_("id", ids[i : i + IN_CHUNK]).execute()
+                for i in range(0, len(ids), IN_CHUNK)
+            )
+        )
+        return [row for chunk in chunks for row in chunk.data]
+
+    async def activity_summary(self, *, group_by, since=None, until=None, category=None):
+        params = {"group_by": group_by, "since": since, "until": until, "filter_category": category}
+        return (await self.client.rpc("activity_summary", params).execute()).data
+
+    # -- topics --------------------------------------------------------------
+
+    async def insert_topic(self, row: dict) -> dict:
+        return (await self.client.table("topics").insert(row).execute()).data[0]
+
+    async def upsert_topics(self, rows: list[dict]) -> list[dict]:
+        return (
+            await self.client.table("topics").upsert(rows, on_conflict="name", ignore_duplicates=True).execute()
+        ).data
+
+    async def list_topics(self, *, category=None, limit, after=None):
+        q = self.client.table("topics").select("*")
+        if category:
+            q = q.eq("category", category)
+        if after:
+            # Topic names are unique, so the name alone is a complete keyset.
+            q = q.gt("name", after)
+        return (await q.order("name").limit(limit).execute()).data
+
+    async def all_topics(self) -> list[dict]:
+        return await self._all(lambda: self.client.table("topics").select("id,name,description,category"), "name")
+
+    async def tag_usage_counts(self) -> dict[str, int]:
+        rows = (await self.client.rpc("tag_usage_counts").execute()).data
+        return {row["tag"]: row["uses"] for row in rows}
+
+    # -- relationships -------------------------------------------------------
+
+    async def insert_link(self, row: dict) -> dict:
+        return (await self.client.table("idea_relationships").insert(row).execute()).data[0]
+
+    async def upsert_links(self, rows: list[dict]) -> list[dict]:
+        return (
+            await self.client.table("idea_relationships")
+            .upsert(rows, on_conflict="source_id,target_id", ignore_duplicates=True)
+            .execute()
+        ).data
+
+    async def related(self, idea_id: str, *, view: str = "summary") -> list[dict]:
+        columns = _columns(view, IDEA_SUMMARY_COLUMNS)
+        # The two directions are independent, so fetch them concurrently.
+        fwd, rev = await asyncio.gather(
+            self.client.table("idea_relationships")
+            .select(f"*, target:target_id({columns})")
+            .eq("source_id", idea_id)
+            .execute(),
+            self.client.table("idea_relationships")
+            .select(f"*, source:source_id({columns})")
+            .eq("target_id", idea_id)
+            .execute(),
+        )
+        return fwd.data + rev.data
+
+    async def linked_ids(self, idea_id: str) -> set[str]:
+        rows = (
+            await self.client.table("idea_relationships")
+            .select("source_id,target_id")
+            .or_(f"source_id.eq.{idea_id},target_id.eq.{idea_id}")
+            .execute()
+        ).data
+        return ({r["source_id"] for r in rows} | {r["target_id"] for r in rows}) - {idea_id}
+
+    async def traverse(self, start_id, *, max_depth, relationship_types, direction, max_nodes):
+        params = {
+            "start_id": start_id,
+            "max_depth": max_depth,
+            "relationship_types": relationship_types or None,
+            "direction": direction,
+            "max_nodes": max_nodes,
+        }
+        return (await self.client.rpc("traverse_related", params).execute()).data
+
+    async def delete_link(self, relationship_id: str) -> list[dict]:
+        return (await self.client.table("idea_relationships").delete().eq("id", relationship_id).execute()).data
+
+    # -- insights ------------------------------------------------------------
+
+    async def insert_insight(self, row: dict) -> dict:
+        return (await self.client.table("insights").insert(row).execute()).data[0]
+
+    async def list_insights(self, *, category=None, unactioned_only=False, view="summary", limit, after=None):
+        q = self.client.table("insights").select(_columns(view, INSIGHT_SUMMARY_COLUMNS))
+        if category:
+            q = q.eq("category", category)
+        if unactioned_only:
+            q = q.eq("is_actioned", False)
+        if after:
+            q = q.or_(after_created(*after))
+        return (await q.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()).data
+
+    async def insights_for_idea(self, idea_id, *, view="summary", limit, after=None):
+        # related_idea_ids @> {idea_id}: served by the GIN index idx_insights_related_ideas.
+        q = (
+            self.client.table("insights")
+            .select(_columns(view, INSIGHT_SUMMARY_COLUMNS))
+            .contains("related_idea_ids", [idea_id])
+        )
+        if after:
+            q = q.or_(after_created(*after))
+        return (await q.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()).data
+
+    async def update_insight(self, insight_id: str, fields: dict) -> dict:
+        check_fields(fields, INSIGHT_UPDATABLE)
+        rows = (await self.client.table("insights").update(fields).eq("id", insight_id).execute()).data
+        return one(rows, f"Insight {insight_id}")
+
+    # -- export --------------------------------------------------------------
+
+    async def export_rows(self, table, *, since=None, after=None, limit):
+        check_export_table(table)
+        q = self.client.table(table).select("*")
+        if since:
+            q = q.gte("updated_at", since)
+        if after:
+            q = q.or_(after_updated(*after))
+        return (await q.order("updated_at").order("id").limit(limit).execute()).data
+
+    # -- change feed ---------------------------------------------------------
+
+    async def changes_since(self, *, after=None, tables=EXPORT_TABLES, limit):
+        for table in tables:
+            check_export_table(table)
+        txid, seq = after or (None, 0)
+        params = {"after_txid": txid, "after_seq": seq, "tables": list(tables), "max_rows": limit}
+        return (await self.client.rpc("changes_since", params).execute()).data
@@ -0,0 +1,173 @@
+"""The HTTP transport under SupabaseStorage: pooling, timeouts, retries, circuit breaking.
+
+Every PostgREST request goes through one httpx.AsyncClient built by
+build_client():
+
+- one pooled keep-alive HTTP/2 connection set, kept open between calls, so a
+  tool call pays a TLS handshake only after the pool has been idle for
+  KEEPALIVE_EXPIRY;
+- per-request timeouts (TIMEOUT) instead of postgrest's flat 120 s, so a stuck
+  request fails in seconds rather than holding the phone's request open;
+- retries with full-jitter exponential backoff for requests that are safe to
+  repeat: reads (GET/HEAD and the read-only RPCs named by the caller) on 5xx,
+  429 and dropped connections, and any request that never reached the server
+  (connect errors, pool timeouts);
+- a circuit breaker: after BREAKER_THRESHOLD requests in a row fail, requests
+  fail fast with CircuitOpenError for BREAKER_COOLDOWN seconds, then one
+  probe request decides whether to close it again.
+"""
+
+import asyncio
+import random
+import time
+
+import httpx
+
+TIMEOUT = httpx.Timeout(10.0, connect=3.0, pool=5.0)
+LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120.0)
+
+RETRY_ATTEMPTS = 3
+RETRY_BASE = 0.1
+RETRY_CAP = 2.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# The request never reached the server, so even a write is safe to resend.
+NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def before_request(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        wait = max(0.0, self.cooldown - (self.clock() - self.opened_at))
+        raise CircuitOpenError(
+            f"Supabase is unavailable ({self.failures} failed requests in a row); retrying in {wait:.0f}s"
+        )
+
+    def record(self, ok: bool | None) -> None:
+        """ok=None: the request ended without an answer either way (cancelled)."""
+        if ok is None:
+            self.probing = False
+            return
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            return
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+            # A failed probe restarts the cooldown.
+            if self.opened_at is None:
+                self.opens += 1
+            self.opened_at = self.clock()
+            self.probing = False
+
+
+def backoff(attempt: int) -> float:
+    """Full jitter: uniform over [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2**attempt))
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self, read_rpcs: frozenset[str] = frozenset(), on_send=None, inner=None, breaker=None):
+        """on_send: optional callback run before every attempt, retries included."""
+        self.inner = inner or httpx.AsyncHTTPTransport(http2=True, limits=LIMITS)
+        self.read_rpcs = read_rpcs
+        self.on_send = on_send
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+
+    def idempotent(self, request: httpx.Request) -> bool:
+        if request.method in ("GET", "HEAD"):
+            return True
+        head, _, name = request.url.path.rpartition("/")
+        return request.method == "POST" and head.endswith("/rpc") and name in self.read_rpcs
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before_request()
+        ok = None
+        try:
+            response = await self._send(request, retryable=self.idempotent(request))
+            ok = response.status_code < 500
+            return response
+        except httpx.TransportError:
+            ok = False
+            raise
+        finally:
+            self.breaker.record(ok)
+
+    async def _send(self, request: httpx.Request, retryable: bool) -> httpx.Response:
+        attempt = 0
+        while True:
+            if self.on_send:
+                self.on_send()
+            try:
+                response = await self.inner.handle_async_request(request)
+            except httpx.TransportError as e:
+                if attempt + 1 < RETRY_ATTEMPTS and (retryable or isinstance(e, NOT_SENT)):
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(backoff(attempt))
+                    continue
+                raise
+            if response.status_code in RETRY_STATUSES and retryable and attempt + 1 < RETRY_ATTEMPTS:
+                await response.aclose()
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(retry_after(response) or backoff(attempt))
+                continue
+            return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def metrics(self) -> list[tuple[str, str, float]]:
+        return [
+            ("second_brain_upstream_retries_total", "counter", self.retries),
+            ("second_brain_circuit_open", "gauge", 0 if self.breaker.state == "closed" else 1),
+            ("second_brain_circuit_opens_total", "counter", self.breaker.opens),
+            ("second_brain_circuit_rejected_total", "counter", self.breaker.rejected),
+        ]
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Honour a short numeric Retry-After; anything longer than RETRY_CAP is capped."""
+    try:
+        return min(RETRY_CAP, float(response.headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+def build_client(transport: ResilientTransport) -> httpx.AsyncClient:
+    """httpx client for postgrest over transport, with the per-request timeouts."""
+    return httpx.AsyncClient(transport=transport, timeout=TIMEOUT, follow_redirects=True)
@@ -0,0 +1,143 @@
+"""In-process tag statistics behind tag_stats and related_tags.
+
+Questions like "what have I been tagging lately" or "what goes with #prayer"
+would otherwise mean pulling ideas into the conversation and counting tags
+by hand. This index keeps the answers precomputed for every live idea:
+
+- per tag: the ideas carrying it, a per-category breakdown and the newest
+  created_at among those ideas ("last used");
+- per tag pair: how many ideas carry both, as a sparse co-occurrence map
+  (tag -> Counter of other tags), so related_tags reads one row.
+
+It also remembers each idea's own tags and category, so add_idea,
+update_idea and archive_idea patch it with a diff instead of a rescan. A
+full load only happens on first use and then in the background once
+refresh_interval passes, to pick up writes made outside this process.
+
+Memory is O(ideas x tags per idea + distinct co-occurring pairs); a few
+hundred KB for thousands of notes.
+"""
+
+import heapq
+import time
+from collections import Counter
+
+from second_brain_mcp.resident import ResidentIndex
+
+
+class TagStats(ResidentIndex):
+    label = "Tag stats"
+
+    def __init__(self, load, refresh_interval: float = 600.0, clock=time.monotonic):
+        """load: async () -> list of non-archived idea rows (id, category, tags, created_at)."""
+        super().__init__(load, refresh_interval, clock)
+        self._build([])
+
+    # -- building ------------------------------------------------------------
+
+    def _build(self, ideas: list[dict]) -> None:
+        self.ideas: dict[str, tuple[frozenset[str], str | None, str]] = {}
+        self.postings: dict[str, set[str]] = {}
+        self.by_category: dict[str, Counter] = {}
+        self.pairs: dict[str, Counter] = {}
+        self.last_used: dict[str, str] = {}
+        for idea in ideas:
+            self._put(idea)
+
+    def _put(self, idea: dict) -> None:
+        tags = frozenset(idea.get("tags") or [])
+        entry = (tags, idea.get("category"), idea.get("created_at") or "")
+        if self.ideas.get(idea["id"]) == entry:
+            return
+        self._drop(idea["id"])
+        self.ideas[idea["id"]] = entry
+        tags, category, created_at = entry
+        for tag in tags:
+            self.postings.setdefault(tag, set()).add(idea["id"])
+            self.by_category.setdefault(tag, Counter())[category] += 1
+            if created_at > self.last_used.get(tag, ""):
+                self.last_used[tag] = created_at
+            others = self.pairs.setdefault(tag, Counter())
+            for other in tags:
+                if other != tag:
+                    others[other] += 1
+
+    def _drop(self, idea_id: str) -> None:
+        entry = self.ideas.pop(idea_id, None)
+        if entry is None:
+            return
+        tags, category, created_at = entry
+        for tag in tags:
+            ids = self.postings[tag]
+            ids.discard(idea_id)
+            if not ids:
+                # Last idea with this tag: forget the tag entirely.
+                del self.postings[tag], self.by_category[tag], self.pairs[tag], self.last_used[tag]
+                continue
+            _decrement(self.by_category[tag], category)
+            for other in tags:
+                if other != tag:
+                    _decrement(self.pairs[tag], other)
+            if self.last_used[tag] == created_at:
+                # The newest use went away; only this tag's own ideas can hold the next one.
+                self.last_used[tag] = max(self.ideas[i][2] for i in ids)
+
+    def _describe(self) -> str:
+        return f"{len(self.ideas)} ideas, {len(self.postings)} tags"
+
+    # -- querying ------------------------------------------------------------
+
+    def _row(self, tag: str) -> dict:
+        return {
+            "tag": tag,
+            "uses": len(self.postings[tag]),
+            "last_used": self.last_used[tag],
+            "by_category": dict(self.by_category[tag].most_common()),
+        }
+
+    def top(self, category: str | None = None, limit: int = 25) -> list[dict]:
+        """Most-used tags, optionally counting only ideas in one category."""
+        if category:
+            counts = ((c[category], tag) for tag, c in self.by_category.items() if c[category])
+        else:
+            counts = ((len(ids), tag) for tag, ids in self.postings.items())
+        ranked = heapq.nsmallest(limit, counts, key=lambda c: (-c[0], c[1]))
+        return [self._row(tag) for _, tag in ranked]
+
+    def get(self, tags: list[str]) -> list[dict]:
+        """Stats for specific tags; unknown tags are skipped."""
+        return [self._row(tag) for tag in dict.fromkeys(tags) if tag in self.postings]
+
+    def related(self, tag: str, limit: int = 10) -> list[dict]:
+        """Tags that appear on the same ideas as tag, by co-occurrence count.
+
+        jaccard is together / (ideas with either tag), which discounts tags
+        that co-occur only because they are on everything.
+        """
+        if tag not in self.postings:
+            return []
+        n = len(self.postings[tag])
+        ranked = heapq.nsmallest(limit, self.pairs[tag].items(), key=lambda p: (-p[1], p[0]))
+        return [
+            {
+                "tag": other,
+                "together": together,
+                "uses": len(self.postings[other]),
+                "jaccard": round(together / (n + len(self.postings[other]) - together), 3),
+            }
+            for other, together in ranked
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "ideas": len(self.ideas),
+            "tags": len(self.postings),
+            "pairs": sum(len(c) for c in self.pairs.values()) // 2,
+            "age_seconds": self.age(),
+        }
+
+
+def _decrement(counter: Counter, key) -> None:
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
@@ -1,41 +1,63 @@
-"""Ideas tools — core CRUD operations for the ideas table."""
+"""Ideas tools — core CRUD operations for the ideas table.
 
+Script-facing helpers over the same Storage layer the server uses (see
+storage/); unlike the server's tools they skip the read cache and paging.
+"""
 
-def add_idea(supabase, title: str, content: str, category: str, tags: list[str] = [], metadata: dict = {}) -> dict:
+from second_brain_mcp import bulk
+from second_brain_mcp.storage import Storage
+
+
+async def add_idea(
+    store: Storage, title: str, content: str, category: str, tags: list[str] | None = None, metadata: dict | None = None
+) -> dict:
     """Capture a new idea into the second brain."""
-    return supabase.table("ideas").insert({
-        "title": title, "content": content, "category": category,
-        "tags": tags, "metadata": metadata
-    }).execute().data[0]
-
-
-def search_ideas(supabase, query: str, category: str = None, tags: list[str] = []) -> list:
-    """Full-text search across ideas with optional category and tag filters."""
-    q = supabase.table("ideas").select("*")
-    if category:
-        q = q.eq("category", category)
-    if tags:
-        q = q.overlaps("tags", tags)
+    return await store.insert_idea(
+        {"title": title, "content": content, "category": category, "tags": tags or [], "metadata": metadata or {}}
+    )
+
+
+async def add_ideas_bulk(store: Storage, ideas: list[dict]) -> dict:
+    """Insert many ideas in one request, with a status per input row."""
+    pending, results = bulk.prepare_ideas(ideas)
+    if pending:
+        written = await store.insert_ideas([row for _, row in pending])
+        bulk.record_inserted(results, pending, written)
+    return bulk.summarize(results)
+
+
+async def search_ideas(
+    store: Storage,
+    query: str,
+    category: str | None = None,
+    tags: list[str] | None = None,
+    limit: int = 25,
+    fuzzy: bool = False,
+) -> list:
+    """Ranked full-text search across ideas with optional category and tag filters.
+
+    fuzzy matches titles by trigram similarity instead, tolerating typos.
+    """
     if query:
-        q = q.text_search("content", query)
-    return q.execute().data
+        return await store.search_ideas(query, category=category, tags=tags, fuzzy=fuzzy, view="full", limit=limit)
+    return await store.recent_ideas(category=category, tags=tags, view="full", limit=limit)
 
 
-def get_idea(supabase, idea_id: str) -> dict:
+async def get_idea(store: Storage, idea_id: str) -> dict:
     """Retrieve a specific idea by ID."""
-    return supabase.table("ideas").select("*").eq("id", idea_id).execute().data[0]
+    return await store.get_idea(idea_id)
 
 
-def update_idea(supabase, idea_id: str, fields: dict) -> dict:
+async def update_idea(store: Storage, idea_id: str, fields: dict) -> dict:
     """Update any fields on an existing idea."""
-    return supabase.table("ideas").update(fields).eq("id", idea_id).execute().data[0]
+    return await store.update_idea(idea_id, fields)
 
 
-def list_by_category(supabase, category: str, limit: int = 20) -> list:
+async def list_by_category(store: Storage, category: str, limit: int = 20) -> list:
     """Browse recent ideas in a specific category."""
-    return supabase.table("ideas").select("*").eq("category", category).order("created_at", desc=True).limit(limit).execute().data
+    return await store.recent_ideas(category=category, view="full", limit=limit)
 
 
-def archive_idea(supabase, idea_id: str) -> dict:
+async def archive_idea(store: Storage, idea_id: str) -> dict:
     """Archive an idea (soft delete)."""
-    return supabase.table("ideas").update({"is_archived": True}).eq("id", idea_id).execute().data[0]
+    return await store.update_idea(idea_id, {"is_archived": True})
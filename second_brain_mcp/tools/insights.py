@@ -1,27 +1,50 @@
 """Insights tools — manage Claude-generated patterns and action items."""
 
+from second_brain_mcp.storage import Storage
 
-def add_insight(supabase, title: str, summary: str, related_idea_ids: list[str] = [],
-                tags: list[str] = [], category: str = None, action_item: str = "") -> dict:
+
+async def add_insight(
+    store: Storage,
+    title: str,
+    summary: str,
+    related_idea_ids: list[str] | None = None,
+    tags: list[str] | None = None,
+    category: str | None = None,
+    action_item: str = "",
+) -> dict:
     """Record a new insight."""
-    data = {"title": title, "summary": summary, "related_idea_ids": related_idea_ids, "tags": tags}
+    data = {"title": title, "summary": summary, "related_idea_ids": related_idea_ids or [], "tags": tags or []}
     if category:
         data["category"] = category
     if action_item:
         data["action_item"] = action_item
-    return supabase.table("insights").insert(data).execute().data[0]
+    return await store.insert_insight(data)
 
 
-def list_insights(supabase, category: str = None, unactioned_only: bool = False) -> list:
+async def list_insights(store: Storage, category: str | None = None, unactioned_only: bool = False) -> list:
     """List insights, optionally filtered by category or action status."""
-    q = supabase.table("insights").select("*")
-    if category:
-        q = q.eq("category", category)
-    if unactioned_only:
-        q = q.eq("is_actioned", False)
-    return q.order("created_at", desc=True).execute().data
+    rows, after = [], None
+    while True:
+        page = await store.list_insights(
+            category=category, unactioned_only=unactioned_only, view="full", limit=1000, after=after
+        )
+        rows += page
+        if len(page) < 1000:
+            return rows
+        after = (page[-1]["created_at"], page[-1]["id"])
+
+
+async def insights_for_idea(store: Storage, idea_id: str) -> list:
+    """List the insights whose related_idea_ids include idea_id."""
+    rows, after = [], None
+    while True:
+        page = await store.insights_for_idea(idea_id, view="full", limit=1000, after=after)
+        rows += page
+        if len(page) < 1000:
+            return rows
+        after = (page[-1]["created_at"], page[-1]["id"])
 
 
-def mark_actioned(supabase, insight_id: str) -> dict:
+async def mark_actioned(store: Storage, insight_id: str) -> dict:
     """Mark an insight's action item as completed."""
-    return supabase.table("insights").update({"is_actioned": True}).eq("id", insight_id).execute().data[0]
+    return await store.update_insight(insight_id, {"is_actioned": True})
@@ -1,21 +1,46 @@
 """Relationships tools — manage idea cross-references."""
 
+from second_brain_mcp import bulk
+from second_brain_mcp.storage import Storage
 
-def link_ideas(supabase, source_id: str, target_id: str, relationship_type: str = "related", note: str = "") -> dict:
+
+async def link_ideas(
+    store: Storage, source_id: str, target_id: str, relationship_type: str = "related", note: str = ""
+) -> dict:
     """Create a relationship between two ideas."""
-    return supabase.table("idea_relationships").insert({
-        "source_id": source_id, "target_id": target_id,
-        "relationship_type": relationship_type, "note": note
-    }).execute().data[0]
+    return await store.insert_link(
+        {"source_id": source_id, "target_id": target_id, "relationship_type": relationship_type, "note": note}
+    )
+
+
+async def link_ideas_bulk(store: Storage, links: list[dict]) -> dict:
+    """Upsert many relationships in one request; existing pairs are skipped, not errors."""
+    pending, results = bulk.prepare_links(links)
+    if pending:
+        written = await store.upsert_links([row for _, row in pending])
+        bulk.record_upserted(results, pending, written, key=lambda r: (r["source_id"], r["target_id"]))
+    return bulk.summarize(results)
 
 
-def get_related_ideas(supabase, idea_id: str) -> list:
+async def get_related_ideas(store: Storage, idea_id: str) -> list:
     """Fetch all ideas linked to a given idea."""
-    fwd = supabase.table("idea_relationships").select("*, target:target_id(*)").eq("source_id", idea_id).execute().data
-    rev = supabase.table("idea_relationships").select("*, source:source_id(*)").eq("target_id", idea_id).execute().data
-    return fwd + rev
+    return await store.related(idea_id, view="full")
+
+
+async def traverse_related(
+    store: Storage,
+    idea_id: str,
+    depth: int = 2,
+    relationship_types: list[str] | None = None,
+    direction: str = "both",
+    max_nodes: int = 50,
+) -> dict:
+    """Walk the link graph several hops out from an idea in one round trip."""
+    return await store.traverse(
+        idea_id, max_depth=depth, relationship_types=relationship_types, direction=direction, max_nodes=max_nodes
+    )
 
 
-def remove_relationship(supabase, relationship_id: str) -> dict:
+async def remove_relationship(store: Storage, relationship_id: str) -> list:
     """Remove a relationship between ideas."""
-    return supabase.table("idea_relationships").delete().eq("id", relationship_id).execute().data
+    return await store.delete_link(relationship_id)
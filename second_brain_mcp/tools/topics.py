@@ -1,24 +1,54 @@
 """Topics tools — manage the topics/tags registry."""
 
+import weakref
 
-def add_topic(supabase, name: str, description: str = "", category: str = None) -> dict:
+from second_brain_mcp import bulk
+from second_brain_mcp.storage import Storage
+from second_brain_mcp.topic_index import TopicIndex
+
+# One resident index per store, loaded on first use and refreshed like the
+# server's (see topic_index.py), instead of a full reload per lookup.
+_indexes: "weakref.WeakKeyDictionary[Storage, TopicIndex]" = weakref.WeakKeyDictionary()
+
+
+async def add_topic(store: Storage, name: str, description: str = "", category: str | None = None) -> dict:
     """Add a new topic to the registry."""
     data = {"name": name}
     if description:
         data["description"] = description
     if category:
         data["category"] = category
-    return supabase.table("topics").insert(data).execute().data[0]
+    return await store.insert_topic(data)
+
 
+async def add_topics_bulk(store: Storage, topics: list[dict]) -> dict:
+    """Upsert many topics in one request; existing names are skipped, not errors."""
+    pending, results = bulk.prepare_topics(topics)
+    if pending:
+        written = await store.upsert_topics([row for _, row in pending])
+        bulk.record_upserted(results, pending, written, key=lambda r: r["name"])
+    return bulk.summarize(results)
 
-def list_topics(supabase, category: str = None) -> list:
+
+async def list_topics(store: Storage, category: str | None = None) -> list:
     """List all topics, optionally filtered by category."""
-    q = supabase.table("topics").select("*")
-    if category:
-        q = q.eq("category", category)
-    return q.order("name").execute().data
+    rows, after = [], None
+    while True:
+        page = await store.list_topics(category=category, limit=1000, after=after)
+        rows += page
+        if len(page) < 1000:
+            return rows
+        after = page[-1]["name"]
+
+
+async def search_topics(store: Storage, query: str, fuzzy: bool = False, limit: int = 10) -> list:
+    """Search topics by name (for autocomplete); fuzzy tolerates typos."""
+    index = _indexes.get(store)
+    if index is None:
+        index = _indexes[store] = TopicIndex(lambda: _load_index(store))
+    await index.ensure_fresh()
+    return index.fuzzy(query, limit=limit) if fuzzy else index.complete(query, limit=limit)
 
 
-def search_topics(supabase, query: str) -> list:
-    """Search topics by name (for autocomplete)."""
-    return supabase.table("topics").select("*").ilike("name", f"%{query}%").execute().data
+async def _load_index(store: Storage) -> tuple[list[dict], dict[str, int]]:
+    return await store.all_topics(), await store.tag_usage_counts()
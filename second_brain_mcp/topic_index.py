@@ -0,0 +1,163 @@
+"""In-process autocomplete index over the topic registry.
+
+The registry is small (hundreds of rows) and read on every autocomplete-style
+call, so it is held in memory instead of being queried with a leading-wildcard
+ILIKE that can't use an index:
+
+- a sorted array of lower-cased names, searched with bisect for prefixes;
+- trigram postings (trigram -> topic positions) for substring matches.
+
+Completions are ranked exact > prefix > word-prefix > substring, then by how
+many ideas use the tag. Fuzzy lookups score names the way pg_trgm's
+word_similarity does (padded per-word trigrams, threshold 0.3), like
+search_ideas_fuzzy in schema.sql does for titles. The index is refreshed in the background once it is
+older than refresh_interval, and add_topic and the idea write tools keep it fresh in between.
+"""
+
+import bisect
+import re
+import time
+from collections import Counter
+
+from second_brain_mcp.resident import ResidentIndex
+
+
+FUZZY_THRESHOLD = 0.3
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: each alphanumeric word padded as "  word "."""
+    grams = set()
+    for word in re.findall(r"[0-9a-z]+", text.lower()):
+        grams |= trigrams(f"  {word} ")
+    return grams
+
+
+def word_similarity(query: str, text: str) -> float:
+    """Share of the query's trigrams found in text, as pg_trgm's word_similarity."""
+    grams = word_trigrams(query)
+    return len(grams & word_trigrams(text)) / len(grams) if grams else 0.0
+
+
+class TopicIndex(ResidentIndex):
+    label = "Topic index"
+
+    def __init__(self, load, refresh_interval: float = 300.0, clock=time.monotonic):
+        """load: async () -> (topics, usage), where topics is a list of topic rows
+        and usage maps tag name -> number of ideas using it."""
+        super().__init__(load, refresh_interval, clock)
+        self._build(([], {}))
+
+    # -- building ------------------------------------------------------------
+
+    def _build(self, loaded: tuple[list[dict], dict[str, int]]) -> None:
+        topics, usage = loaded
+        topics = sorted(topics, key=lambda t: t["name"].lower())
+        self.topics = topics
+        self.keys = [t["name"].lower() for t in topics]
+        self.usage = dict(usage)
+        self.postings: dict[str, set[int]] = {}
+        self.word_postings: dict[str, set[int]] = {}
+        for pos, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                self.postings.setdefault(gram, set()).add(pos)
+            for gram in word_trigrams(key):
+                self.word_postings.setdefault(gram, set()).add(pos)
+
+    def _describe(self) -> str:
+        return f"{len(self.topics)} topics, {len(self.usage)} tags in use"
+
+    def add(self, topic: dict) -> None:
+        """Insert a newly created topic without a reload."""
+        self._apply(self._put, topic)
+
+    def _put(self, topic: dict) -> None:
+        key = topic["name"].lower()
+        pos = bisect.bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            self.topics[pos] = topic
+            return
+        # Positions after the insert point shift, so rebuild the postings.
+        # The registry is small and adds are rare, so this stays cheap.
+        self._build((self.topics + [topic], self.usage))
+
+    def count_usage(self, tags: list[str], delta: int = 1) -> None:
+        """Add delta uses to each tag (-1 when a tag comes off an idea or the idea is archived)."""
+        self._apply(self._count, tags, delta)
+
+    def _count(self, tags: list[str], delta: int) -> None:
+        for tag in tags:
+            uses = self.usage.get(tag, 0) + delta
+            if uses > 0:
+                self.usage[tag] = uses
+            else:
+                self.usage.pop(tag, None)
+
+    # -- querying ------------------------------------------------------------
+
+    def _prefix_range(self, prefix: str) -> range:
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff")
+        return range(lo, hi)
+
+    def _substring_hits(self, query: str) -> set[int]:
+        if len(query) < 3:
+            return {pos for pos, key in enumerate(self.keys) if query in key}
+        grams = sorted(trigrams(query), key=lambda g: len(self.postings.get(g, ())))
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self.postings.get(gram, set())
+            if not candidates:
+                break
+        # Trigram intersection can over-match; confirm each candidate.
+        return {pos for pos in candidates if query in self.keys[pos]}
+
+    def complete(self, query: str, limit: int = 10) -> list[dict]:
+        query = query.strip().lower()
+        if not query:
+            hits = set(range(len(self.keys)))
+        else:
+            hits = set(self._prefix_range(query)) | self._substring_hits(query)
+
+        def score(pos: int):
+            key = self.keys[pos]
+            if key == query:
+                tier = 0
+            elif key.startswith(query):
+                tier = 1
+            elif re.search(r"[-_ ]" + re.escape(query), key):
+                tier = 2
+            else:
+                tier = 3
+            return (tier, -self.usage.get(self.topics[pos]["name"], 0), key)
+
+        ranked = sorted(hits, key=score)[:limit]
+        return [{**self.topics[pos], "uses": self.usage.get(self.topics[pos]["name"], 0)} for pos in ranked]
+
+    def fuzzy(self, query: str, limit: int = 10, threshold: float = FUZZY_THRESHOLD) -> list[dict]:
+        """Typo-tolerant lookup ranked by word similarity, then usage."""
+        grams = word_trigrams(query)
+        if not grams:
+            return []
+        shared = Counter(pos for gram in grams for pos in self.word_postings.get(gram, ()))
+        scored = [(n / len(grams), pos) for pos, n in shared.items() if n / len(grams) > threshold]
+        scored.sort(key=lambda s: (-s[0], -self.usage.get(self.topics[s[1]]["name"], 0), self.keys[s[1]]))
+        return [
+            {
+                **self.topics[pos],
+                "uses": self.usage.get(self.topics[pos]["name"], 0),
+                "similarity": round(sim, 3),
+            }
+            for sim, pos in scored[:limit]
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self.topics),
+            "trigrams": len(self.postings),
+            "age_seconds": self.age(),
+        }
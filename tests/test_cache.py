@@ -0,0 +1,70 @@
+"""ReadCache single-flight loads: a burst of identical reads goes upstream once."""
+
+import asyncio
+
+from second_brain_mcp.cache import ReadCache
+
+KEY = ("ideas", "get_idea", "a")
+
+
+class CountingLoader:
+    """An upstream read that blocks until released and counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        n = self.calls
+        await self.release.wait()
+        return {"id": "a", "load": n}
+
+
+def test_burst_of_identical_reads_loads_once():
+    async def main():
+        cache, load = ReadCache(), CountingLoader()
+        burst = [asyncio.create_task(cache.get_or_load(KEY, load, tags=("idea:a",))) for _ in range(50)]
+        await asyncio.sleep(0)
+        load.release.set()
+        results = await asyncio.gather(*burst)
+        assert load.calls == 1
+        assert all(r == {"id": "a", "load": 1} for r in results)
+        assert cache.stats()["coalesced"] == 49
+        # The shared result was cached: the next read doesn't go upstream.
+        assert await cache.get_or_load(KEY, load) == {"id": "a", "load": 1}
+        assert load.calls == 1
+
+    asyncio.run(main())
+
+
+def test_invalidation_mid_flight_starts_a_fresh_load():
+    async def main():
+        cache, load = ReadCache(), CountingLoader()
+        before = [asyncio.create_task(cache.get_or_load(KEY, load, tags=("idea:a",))) for _ in range(5)]
+        await asyncio.sleep(0)
+        cache.invalidate("idea:a")  # a write lands while the load is in flight
+        after = [asyncio.create_task(cache.get_or_load(KEY, load, tags=("idea:a",))) for _ in range(5)]
+        await asyncio.sleep(0)
+        load.release.set()
+        assert [r["load"] for r in await asyncio.gather(*before)] == [1] * 5
+        assert [r["load"] for r in await asyncio.gather(*after)] == [2] * 5
+        assert load.calls == 2
+        # Only the load started after the write was cached.
+        assert cache.get(KEY) == (True, {"id": "a", "load": 2})
+
+    asyncio.run(main())
+
+
+def test_caller_going_away_does_not_cancel_the_shared_load():
+    async def main():
+        cache, load = ReadCache(), CountingLoader()
+        first = asyncio.create_task(cache.get_or_load(KEY, load))
+        second = asyncio.create_task(cache.get_or_load(KEY, load))
+        await asyncio.sleep(0)
+        first.cancel()
+        load.release.set()
+        assert await second == {"id": "a", "load": 1}
+        assert load.calls == 1
+
+    asyncio.run(main())